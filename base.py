@@ -17,6 +17,7 @@ class BaseRecordBrowser(ABC):
         self._style = None
         self._header = None
         self._content = None
+        self._layout = None
     
     @abstractmethod
     def create_header(self) -> widgets.Widget:
@@ -46,17 +47,28 @@ class BaseRecordBrowser(ABC):
         """)
     
     def _ipython_display_(self):
-        """Display the record browser."""
-        self._style = self.create_style()
-        self._header = self.create_header()
-        self._content = self.create_content()
-        
-        layout = widgets.VBox([
-            self._header,
-            self._content
-        ])
+        """Display the record browser. Widgets are built once and reused."""
+        if self._layout is None:
+            self._style = self.create_style()
+            self._header = self.create_header()
+            self._content = self.create_content()
+
+            self._layout = widgets.VBox([
+                self._header,
+                self._content
+            ])
         
-        display(self._style, layout)
+        display(self._style, self._layout)
+
+    def close(self):
+        """Close the built widgets, so the kernel no longer keeps them alive."""
+        pending = [self._layout, self._header, self._content]
+        while pending:
+            widget = pending.pop()
+            if isinstance(widget, widgets.Widget):
+                pending.extend(getattr(widget, 'children', ()))
+                widget.close()
+        self._style = self._header = self._content = self._layout = None
 
 
 class BaseDatasetBrowser(ABC):
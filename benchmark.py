@@ -0,0 +1,226 @@
+"""
+Benchmarks for the dataset processing tools.
+
+Examples::
+
+    # Save a local molecule corpus from a dataset
+    python benchmark.py save-corpus --dataset-id 357 --stop 500 corpus/
+
+    # Time the RDKit conversion engines and check that they agree
+    python benchmark.py conversion corpus/
+
+    # Memory of processor DataFrames with and without compact dtypes
+    python benchmark.py dtypes --n-entries 100000
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+from rdkit import Chem
+
+from util import RDKIT_ENGINES, gather_molecular_data
+
+
+def time_call(fn, repeat=3):
+    """Return the best wall time of ``repeat`` calls to ``fn`` and its last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def save_corpus(entries, path):
+    """Write entries as QCSchema JSON files, one per entry."""
+    os.makedirs(path, exist_ok=True)
+    for i, entry in enumerate(entries):
+        with open(os.path.join(path, f"{i:06d}.json"), "w") as f:
+            f.write(entry.json())
+
+
+def load_corpus(path):
+    """Load a corpus written by :func:`save_corpus`."""
+    from qcportal.singlepoint import SinglepointDatasetEntry
+
+    entries = []
+    for filename in sorted(glob.glob(os.path.join(path, "*.json"))):
+        with open(filename) as f:
+            entries.append(SinglepointDatasetEntry(**json.load(f)))
+    return entries
+
+
+def corpus_from_dataset(ds, stop=None):
+    """Fetch entries from a dataset to use as a corpus."""
+    entry_names = ds.entry_names[:stop]
+    ds.fetch_entries(entry_names)
+    return [ds.get_entry(name) for name in entry_names]
+
+
+def _convert_all(entries, engine):
+    return [
+        gather_molecular_data(
+            entry, get_openff=False, get_rdkit=True, include_error=True, rdkit_engine=engine
+        )
+        for entry in entries
+    ]
+
+
+def benchmark_conversion(entries, engines=RDKIT_ENGINES, repeat=3):
+    """
+    Time RDKit conversion of a corpus with each engine.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per engine with total and per-entry times and failure counts.
+    """
+    rows = []
+    for engine in engines:
+        seconds, results = time_call(lambda: _convert_all(entries, engine), repeat=repeat)
+        failures = sum(r["RDKit Molecule"] is None for r in results)
+        rows.append({
+            "Engine": engine,
+            "Entries": len(entries),
+            "Seconds": seconds,
+            "ms / Entry": 1000 * seconds / max(1, len(entries)),
+            "Failures": failures,
+        })
+    return pd.DataFrame(rows)
+
+
+def conversion_agreement(entries, engines=RDKIT_ENGINES):
+    """
+    Compare the canonical isomeric SMILES produced by each engine.
+
+    Entries that only one engine can convert count as disagreements.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per entry with the SMILES from each engine and whether they agree.
+    """
+    converted = {engine: _convert_all(entries, engine) for engine in engines}
+
+    rows = []
+    for i, entry in enumerate(entries):
+        row = {"Entry Name": getattr(entry, "name", i)}
+        for engine in engines:
+            data = converted[engine][i]
+            mol = data["RDKit Molecule"]
+            row[f"{engine} SMILES"] = Chem.MolToSmiles(mol) if mol is not None else None
+            row[f"{engine} Error"] = data.get("RDKit_Error")
+        smiles = {row[f"{engine} SMILES"] for engine in engines}
+        row["Agree"] = len(smiles) == 1 and None not in smiles
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def benchmark_dtypes(processor, stop=None):
+    """
+    Measure processor DataFrame memory with default and compact dtypes.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per output with rows, bytes for each setting and the saving.
+    """
+    outputs = {
+        "get_entry_df": lambda compact: processor.get_entry_df(stop=stop, compact=compact),
+        "get_record_property_df": lambda compact: processor.get_record_property_df(
+            stop=stop, compact=compact
+        ),
+        "get_specification_df": lambda compact: processor.get_specification_df(compact=compact).drop(
+            columns=["Protocols", "Properties"]
+        ),
+    }
+    rows = []
+    for name, build in outputs.items():
+        default = build(False)
+        compact = build(True)
+        default_bytes, compact_bytes = _frame_bytes(default), _frame_bytes(compact)
+        rows.append({
+            "Output": name,
+            "Rows": len(default),
+            "Default MiB": default_bytes / 2**20,
+            "Compact MiB": compact_bytes / 2**20,
+            "Saving": 1 - compact_bytes / max(1, default_bytes),
+        })
+    return pd.DataFrame(rows)
+
+
+def _connect(args):
+    import qcportal as ptl
+
+    client = ptl.PortalClient(args.address)
+    return client.get_dataset_by_id(args.dataset_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the QCBrowser prototype.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save = subparsers.add_parser("save-corpus", help="Save dataset entries as a local corpus")
+    save.add_argument("path")
+    save.add_argument("--address", default="https://api.qcarchive.molssi.org")
+    save.add_argument("--dataset-id", type=int, required=True)
+    save.add_argument("--stop", type=int, default=500)
+
+    conversion = subparsers.add_parser(
+        "conversion", help="Time the RDKit conversion engines and check agreement"
+    )
+    conversion.add_argument("path", help="Corpus directory")
+    conversion.add_argument("--repeat", type=int, default=3)
+
+    dtypes = subparsers.add_parser(
+        "dtypes", help="Measure DataFrame memory with and without compact dtypes"
+    )
+    dtypes.add_argument("--address", default="https://api.qcarchive.molssi.org")
+    dtypes.add_argument(
+        "--dataset-id", type=int, help="Dataset to measure (default: a local fake dataset)"
+    )
+    dtypes.add_argument("--n-entries", type=int, default=100_000, help="Size of the fake dataset")
+    dtypes.add_argument("--stop", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "save-corpus":
+        save_corpus(corpus_from_dataset(_connect(args), stop=args.stop), args.path)
+        return 0
+
+    if args.command == "conversion":
+        entries = load_corpus(args.path)
+        print(benchmark_conversion(entries, repeat=args.repeat).to_string(index=False))
+
+        agreement = conversion_agreement(entries)
+        disagree = agreement[~agreement["Agree"]]
+        print(f"\n{len(agreement) - len(disagree)}/{len(agreement)} entries agree")
+        if len(disagree):
+            print(disagree.to_string(index=False))
+        return 0 if disagree.empty else 1
+
+    if args.command == "dtypes":
+        from singlepoint import SinglePointDatasetProcessor
+
+        if args.dataset_id is not None:
+            ds = _connect(args)
+        else:
+            from testing import FakeSinglePointDataset
+
+            ds = FakeSinglePointDataset(n_entries=args.n_entries)
+        processor = SinglePointDatasetProcessor(ds)
+        print(benchmark_dtypes(processor, stop=args.stop).to_string(index=False))
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
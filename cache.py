@@ -0,0 +1,364 @@
+"""
+Size-aware LRU caching and memory accounting for processors.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 ** 2  # 512 MiB
+
+
+def approximate_size(obj, _seen=None, _depth=0, max_depth=8) -> int:
+    """
+    Approximate the memory footprint of an object in bytes.
+
+    Containers and object attributes are followed recursively. Private
+    attributes (leading underscore) are skipped so that references to
+    clients and caches are not counted. RDKit molecules are measured by
+    their binary size.
+    """
+    if obj is None:
+        return 0
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        # getsizeof includes the data only for arrays that own it
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+    if isinstance(obj, (str, bytes, int, float, bool)):
+        return sys.getsizeof(obj)
+
+    # RDKit molecules
+    to_binary = getattr(obj, "ToBinary", None)
+    if callable(to_binary):
+        try:
+            return len(to_binary())
+        except Exception:
+            pass
+
+    # OpenFF molecules keep their atoms in private attributes
+    if hasattr(obj, "n_atoms") and hasattr(obj, "conformers"):
+        size = 1000 * obj.n_atoms
+        for conformer in obj.conformers or []:
+            size += getattr(conformer, "nbytes", 0)
+        return size
+
+    size = sys.getsizeof(obj)
+    if _depth >= max_depth:
+        return size
+
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += approximate_size(k, _seen, _depth + 1, max_depth)
+            size += approximate_size(v, _seen, _depth + 1, max_depth)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            size += approximate_size(v, _seen, _depth + 1, max_depth)
+    elif hasattr(obj, "__dict__"):
+        for k, v in vars(obj).items():
+            if not k.startswith("_"):
+                size += approximate_size(v, _seen, _depth + 1, max_depth)
+    return size
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by bytes and/or items.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Maximum total approximate size of the cached values.
+    max_items : int, optional
+        Maximum number of cached values.
+    sizeof : callable, default=approximate_size
+        Function used to size values that are added without an explicit size.
+    on_evict : callable, optional
+        Called as ``on_evict(key, value)`` whenever a value is evicted.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_items: Optional[int] = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def snapshot(self) -> list:
+        """Return ``(key, value, size)`` for every cached value, least recently used first."""
+        with self._lock:
+            return [(key, value, size) for key, (value, size) in self._data.items()]
+
+    def get(self, key, default=None):
+        """Return a cached value and mark it as recently used."""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def touch(self, key) -> bool:
+        """Mark a key as recently used without counting a hit."""
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._data.move_to_end(key)
+            return True
+
+    def put(self, key, value, size: Optional[int] = None):
+        """Add or replace a value, evicting least-recently-used values as needed."""
+        if size is None:
+            size = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            evicted = self._evict(keep=key)
+
+        self._notify(evicted)
+
+    def pop(self, key, default=None):
+        """Remove a value without calling ``on_evict``."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, size = self._data.pop(key)
+            self.current_bytes -= size
+            return value
+
+    def clear(self):
+        """Evict everything."""
+        with self._lock:
+            evicted = [(k, v) for k, (v, _) in self._data.items()]
+            self.evictions += len(evicted)
+            self._data.clear()
+            self.current_bytes = 0
+        self._notify(evicted)
+
+    def _over_budget(self):
+        if self.max_bytes is not None and self.current_bytes > self.max_bytes:
+            return True
+        if self.max_items is not None and len(self._data) > self.max_items:
+            return True
+        return False
+
+    def _evict(self, keep=None):
+        evicted = []
+        while self._over_budget() and len(self._data) > 1:
+            key = next(iter(self._data))
+            if key == keep:
+                break
+            value, size = self._data.pop(key)
+            self.current_bytes -= size
+            self.evictions += 1
+            evicted.append((key, value))
+        return evicted
+
+    def _notify(self, evicted):
+        # Callbacks run outside the lock so they may touch the cache again
+        if self.on_evict is not None:
+            for key, value in evicted:
+                self.on_evict(key, value)
+
+
+class MemoryBudget(LRUCache):
+    """
+    LRU memory budget for the data a processor keeps alive.
+
+    Keys are tuples whose first element is the kind of data, e.g.
+    ``("entry", name)``, ``("record", name, spec)`` or ``("molecules", name)``.
+    Data that lives elsewhere (such as the dataset's own entry and record
+    caches) is tracked with :meth:`track`, and released through
+    ``on_evict`` when it falls out of the budget.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = DEFAULT_MEMORY_BUDGET, on_evict=None):
+        super().__init__(max_bytes=max_bytes, on_evict=on_evict)
+
+    def track(self, key, size: int):
+        """Account for data held elsewhere, without storing it here."""
+        self.put(key, None, size=size)
+
+    def usage(self) -> dict:
+        """
+        Report current memory usage.
+
+        Returns
+        -------
+        dict
+            Total and maximum bytes, plus item counts and bytes per kind.
+        """
+        with self._lock:
+            by_kind = {}
+            for key, (_, size) in self._data.items():
+                kind = key[0] if isinstance(key, tuple) else key
+                counts = by_kind.setdefault(kind, {"items": 0, "bytes": 0})
+                counts["items"] += 1
+                counts["bytes"] += size
+            return {
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "by_kind": by_kind,
+            }
+
+
+def release_from_dataset(ds, key):
+    """
+    Drop an entry or record from a QCPortal dataset's internal cache.
+
+    Datasets without a cache that supports deletion are left untouched.
+    """
+    cache = getattr(ds, "_cache_data", None)
+    if cache is None:
+        return
+
+    kind = key[0]
+    try:
+        if kind == "entry" and hasattr(cache, "delete_entry"):
+            cache.delete_entry(key[1])
+        elif kind == "record" and hasattr(cache, "delete_dataset_record"):
+            cache.delete_dataset_record(key[1], key[2])
+    except Exception:
+        # Releasing memory is best effort; the data can still be refetched
+        pass
+
+
+def restore_to_dataset(ds, entries) -> bool:
+    """
+    Put previously fetched entries back into a QCPortal dataset's internal cache.
+
+    Returns False (and does nothing) for datasets whose cache can't be updated.
+    """
+    cache = getattr(ds, "_cache_data", None)
+    if cache is None or not hasattr(cache, "update_entries"):
+        return False
+    try:
+        cache.update_entries(list(entries))
+    except Exception:
+        # Restoring is best effort; the entries can still be fetched
+        return False
+    return True
+
+
+class SharedConversionCache(LRUCache):
+    """
+    Molecule conversions shared by the processors of several datasets.
+
+    Keys identify a molecule rather than an entry (see
+    `util.molecule_key`), so a molecule that appears in several datasets is
+    converted once, even when the datasets are processed concurrently. Each
+    value remembers the dataset that converted it, which lets
+    :meth:`savings` report how much work was reused across datasets.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = DEFAULT_MEMORY_BUDGET):
+        super().__init__(max_bytes=max_bytes)
+        self.stats = {
+            "conversions": 0,
+            "reused": 0,
+            "reused_across_datasets": 0,
+            "seconds_converting": 0.0,
+            "timed_conversions": 0,
+        }
+        self._pending = {}
+
+    def get_conversion(self, key, owner):
+        """Return cached conversion data for ``owner``, or None."""
+        with self._lock:
+            cached = self.get(key)
+            if cached is None:
+                return None
+            first_owner, data = cached
+            self.stats["reused"] += 1
+            if first_owner != owner:
+                self.stats["reused_across_datasets"] += 1
+            return data
+
+    def get_or_convert(self, key, owner, convert):
+        """
+        Return cached conversion data, or call ``convert()`` and cache its result.
+
+        If another thread is already converting the same molecule, wait for
+        its result instead of converting again.
+        """
+        while True:
+            with self._lock:
+                data = self.get_conversion(key, owner)
+                if data is not None:
+                    return data
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            t0 = time.perf_counter()
+            data = convert()
+            self.put_conversion(key, data, owner, seconds=time.perf_counter() - t0)
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+        return data
+
+    def put_conversion(self, key, data, owner, seconds=None):
+        """Store conversion data produced by ``owner``, optionally with the time it took."""
+        with self._lock:
+            self.stats["conversions"] += 1
+            if seconds is not None:
+                self.stats["seconds_converting"] += seconds
+                self.stats["timed_conversions"] += 1
+        self.put(key, (owner, data), size=self.sizeof(data))
+
+    def savings(self) -> dict:
+        """
+        Report the work saved by sharing conversions.
+
+        Returns
+        -------
+        dict
+            Conversions done and reused (in total and across datasets), and
+            the estimated seconds saved, based on the mean conversion time.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            timed = stats.pop("timed_conversions")
+            mean = stats["seconds_converting"] / timed if timed else 0.0
+            stats["estimated_seconds_saved"] = mean * stats["reused"]
+            stats["bytes"] = self.current_bytes
+            stats["molecules"] = len(self)
+            return stats
@@ -0,0 +1,150 @@
+"""
+Vectorized comparison of specifications against a reference specification.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def error_statistics(deltas: np.ndarray) -> dict:
+    """
+    Compute error statistics for each row of a 2D array of deltas.
+
+    NaNs (missing values) are ignored per row.
+
+    Returns
+    -------
+    dict
+        Arrays of ``n``, ``mae``, ``rmse``, ``max_error`` (largest absolute
+        delta), ``mean_signed_error`` and ``std``, one value per row.
+    """
+    deltas = np.atleast_2d(np.asarray(deltas, dtype=float))
+    mask = ~np.isnan(deltas)
+    n = mask.sum(axis=1)
+    filled = np.where(mask, deltas, 0.0)
+    abs_filled = np.abs(filled)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = filled.sum(axis=1) / n
+        mae = abs_filled.sum(axis=1) / n
+        rmse = np.sqrt((filled ** 2).sum(axis=1) / n)
+        variance = np.where(mask, (deltas - mean[:, None]) ** 2, 0.0).sum(axis=1) / n
+    max_error = np.where(n > 0, abs_filled.max(axis=1, initial=0.0), np.nan)
+
+    return {
+        'n': n,
+        'mae': mae,
+        'rmse': rmse,
+        'max_error': max_error,
+        'mean_signed_error': mean,
+        'std': np.sqrt(variance),
+    }
+
+
+class SpecificationComparison:
+    """
+    Statistics of a scalar property of several specifications relative to a reference.
+
+    Deltas are ``target - reference`` for every entry where both have a
+    value, computed with NumPy over the processor's cached property
+    columns. Call :meth:`update` after more records have completed; only
+    entries that were still missing are fetched, and statistics are
+    recomputed only if new values arrived.
+
+    Parameters
+    ----------
+    processor : SinglePointDatasetProcessor
+        Processor whose property columns are used.
+    reference : str
+        Reference specification name.
+    targets : list of str
+        Specification names compared against the reference.
+    property_name : str
+        Scalar property to compare, e.g. ``"return_energy"``.
+    scale : float, default=1.0
+        Factor applied to the deltas, e.g. ``627.5094740631`` for hartree to kcal/mol.
+    """
+
+    def __init__(self, processor, reference, targets, property_name, scale=1.0):
+        self.processor = processor
+        self.reference = reference
+        self.targets = list(targets)
+        self.property_name = property_name
+        self.scale = scale
+
+        self._version = None
+        self._deltas = None
+        self._statistics = None
+
+    @property
+    def _columns(self):
+        return self.processor.property_columns
+
+    def _compute(self):
+        columns = self._columns
+        columns.load(self.reference, [self.property_name])
+        for target in self.targets:
+            columns.load(target, [self.property_name])
+        if self._version == columns.version:
+            return
+
+        reference = columns.get(self.reference, self.property_name)
+        targets = np.vstack([columns.get(t, self.property_name) for t in self.targets]) \
+            if self.targets else np.empty((0, len(reference)))
+        self._deltas = (targets - reference) * self.scale
+        self._statistics = error_statistics(self._deltas) if self.targets else None
+        self._version = columns.version
+
+    def update(self):
+        """Fetch values that were missing before and recompute if anything changed."""
+        for spec in [self.reference] + self.targets:
+            self._columns.refresh(spec, [self.property_name])
+        self._compute()
+        return self
+
+    @property
+    def statistics(self) -> pd.DataFrame:
+        """One row per target with N, MAE, RMSE, max error, mean signed error and standard deviation."""
+        self._compute()
+        stats = self._statistics or {k: [] for k in ('n', 'mae', 'rmse', 'max_error', 'mean_signed_error', 'std')}
+        return pd.DataFrame({
+            'Specification': self.targets,
+            'N': stats['n'],
+            'MAE': stats['mae'],
+            'RMSE': stats['rmse'],
+            'Max Error': stats['max_error'],
+            'Mean Signed Error': stats['mean_signed_error'],
+            'Std': stats['std'],
+        })
+
+    @property
+    def deltas(self) -> pd.DataFrame:
+        """Per-entry deltas, one column per target. Entries without a reference value are left out."""
+        self._compute()
+        reference = self._columns.get(self.reference, self.property_name)
+        keep = ~np.isnan(reference)
+        names = np.asarray(self.processor.entry_names, dtype=object)[keep]
+        return pd.DataFrame(
+            self._deltas[:, keep].T,
+            index=pd.Index(names, name='Entry Name'),
+            columns=self.targets,
+        )
+
+    def distribution(self, target, bins=50, absolute=False):
+        """
+        Histogram of the deltas of one target.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            ``(counts, bin_edges)`` as returned by ``np.histogram``.
+        """
+        self._compute()
+        values = self._deltas[self.targets.index(target)]
+        values = values[~np.isnan(values)]
+        if absolute:
+            values = np.abs(values)
+        return np.histogram(values, bins=bins)
+
+    def _repr_html_(self):
+        return self.statistics._repr_html_()
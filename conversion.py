@@ -0,0 +1,223 @@
+"""
+Molecule conversion in worker processes with a per-entry time budget.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from util import gather_molecular_data
+
+# Columns filled in for an entry whose conversion failed in the pool
+_FAILURE_COLUMNS = (
+    ('get_openff', 'OpenFFMol', 'OpenFFMol_Error'),
+    ('get_rdkit', 'RDKit Molecule', 'RDKit_Error'),
+)
+
+
+# Sent by a worker once its imports are done
+_READY = 'ready'
+
+
+def _worker_main(conn):
+    """Convert entries received over ``conn`` until told to stop."""
+    # Starting a process and importing OpenFF and RDKit can take seconds.
+    # Only count time from here against the timeout.
+    conn.send(_READY)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        key, entry, options = message
+        try:
+            data = gather_molecular_data(entry, include_error=True, **options)
+        except Exception as e:
+            data = failure_data(options, str(e))
+        conn.send((key, data))
+
+
+def failure_data(options, reason):
+    """Conversion result recording a failure for every requested column."""
+    data = {}
+    for option, column, error_column in _FAILURE_COLUMNS:
+        if options.get(option):
+            data[column] = None
+            data[error_column] = reason
+    return data
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.task = None
+        self.deadline = None
+
+    def receive_ready(self):
+        """Receive the ready message of a starting worker."""
+        try:
+            message = self.conn.recv()
+        except (EOFError, OSError):
+            message = None
+        if message != _READY:
+            raise RuntimeError(
+                f'Conversion worker failed to start (exit code {self.process.exitcode})'
+            )
+        self.ready = True
+
+    def submit(self, key, entry, options, timeout):
+        self.conn.send((key, entry, options))
+        self.task = (key, options)
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def stop(self, force=False):
+        try:
+            if force:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ConversionPool:
+    """
+    Pool of worker processes that convert entries with a per-entry timeout.
+
+    A worker that exceeds the timeout is killed and replaced, and the entry
+    is recorded as a failure with the reason in its error columns. This
+    bounds the time one pathological molecule can add to a batch. Entries
+    are only handed to workers that have finished starting up, so process
+    start-up and imports never count against the timeout. A worker that
+    fails to start is dropped and the remaining workers take its share;
+    if none are left, the outstanding entries are recorded as failures.
+
+    One call to :meth:`convert` runs at a time; calls from other threads
+    wait for it.
+
+    Parameters
+    ----------
+    timeout : float, default=10.0
+        Seconds allowed per entry. None disables the limit.
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    mp_context : str, default="spawn"
+        Multiprocessing start method. "spawn" avoids forking a kernel with
+        running threads.
+    """
+
+    def __init__(self, timeout=10.0, max_workers=None, mp_context="spawn"):
+        self.timeout = timeout
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._context = multiprocessing.get_context(mp_context)
+        self._workers = []
+        self._lock = threading.Lock()
+        self.stats = {'converted': 0, 'timeouts': 0, 'crashes': 0, 'start_failures': 0}
+
+    def _start_workers(self, n):
+        while len(self._workers) < min(n, self.max_workers):
+            self._workers.append(_Worker(self._context))
+
+    def _replace(self, worker):
+        worker.stop(force=True)
+        self._workers[self._workers.index(worker)] = _Worker(self._context)
+
+    def convert(self, tasks, timeout=None):
+        """
+        Convert entries in the worker processes.
+
+        Parameters
+        ----------
+        tasks : list of tuple
+            ``(key, entry, options)``, where ``options`` are keyword arguments
+            for `gather_molecular_data` (e.g. ``get_openff=True``).
+        timeout : float, optional
+            Overrides the pool's per-entry timeout for this call.
+
+        Returns
+        -------
+        dict
+            Conversion data by key.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        pending = deque(tasks)
+        results = {}
+        if not pending:
+            return results
+
+        with self._lock:
+            self._start_workers(len(pending))
+            while pending or any(w.task is not None for w in self._workers):
+                for worker in self._workers:
+                    if worker.ready and worker.task is None and pending:
+                        key, entry, options = pending.popleft()
+                        worker.submit(key, entry, options, timeout)
+
+                starting = [w for w in self._workers if not w.ready]
+                busy = [w for w in self._workers if w.task is not None]
+                deadlines = [w.deadline for w in busy if w.deadline is not None]
+                wait_time = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+                ready = wait([w.conn for w in starting + busy], timeout=wait_time)
+                for worker in starting:
+                    if worker.conn in ready:
+                        try:
+                            worker.receive_ready()
+                        except RuntimeError as e:
+                            # Not replaced, so a worker that can never start
+                            # does not respawn forever; the next call tops
+                            # the pool back up.
+                            self._workers.remove(worker)
+                            worker.stop(force=True)
+                            self.stats['start_failures'] += 1
+                            if not self._workers:
+                                while pending:
+                                    key, _, options = pending.popleft()
+                                    results[key] = failure_data(options, str(e))
+                for worker in busy:
+                    if worker.conn in ready:
+                        key, options = worker.task
+                        try:
+                            received_key, data = worker.conn.recv()
+                            results[received_key] = data
+                            self.stats['converted'] += 1
+                            worker.task = None
+                        except (EOFError, OSError):
+                            results[key] = failure_data(options, 'Conversion worker crashed')
+                            self.stats['crashes'] += 1
+                            self._replace(worker)
+                    elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                        key, options = worker.task
+                        results[key] = failure_data(
+                            options, f'Conversion timed out after {timeout:g}s'
+                        )
+                        self.stats['timeouts'] += 1
+                        self._replace(worker)
+        return results
+
+    def close(self):
+        """Stop all worker processes."""
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
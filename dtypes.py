@@ -0,0 +1,36 @@
+"""
+Memory-efficient column dtypes for the processor DataFrames.
+"""
+
+import pandas as pd
+
+# Counts are stored in this (nullable) integer dtype, whatever their values
+INTEGER_DTYPE = "Int32"
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+
+def compact_dataframe(df: pd.DataFrame, strings=(), categories=(), integers=()) -> pd.DataFrame:
+    """
+    Convert columns to compact dtypes in place and return the DataFrame.
+
+    ``strings`` become Arrow-backed strings (plain ``"string"`` without
+    pyarrow), ``categories`` become categoricals, and ``integers`` become
+    nullable ``Int32``. The dtypes don't depend on the values, so frames
+    built from different slices of a dataset concatenate and compare
+    cleanly. Columns that aren't present are skipped.
+    """
+    for column in strings:
+        if column in df:
+            df[column] = df[column].astype(STRING_DTYPE)
+    for column in categories:
+        if column in df:
+            df[column] = df[column].astype("category")
+    for column in integers:
+        if column in df:
+            df[column] = df[column].astype(INTEGER_DTYPE)
+    return df
@@ -0,0 +1,171 @@
+"""
+Streaming triage of failed records: normalize, hash and cluster error messages.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+
+import pandas as pd
+
+from cache import release_from_dataset
+from fetch import split_batches
+
+# Replacements applied in order to make messages from different records comparable
+_NORMALIZERS = [
+    (re.compile(r'0x[0-9a-fA-F]+'), '<hex>'),
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<uuid>'),
+    # Absolute paths only, so that e.g. "hf/sto-3g" or "and/or" are kept
+    (re.compile(r'(?:(?<!\w)[A-Za-z]:|(?<![\w.\-]))(?:[\\/][\w.\-]+)+[\\/]?'), '<path>'),
+    (re.compile(r'(?<![\w.])[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?(?!\w)'), '<num>'),
+    (re.compile(r'[ \t]+'), ' '),
+]
+
+OTHER_CLUSTER = 'other'
+
+# Record fields fetched along with error records; the error message is one of the outputs
+ERROR_INCLUDE = ['outputs']
+
+
+def normalize_error_message(message, max_lines=5) -> str:
+    """
+    Normalize an error message so that equivalent errors compare equal.
+
+    Addresses, UUIDs, paths and numbers are replaced by placeholders, and
+    only the last ``max_lines`` non-empty lines are kept (for tracebacks,
+    the exception rather than the call stack).
+    """
+    lines = [line.strip() for line in str(message or '').splitlines() if line.strip()]
+    text = '\n'.join(lines[-max_lines:])
+    for pattern, replacement in _NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def error_signature(error, max_lines=5):
+    """
+    Return ``(hash, error_type, normalized_message)`` for a record's error.
+
+    ``error`` is the record's error dictionary (``error_type``/``error_message``)
+    or a plain message.
+    """
+    if isinstance(error, dict):
+        error_type = error.get('error_type') or 'unknown'
+        message = error.get('error_message', '')
+    else:
+        error_type = 'unknown'
+        message = error
+    normalized = normalize_error_message(message, max_lines=max_lines)
+    digest = hashlib.sha1(f'{error_type}\n{normalized}'.encode()).hexdigest()
+    return digest, error_type, normalized
+
+
+class ErrorClusters:
+    """
+    Bounded aggregation of errors into clusters of identical normalized messages.
+
+    Each cluster keeps a count, up to ``max_examples`` example entries and
+    one raw example message. Once ``max_clusters`` clusters exist, new
+    signatures are counted in an ``"other"`` cluster, so memory stays bounded
+    no matter how many errors are added.
+    """
+
+    def __init__(self, max_clusters=200, max_examples=5, max_message_length=2000):
+        self.max_clusters = max_clusters
+        self.max_examples = max_examples
+        self.max_message_length = max_message_length
+        self.n_errors = 0
+        self._clusters = OrderedDict()
+
+    def __len__(self):
+        return len(self._clusters)
+
+    def add(self, entry_name, error):
+        """Add one error."""
+        digest, error_type, normalized = error_signature(error)
+        self.n_errors += 1
+
+        if digest not in self._clusters and len(self._clusters) >= self.max_clusters:
+            digest, error_type, normalized = OTHER_CLUSTER, 'other', '(more distinct errors than max_clusters)'
+
+        cluster = self._clusters.get(digest)
+        if cluster is None:
+            raw = error.get('error_message', '') if isinstance(error, dict) else str(error)
+            cluster = self._clusters[digest] = {
+                'error_type': error_type,
+                'message': normalized,
+                'example_message': str(raw)[:self.max_message_length],
+                'count': 0,
+                'examples': [],
+            }
+        cluster['count'] += 1
+        if len(cluster['examples']) < self.max_examples:
+            cluster['examples'].append(entry_name)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Clusters as a DataFrame, largest first."""
+        rows = [
+            {
+                'Cluster': digest[:10],
+                'Error Type': c['error_type'],
+                'Count': c['count'],
+                'Message': c['message'],
+                'Example Entries': list(c['examples']),
+                'Example Message': c['example_message'],
+            }
+            for digest, c in self._clusters.items()
+        ]
+        df = pd.DataFrame(rows, columns=[
+            'Cluster', 'Error Type', 'Count', 'Message', 'Example Entries', 'Example Message'
+        ])
+        return df.sort_values('Count', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def iterate_errors(processor, specification, batch_size=500):
+    """
+    Yield ``(entry_name, error)`` for error records of a specification, batch by batch.
+
+    The error outputs are fetched with the records, so reading
+    ``record.error`` needs no request per record. Only one group of
+    batches is held at a time and the fetched records are released from
+    the dataset cache afterwards (unless the processor is holding them for
+    something else).
+    """
+    ds = processor.ds
+    fetcher = processor.fetcher
+
+    def fetch_batch(names):
+        errors = []
+        for entry_name, _, record in ds.iterate_records(
+            entry_names=names,
+            specification_names=[specification],
+            status='error',
+            include=ERROR_INCLUDE,
+        ):
+            errors.append((entry_name, record.error))
+            if ('record', entry_name, specification) not in processor.memory:
+                release_from_dataset(ds, ('record', entry_name, specification))
+        return errors
+
+    # Run a few batches concurrently, but never hold more than that at once
+    group_size = batch_size * max(1, fetcher.max_workers)
+    for group in split_batches(processor.entry_names, group_size):
+        for errors in fetcher.map_batches(fetch_batch, group, batch_size):
+            yield from errors
+
+
+def aggregate_errors(processor, specification, batch_size=500, max_clusters=200,
+                     max_examples=5, on_progress=None) -> ErrorClusters:
+    """
+    Stream the error records of a specification into :class:`ErrorClusters`.
+
+    ``on_progress(clusters)`` is called after every batch of errors.
+    """
+    clusters = ErrorClusters(max_clusters=max_clusters, max_examples=max_examples)
+    for i, (entry_name, error) in enumerate(iterate_errors(processor, specification, batch_size), 1):
+        clusters.add(entry_name, error)
+        if on_progress is not None and i % batch_size == 0:
+            on_progress(clusters)
+    if on_progress is not None:
+        on_progress(clusters)
+    return clusters
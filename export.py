@@ -0,0 +1,358 @@
+"""
+Command-line export of whole datasets into analysis tables.
+
+Example::
+
+    python export.py --dataset-id 357 --output-dir out/ --shard-size 500 --workers 4 --rdkit
+
+The entry range is split into shards. Each shard is processed in a worker
+process (fetch, convert, extract records and properties) and written to its
+own files. Completed shards are recorded in a checkpoint file in the output
+directory, so re-running the same command resumes from where a killed job
+stopped.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+# Per-process state, populated by _init_worker
+_worker_processor = None
+
+
+def _connect(address, dataset_id, username=None, password=None):
+    """Connect to a QCArchive server and return the dataset."""
+    import qcportal as ptl
+
+    client = ptl.PortalClient(address, username=username, password=password)
+    return client.get_dataset_by_id(dataset_id)
+
+
+def _init_worker(address, dataset_id, username, password, fetch_options, conversion_timeout):
+    """Create one client and processor per worker process."""
+    global _worker_processor
+
+    from fetch import FetchScheduler
+    from singlepoint import SinglePointDatasetProcessor
+
+    ds = _connect(address, dataset_id, username, password)
+    _worker_processor = SinglePointDatasetProcessor(
+        ds,
+        fetch_scheduler=FetchScheduler(**(fetch_options or {})),
+        conversion_timeout=conversion_timeout,
+        # Shards already run in parallel, so one conversion process per worker
+        conversion_workers=1,
+    )
+
+
+def make_shards(n_entries, shard_size, start=0, stop=None):
+    """
+    Split an entry range into contiguous shards.
+
+    Returns
+    -------
+    list of tuple
+        ``(shard_index, start, stop)`` for each shard.
+    """
+    stop = n_entries if stop is None else min(stop, n_entries)
+    return [
+        (i, lo, min(lo + shard_size, stop))
+        for i, lo in enumerate(range(start, stop, shard_size))
+    ]
+
+
+def _shard_path(output_dir, shard_index, table, fmt):
+    return os.path.join(output_dir, f"shard-{shard_index:05d}.{table}.{fmt}")
+
+
+def _write_table(df, path, fmt):
+    """Write a table atomically so a killed job never leaves a partial file."""
+    tmp_path = path + ".tmp"
+    if fmt == "csv":
+        df.to_csv(tmp_path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(tmp_path, index=False)
+    elif fmt == "pickle":
+        df.to_pickle(tmp_path)
+    else:
+        raise ValueError(f"Unknown output format: {fmt}")
+    os.replace(tmp_path, path)
+
+
+def _entry_table(processor, start, stop, get_openff, get_rdkit, rdkit_engine="openff"):
+    """Build the serializable entry table for a shard."""
+    df = processor.get_entry_df(
+        start=start,
+        stop=stop,
+        get_openff=get_openff,
+        get_rdkit=get_rdkit,
+        include_error=True,
+        rdkit_engine=rdkit_engine,
+    )
+
+    # Molecule objects can't be written to tables, so keep SMILES instead
+    if "OpenFFMol" in df.columns:
+        df["OpenFF SMILES"] = df["OpenFFMol"].apply(
+            lambda mol: mol.to_smiles(mapped=True) if mol is not None else None
+        )
+        df = df.drop(columns=["OpenFFMol"])
+    if "RDKit Molecule" in df.columns:
+        from rdkit import Chem
+
+        df["SMILES"] = df["RDKit Molecule"].apply(
+            lambda mol: Chem.MolToSmiles(mol) if mol is not None else None
+        )
+        df = df.drop(columns=["RDKit Molecule"])
+
+    return df
+
+
+def process_shard(shard, output_dir, fmt, get_openff, get_rdkit, properties, rdkit_engine="openff"):
+    """
+    Process one shard in a worker process and write its tables.
+
+    Returns
+    -------
+    dict
+        Summary of the shard, recorded in the checkpoint.
+    """
+    shard_index, start, stop = shard
+    t0 = time.time()
+
+    entries = _entry_table(_worker_processor, start, stop, get_openff, get_rdkit, rdkit_engine)
+    records = _worker_processor.get_record_property_df(
+        start=start, stop=stop, properties=properties
+    )
+
+    _write_table(entries, _shard_path(output_dir, shard_index, "entries", fmt), fmt)
+    _write_table(records, _shard_path(output_dir, shard_index, "records", fmt), fmt)
+
+    return {
+        "shard": shard_index,
+        "start": start,
+        "stop": stop,
+        "n_entries": len(entries),
+        "n_records": len(records),
+        "seconds": round(time.time() - t0, 3),
+    }
+
+
+class Checkpoint:
+    """Progress of an export job, persisted as JSON in the output directory."""
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.completed = {}
+
+    @classmethod
+    def load_or_create(cls, output_dir, config, restart=False):
+        """Load the checkpoint for this job, or start a new one."""
+        path = os.path.join(output_dir, CHECKPOINT_FILE)
+        checkpoint = cls(path, config)
+
+        if restart or not os.path.exists(path):
+            return checkpoint
+
+        with open(path) as f:
+            data = json.load(f)
+
+        if data.get("version") != CHECKPOINT_VERSION or data.get("config") != config:
+            raise ValueError(
+                f"Checkpoint {path} was written for a different job. "
+                "Use --restart to discard it or choose another output directory."
+            )
+
+        checkpoint.completed = {int(k): v for k, v in data["completed"].items()}
+        return checkpoint
+
+    def is_complete(self, shard_index, output_dir, fmt):
+        """A shard is complete if it is checkpointed and its files exist."""
+        if shard_index not in self.completed:
+            return False
+        return all(
+            os.path.exists(_shard_path(output_dir, shard_index, table, fmt))
+            for table in ("entries", "records")
+        )
+
+    def mark_complete(self, summary):
+        self.completed[summary["shard"]] = summary
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": CHECKPOINT_VERSION,
+                    "config": self.config,
+                    "completed": {str(k): v for k, v in sorted(self.completed.items())},
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.path)
+
+
+def run_export(
+    address,
+    dataset_id,
+    output_dir,
+    shard_size=500,
+    workers=1,
+    start=0,
+    stop=None,
+    fmt="csv",
+    get_openff=False,
+    get_rdkit=False,
+    rdkit_engine="openff",
+    properties=None,
+    fetch_options=None,
+    conversion_timeout=None,
+    username=None,
+    password=None,
+    restart=False,
+    log=print,
+):
+    """
+    Export a dataset into per-shard entry and record tables.
+
+    Shards already recorded in the checkpoint are skipped. ``fetch_options``
+    are passed to the :class:`fetch.FetchScheduler` of each worker, and
+    ``conversion_timeout`` limits the seconds spent converting each entry.
+
+    Returns
+    -------
+    Checkpoint
+        The final checkpoint of the job.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    ds = _connect(address, dataset_id, username, password)
+    n_entries = len(ds.entry_names)
+    shards = make_shards(n_entries, shard_size, start=start, stop=stop)
+
+    config = {
+        "address": address,
+        "dataset_id": dataset_id,
+        "n_entries": n_entries,
+        "shard_size": shard_size,
+        "start": start,
+        "stop": stop,
+        "format": fmt,
+        "openff": get_openff,
+        "rdkit": get_rdkit,
+        "rdkit_engine": rdkit_engine,
+        "properties": properties,
+    }
+    checkpoint = Checkpoint.load_or_create(output_dir, config, restart=restart)
+
+    pending = [s for s in shards if not checkpoint.is_complete(s[0], output_dir, fmt)]
+    log(f"{ds.name}: {len(shards)} shards, {len(shards) - len(pending)} already complete")
+    if not pending:
+        return checkpoint
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(address, dataset_id, username, password, fetch_options, conversion_timeout),
+    ) as executor:
+        futures = {
+            executor.submit(
+                process_shard, shard, output_dir, fmt, get_openff, get_rdkit, properties, rdkit_engine
+            ): shard
+            for shard in pending
+        }
+        for future in as_completed(futures):
+            shard_index, lo, hi = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                log(f"shard {shard_index} ({lo}-{hi}) failed: {e}")
+                continue
+            checkpoint.mark_complete(summary)
+            log(
+                f"shard {shard_index} ({lo}-{hi}) done in {summary['seconds']}s "
+                f"[{len(checkpoint.completed)}/{len(shards)}]"
+            )
+
+    return checkpoint
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Export a QCArchive singlepoint dataset into sharded analysis tables."
+    )
+    parser.add_argument("--address", default="https://api.qcarchive.molssi.org",
+                        help="QCArchive server address")
+    parser.add_argument("--dataset-id", type=int, required=True,
+                        help="ID of the dataset to export")
+    parser.add_argument("--output-dir", required=True,
+                        help="Directory for shard tables and the checkpoint")
+    parser.add_argument("--shard-size", type=int, default=500,
+                        help="Number of entries per shard")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes")
+    parser.add_argument("--start", type=int, default=0,
+                        help="First entry index to export")
+    parser.add_argument("--stop", type=int, default=None,
+                        help="Entry index to stop before")
+    parser.add_argument("--format", dest="fmt", choices=["csv", "parquet", "pickle"],
+                        default="csv", help="Output table format")
+    parser.add_argument("--openff", action="store_true",
+                        help="Convert entries with the OpenFF toolkit")
+    parser.add_argument("--rdkit", action="store_true",
+                        help="Convert entries to RDKit and store SMILES")
+    parser.add_argument("--rdkit-engine", choices=["openff", "rdkit"], default="openff",
+                        help="Convert to RDKit through OpenFF or directly from QCSchema")
+    parser.add_argument("--properties", nargs="+", default=None,
+                        help="Only export these record properties")
+    parser.add_argument("--fetch-concurrency", type=int, default=4,
+                        help="Concurrent fetch requests per worker")
+    parser.add_argument("--fetch-retries", type=int, default=3,
+                        help="Retries for a failed fetch request")
+    parser.add_argument("--conversion-timeout", type=float, default=None,
+                        help="Seconds allowed to convert one entry before it is recorded as a failure")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore an existing checkpoint and start over")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    checkpoint = run_export(
+        address=args.address,
+        dataset_id=args.dataset_id,
+        output_dir=args.output_dir,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        start=args.start,
+        stop=args.stop,
+        fmt=args.fmt,
+        get_openff=args.openff,
+        get_rdkit=args.rdkit,
+        rdkit_engine=args.rdkit_engine,
+        properties=args.properties,
+        fetch_options={
+            "max_workers": args.fetch_concurrency,
+            "max_retries": args.fetch_retries,
+        },
+        conversion_timeout=args.conversion_timeout,
+        username=os.environ.get("QCPORTAL_USERNAME"),
+        password=os.environ.get("QCPORTAL_PASSWORD"),
+        restart=args.restart,
+    )
+
+    n_shards = len(make_shards(checkpoint.config["n_entries"], args.shard_size, args.start, args.stop))
+    return 0 if len(checkpoint.completed) == n_shards else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Batched, concurrent and retrying fetches from QCPortal datasets.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional, Sequence
+
+
+def _transient_errors() -> tuple:
+    # OSError covers ConnectionError, TimeoutError and the connection errors
+    # of requests, which QCPortal uses
+    errors = [OSError]
+    try:
+        from qcportal.client_base import PortalRequestError
+    except ImportError:
+        pass
+    else:
+        errors.append(PortalRequestError)
+    return tuple(errors)
+
+
+# Transport and server errors; programming errors are never retried
+TRANSIENT_ERRORS = _transient_errors()
+
+# HTTP client errors that are still worth retrying (request timeout, rate limit)
+_RETRYABLE_CLIENT_STATUS = (408, 429)
+
+# Methods of QCPortal's dataset cache that write to its SQLite connection
+_CACHE_WRITE_METHODS = (
+    "update_metadata",
+    "update_records",
+    "writeback_record",
+    "delete_record",
+    "delete_records",
+    "update_entries",
+    "rename_entry",
+    "delete_entry",
+    "update_specifications",
+    "rename_specification",
+    "delete_specification",
+    "update_dataset_records",
+    "delete_dataset_record",
+    "delete_dataset_records",
+)
+
+
+class FetchError(RuntimeError):
+    """Raised when a batch still fails after all retries."""
+
+    def __init__(self, message, batch, attempts, cause):
+        super().__init__(message)
+        self.batch = batch
+        self.attempts = attempts
+        self.cause = cause
+
+
+def split_batches(items: Sequence, batch_size: int) -> List[list]:
+    """Split a sequence into lists of at most ``batch_size`` items."""
+    items = list(items)
+    if batch_size is None or batch_size <= 0:
+        return [items] if items else []
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def is_client_error(error) -> bool:
+    """Whether an error is an HTTP client error (4xx) that retrying won't fix."""
+    status = getattr(error, "status_code", None)
+    return (
+        isinstance(status, int)
+        and 400 <= status < 500
+        and status not in _RETRYABLE_CLIENT_STATUS
+    )
+
+
+def _locked(method, lock):
+    def locked_method(*args, **kwargs):
+        with lock:
+            return method(*args, **kwargs)
+    return locked_method
+
+
+def serialize_cache_writes(ds):
+    """
+    Make writes to a dataset's cache mutually exclusive.
+
+    QCPortal datasets store fetched data through one SQLite connection, and
+    each write is a transaction on that connection. Transactions from
+    several threads on one connection aren't isolated from each other, so
+    concurrent fetches take a lock around every write. Requests to the
+    server still run concurrently. Calling this again has no effect.
+    """
+    cache = getattr(ds, "_cache_data", None)
+    if cache is None or getattr(cache, "_write_lock", None) is not None:
+        return
+    lock = threading.RLock()
+    for name in _CACHE_WRITE_METHODS:
+        method = getattr(cache, name, None)
+        if method is not None:
+            setattr(cache, name, _locked(method, lock))
+    cache._write_lock = lock
+
+
+class FetchScheduler:
+    """
+    Scheduler that all dataset fetches of a processor go through.
+
+    Requests are split into batches, up to ``max_workers`` batches run
+    concurrently against the dataset (and therefore its shared client
+    session), and failed batches are retried with exponential backoff.
+    Writes to the dataset cache are serialized (see `serialize_cache_writes`).
+
+    Parameters
+    ----------
+    entry_batch_size : int, default=200
+        Number of entries fetched per request.
+    record_batch_size : int, default=500
+        Number of entries per record request (per specification).
+    max_workers : int, default=4
+        Maximum number of batches in flight. Use 1 for serial fetching.
+    max_retries : int, default=3
+        Number of retries for a failed batch before giving up.
+    backoff : float, default=0.5
+        Initial delay between retries in seconds. Doubles every retry.
+    max_backoff : float, default=10.0
+        Upper bound on the delay between retries.
+    retry_on : tuple of Exception types, default=TRANSIENT_ERRORS
+        Exceptions that trigger a retry: by default connection errors,
+        timeouts and errors returned by the server. HTTP client errors
+        (except 408 and 429) and anything else fail immediately.
+    sleep : callable, default=time.sleep
+        Function used to wait between retries.
+    """
+
+    def __init__(
+        self,
+        entry_batch_size: int = 200,
+        record_batch_size: int = 500,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        retry_on: tuple = TRANSIENT_ERRORS,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.entry_batch_size = entry_batch_size
+        self.record_batch_size = record_batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.sleep = sleep
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "retries": 0, "failures": 0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="qcbrowser-fetch",
+                )
+            return self._executor
+
+    def close(self):
+        """Shut down the worker threads."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        # Jitter avoids retrying every failed batch at the same moment
+        return delay * (0.5 + random.random() / 2)
+
+    def _run_with_retries(self, fn, batch):
+        attempt = 0
+        while True:
+            try:
+                result = fn(batch)
+                with self._lock:
+                    self.stats["batches"] += 1
+                return result
+            except self.retry_on as e:
+                if is_client_error(e):
+                    raise
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    raise FetchError(
+                        f"Fetching batch of {len(batch)} failed after {attempt + 1} attempts: {e}",
+                        batch=batch,
+                        attempts=attempt + 1,
+                        cause=e,
+                    ) from e
+                with self._lock:
+                    self.stats["retries"] += 1
+                self.sleep(self._delay(attempt))
+                attempt += 1
+
+    def map_batches(
+        self,
+        fn: Callable[[list], Any],
+        items: Sequence,
+        batch_size: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Call ``fn`` on batches of ``items`` and return the results in order.
+
+        Batches run concurrently and are retried individually. If any batch
+        fails for good, the first error (in batch order) is raised once all
+        batches have finished.
+        """
+        batches = split_batches(items, batch_size)
+        if not batches:
+            return []
+        if len(batches) == 1 or self.max_workers <= 1:
+            return [self._run_with_retries(fn, batch) for batch in batches]
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._run_with_retries, fn, batch) for batch in batches]
+
+        # Let every batch finish before raising, so none keeps writing to
+        # the dataset cache after the caller has moved on
+        wait(futures)
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            raise errors[0]
+        return [future.result() for future in futures]
+
+    def fetch_entries(self, ds, entry_names: Sequence[str], **kwargs):
+        """Fetch entries into the dataset cache in batches."""
+        serialize_cache_writes(ds)
+        self.map_batches(
+            lambda batch: ds.fetch_entries(batch, **kwargs),
+            entry_names,
+            self.entry_batch_size,
+        )
+
+    def fetch_records(self, ds, entry_names: Sequence[str], specification_names, **kwargs):
+        """Fetch records for the given specifications into the dataset cache in batches."""
+        serialize_cache_writes(ds)
+        self.map_batches(
+            lambda batch: ds.fetch_records(
+                entry_names=batch,
+                specification_names=specification_names,
+                **kwargs,
+            ),
+            entry_names,
+            self.record_batch_size,
+        )
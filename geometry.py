@@ -0,0 +1,272 @@
+"""
+Compact NumPy store of the geometries of all entry molecules.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from cache import release_from_dataset
+from fetch import split_batches
+from util import BOHR_TO_ANGSTROM, CMILES_KEY
+
+# Arrays written by GeometryStore.save, one .npy file each
+_ARRAYS = ('key_ids', 'offsets', 'atomic_numbers', 'coordinates')
+
+# Entry names, the conformer key table and the dataset, written as JSON next to the arrays
+_INDEX_FILE = 'index.json'
+
+# Upper bound on the number of pairwise distances computed at once
+_MAX_PAIRS_PER_CHUNK = 2_000_000
+
+
+def _conformer_key(entry, atomic_numbers) -> str:
+    """Key shared by conformers of the same molecule with the same atom order."""
+    attributes = getattr(entry, 'attributes', None) or {}
+    extras = getattr(entry.molecule, 'extras', None) or {}
+    mapped_smiles = attributes.get(CMILES_KEY) or extras.get(CMILES_KEY)
+    if mapped_smiles:
+        return mapped_smiles
+    return 'Z:' + hashlib.sha1(np.asarray(atomic_numbers, dtype=np.int16).tobytes()).hexdigest()
+
+
+def kabsch_rmsd(a, b) -> np.ndarray:
+    """
+    RMSD after optimal superposition for batches of coordinate sets.
+
+    ``a`` and ``b`` have shape ``(..., n_atoms, 3)`` and are broadcast
+    against each other.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a = a - a.mean(axis=-2, keepdims=True)
+    b = b - b.mean(axis=-2, keepdims=True)
+
+    h = np.einsum('...ni,...nj->...ij', a, b)
+    u, s, vt = np.linalg.svd(h)
+    # Flip the smallest singular value where the optimal rotation would be a reflection
+    d = np.sign(np.linalg.det(u) * np.linalg.det(vt))
+    s[..., -1] *= d
+
+    n_atoms = a.shape[-2]
+    sq = (a ** 2).sum(axis=(-2, -1)) + (b ** 2).sum(axis=(-2, -1)) - 2 * s.sum(axis=-1)
+    return np.sqrt(np.maximum(sq, 0.0) / n_atoms)
+
+
+class GeometryStore:
+    """
+    Geometries of all entries as ragged NumPy arrays.
+
+    The coordinates of entry ``i`` are
+    ``coordinates[offsets[i]:offsets[i + 1]]`` (angstrom), with element
+    numbers in the same slice of ``atomic_numbers``. Entries are grouped into
+    conformers of the same molecule by their conformer key (the mapped
+    SMILES if the entry has one, else the atomic number sequence): entry
+    ``i`` has the key ``key_table[key_ids[i]]``.
+
+    Build it with :meth:`from_processor`, which fetches entries in batches
+    without keeping them in the dataset cache, and persist it with
+    :meth:`save`/:meth:`load`; loading memory-maps the arrays by default.
+    """
+
+    def __init__(self, names, key_ids, key_table, offsets, atomic_numbers, coordinates, dataset=None):
+        self.names = list(names)
+        self.key_ids = np.asarray(key_ids, dtype=np.int32)
+        self.key_table = list(key_table)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.atomic_numbers = np.asarray(atomic_numbers, dtype=np.int16)
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+        # ID and name of the dataset the store was built from
+        self.dataset = dict(dataset or {})
+        self._positions = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f'<GeometryStore: {len(self)} entries, {len(self.atomic_numbers)} atoms>'
+
+    @classmethod
+    def from_processor(cls, processor, batch_size=None):
+        """Fetch every entry's molecule in batches and build the store."""
+        ds = processor.ds
+        names = processor.entry_names
+        batch_size = batch_size or processor.fetcher.entry_batch_size
+
+        key_ids, key_table, n_atoms, numbers, coordinates = [], {}, [], [], []
+        for batch in split_batches(names, batch_size):
+            processor.fetcher.fetch_entries(ds, batch)
+            for name in batch:
+                entry = ds.get_entry(name)
+                molecule = entry.molecule
+                z = np.asarray(molecule.atomic_numbers, dtype=np.int16)
+                key_ids.append(key_table.setdefault(_conformer_key(entry, z), len(key_table)))
+                n_atoms.append(len(z))
+                numbers.append(z)
+                coordinates.append(
+                    np.asarray(molecule.geometry, dtype=np.float64).reshape(-1, 3) * BOHR_TO_ANGSTROM
+                )
+                if ('entry', name) not in processor.memory:
+                    release_from_dataset(ds, ('entry', name))
+
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(n_atoms, out=offsets[1:])
+        return cls(
+            names=names,
+            key_ids=np.asarray(key_ids, dtype=np.int32),
+            key_table=list(key_table),
+            offsets=offsets,
+            atomic_numbers=np.concatenate(numbers) if numbers else np.empty(0, dtype=np.int16),
+            coordinates=np.concatenate(coordinates) if coordinates else np.empty((0, 3)),
+            dataset={'id': getattr(ds, 'id', None), 'name': ds.name},
+        )
+
+    def save(self, path):
+        """
+        Save the store in the directory ``path``.
+
+        The arrays are written as ``.npy`` files, and the entry names, the
+        conformer key table and the dataset as ``index.json``.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f'{name}.npy'), getattr(self, name), allow_pickle=False)
+        index = {'dataset': self.dataset, 'names': self.names, 'key_table': self.key_table}
+        with open(os.path.join(path, _INDEX_FILE), 'w') as f:
+            json.dump(index, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load a store saved with :meth:`save`, memory-mapping the arrays unless ``mmap_mode`` is None."""
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+            for name in _ARRAYS
+        }
+        with open(os.path.join(path, _INDEX_FILE)) as f:
+            index = json.load(f)
+        return cls(**arrays, **index)
+
+    def matches(self, processor) -> bool:
+        """Whether the store was built from the processor's dataset, with the same entries in the same order."""
+        ds = processor.ds
+        dataset = {'id': getattr(ds, 'id', None), 'name': ds.name}
+        return self.dataset == dataset and self.names == list(processor.entry_names)
+
+    @property
+    def keys(self) -> list:
+        """Conformer key of each entry."""
+        return [self.key_table[i] for i in self.key_ids.tolist()]
+
+    @property
+    def n_atoms(self) -> np.ndarray:
+        """Number of atoms of each entry."""
+        return np.diff(self.offsets)
+
+    def index(self, entry_name) -> int:
+        """Position of an entry in the store."""
+        if self._positions is None:
+            self._positions = {name: i for i, name in enumerate(self.names)}
+        return self._positions[entry_name]
+
+    def get(self, entry_name):
+        """Return ``(atomic_numbers, coordinates)`` of one entry as views into the store."""
+        i = self.index(entry_name)
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return self.atomic_numbers[start:stop], self.coordinates[start:stop]
+
+    def centroids(self) -> np.ndarray:
+        """Geometric center of each entry, shape ``(n_entries, 3)``."""
+        n_atoms = self.n_atoms
+        centroids = np.full((len(self), 3), np.nan)
+        nonempty = n_atoms > 0
+        sums = np.add.reduceat(self.coordinates, self.offsets[:-1][nonempty], axis=0)
+        centroids[nonempty] = sums / n_atoms[nonempty, None]
+        return centroids
+
+    def radius_of_gyration(self) -> np.ndarray:
+        """Unweighted radius of gyration of each entry."""
+        n_atoms = self.n_atoms
+        centered = self.coordinates - np.repeat(self.centroids(), n_atoms, axis=0)
+        radius = np.full(len(self), np.nan)
+        nonempty = n_atoms > 0
+        sq = np.add.reduceat((centered ** 2).sum(axis=1), self.offsets[:-1][nonempty])
+        radius[nonempty] = np.sqrt(sq / n_atoms[nonempty])
+        return radius
+
+    def _groups_by_size(self, min_atoms=1):
+        """Yield ``(indices, coordinates)`` with coordinates of shape ``(m, n_atoms, 3)``, in bounded chunks."""
+        n_atoms = self.n_atoms
+        for n in np.unique(n_atoms):
+            if n < min_atoms:
+                continue
+            indices = np.flatnonzero(n_atoms == n)
+            chunk = max(1, _MAX_PAIRS_PER_CHUNK // (int(n) * int(n)))
+            for start in range(0, len(indices), chunk):
+                idx = indices[start:start + chunk]
+                atoms = self.offsets[idx][:, None] + np.arange(n)
+                yield idx, self.coordinates[atoms]
+
+    def _pairwise_reduce(self, reduce, fill):
+        """Reduce each entry's interatomic distance matrix (diagonal set to ``fill``)."""
+        result = np.full(len(self), np.nan)
+        for idx, xyz in self._groups_by_size(min_atoms=2):
+            distances = np.linalg.norm(xyz[:, :, None, :] - xyz[:, None, :, :], axis=-1)
+            diagonal = np.arange(xyz.shape[1])
+            distances[:, diagonal, diagonal] = fill
+            result[idx] = reduce(distances, axis=(1, 2))
+        return result
+
+    def max_interatomic_distance(self) -> np.ndarray:
+        """Largest distance between two atoms of each entry (NaN for single atoms)."""
+        return self._pairwise_reduce(np.max, -np.inf)
+
+    def min_interatomic_distance(self) -> np.ndarray:
+        """Smallest distance between two atoms of each entry (NaN for single atoms)."""
+        return self._pairwise_reduce(np.min, np.inf)
+
+    def find_clashes(self, threshold=0.7) -> list:
+        """Names of entries with two atoms closer than ``threshold`` angstrom."""
+        with np.errstate(invalid='ignore'):
+            clashes = np.flatnonzero(self.min_interatomic_distance() < threshold)
+        return [self.names[i] for i in clashes.tolist()]
+
+    def conformer_groups(self, min_size=2) -> dict:
+        """Entry positions grouped by conformer key, for groups with at least ``min_size`` entries."""
+        order = np.argsort(self.key_ids, kind='stable')
+        ids, starts, counts = np.unique(self.key_ids[order], return_index=True, return_counts=True)
+        return {
+            self.key_table[key_id]: order[start:start + count]
+            for key_id, start, count in zip(ids.tolist(), starts.tolist(), counts.tolist())
+            if count >= min_size
+        }
+
+    def rmsd(self, entry_a, entry_b) -> float:
+        """RMSD between two conformers after optimal superposition."""
+        z_a, xyz_a = self.get(entry_a)
+        z_b, xyz_b = self.get(entry_b)
+        if not np.array_equal(z_a, z_b):
+            raise ValueError(f"{entry_a} and {entry_b} do not have the same atoms in the same order")
+        return float(kabsch_rmsd(xyz_a, xyz_b))
+
+    def rmsd_matrix(self, indices, chunk_size=256) -> np.ndarray:
+        """
+        Pairwise RMSD matrix between entries at ``indices``, e.g. one conformer group.
+
+        All entries must have the same atoms in the same order.
+        """
+        indices = np.asarray(indices)
+        n = self.n_atoms[indices]
+        if len(indices) and not (n == n[0]).all():
+            raise ValueError("All conformers must have the same number of atoms")
+        atoms = self.offsets[indices][:, None] + np.arange(n[0] if len(n) else 0)
+        if len(indices) and not (self.atomic_numbers[atoms] == self.atomic_numbers[atoms[0]]).all():
+            raise ValueError("All conformers must have the same atoms in the same order")
+
+        xyz = self.coordinates[atoms]
+        result = np.zeros((len(indices), len(indices)))
+        for start in range(0, len(indices), chunk_size):
+            block = xyz[start:start + chunk_size]
+            result[start:start + chunk_size] = kabsch_rmsd(block[:, None], xyz[None, :])
+        return result
@@ -0,0 +1,248 @@
+"""
+Cancellable background jobs for long-running processor calls.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+import pandas as pd
+import ipywidgets as widgets
+from IPython.display import display
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return '?'
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}h {minutes:02d}m'
+    if minutes:
+        return f'{minutes}m {seconds:02d}s'
+    return f'{seconds}s'
+
+
+class BackgroundJob:
+    """
+    Run a processor method over an entry range in chunks, in a background thread.
+
+    ``fn`` is called as ``fn(start=..., stop=..., **kwargs)`` for each chunk
+    and must return a DataFrame. The chunks are concatenated into the result.
+    Cancelling stops the job after the current chunk and keeps everything
+    processed so far. If a chunk fails, ``result()`` raises its error with
+    the chunks processed before it attached as ``error.partial``.
+
+    The job can be polled (``done``, ``progress``), waited on with
+    ``result()`` or awaited with ``await job`` from another cell. Displaying
+    the job shows a progress bar with entries/sec, an ETA and a cancel button.
+
+    ``fn`` runs in the background thread while the notebook may keep using
+    the same processor, e.g. to page through a browser. The processor's
+    shared state is safe to use from both: fetches go through its
+    `FetchScheduler`, which serializes writes to the dataset cache, its
+    memory budget and conversion caches are locked (an entry being
+    converted in one thread is waited for, not converted again), and its
+    conversion pool runs one batch at a time. Don't change processor settings such as
+    ``conversion_timeout`` while a job is running.
+
+    Parameters
+    ----------
+    fn : callable
+        Processor method such as ``processor.get_entry_df``.
+    start : int
+        First entry index.
+    stop : int
+        Entry index to stop before.
+    chunk_size : int, default=100
+        Number of entries per call to ``fn``.
+    description : str, optional
+        Label shown next to the progress bar.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., pd.DataFrame],
+        start: int,
+        stop: int,
+        chunk_size: int = 100,
+        description: Optional[str] = None,
+        **kwargs
+    ):
+        self.fn = fn
+        self.start_index = start
+        self.stop_index = stop
+        self.chunk_size = chunk_size
+        self.description = description or getattr(fn, '__name__', 'job')
+        self.kwargs = kwargs
+
+        self.total = max(0, stop - start)
+        self.n_done = 0
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._future = Future()
+        self._thread = None
+        self._widget = None
+
+    def start(self):
+        """Start the job in a background thread."""
+        if self._thread is None:
+            self.started_at = time.time()
+            self._future.set_running_or_notify_cancel()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for lo in range(self.start_index, self.stop_index, self.chunk_size):
+                if self._cancel_event.is_set():
+                    break
+                hi = min(lo + self.chunk_size, self.stop_index)
+                chunk = self.fn(start=lo, stop=hi, **self.kwargs)
+                with self._lock:
+                    self._chunks.append(chunk)
+                    self.n_done += hi - lo
+                self._update_widget()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+            # Resolve first, so the final widget update sees the job as done
+            if self.error is not None:
+                # Keep the work done before the failure
+                self.error.partial = self.partial_result()
+                self._future.set_exception(self.error)
+            else:
+                self._future.set_result(self.partial_result())
+            self._update_widget()
+
+    def cancel(self):
+        """Stop after the current chunk. Results processed so far are kept."""
+        self._cancel_event.set()
+        self._update_widget()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._future.done()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Entries processed per second."""
+        elapsed = self.elapsed
+        return self.n_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the job finishes, or None if unknown."""
+        if self.done:
+            return 0.0
+        rate = self.rate
+        return (self.total - self.n_done) / rate if rate > 0 else None
+
+    @property
+    def progress(self) -> dict:
+        return {
+            'done': self.n_done,
+            'total': self.total,
+            'entries_per_sec': self.rate,
+            'eta_sec': self.eta,
+            'finished': self.done,
+            'cancelled': self.cancelled,
+        }
+
+    def partial_result(self) -> pd.DataFrame:
+        """Concatenate the chunks processed so far."""
+        with self._lock:
+            chunks = list(self._chunks)
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks, ignore_index=True)
+
+    def result(self, timeout: Optional[float] = None) -> pd.DataFrame:
+        """Wait for the job and return its (possibly partial) result."""
+        return self._future.result(timeout=timeout)
+
+    def __await__(self):
+        return asyncio.wrap_future(self._future).__await__()
+
+    def _status_text(self):
+        if self.error is not None:
+            state = f'failed: {self.error}'
+        elif self.done:
+            state = 'cancelled' if self.cancelled else 'done'
+        elif self.cancelled:
+            state = 'cancelling'
+        else:
+            state = f'ETA {_format_duration(self.eta)}'
+        return (
+            f'{self.n_done}/{self.total} entries &middot; '
+            f'{self.rate:.1f} entries/s &middot; {_format_duration(self.elapsed)} &middot; {state}'
+        )
+
+    def _update_widget(self):
+        if self._widget is None:
+            return
+        progress_bar, label, cancel_button = self._widget.children
+        progress_bar.value = self.n_done
+        label.value = self._status_text()
+        cancel_button.disabled = self.done or self.cancelled
+        if self.done:
+            progress_bar.bar_style = 'danger' if self.error else ('warning' if self.cancelled else 'success')
+
+    def widget(self) -> widgets.Widget:
+        """Create (once) the progress widget for this job."""
+        if self._widget is None:
+            progress_bar = widgets.IntProgress(
+                min=0,
+                max=max(1, self.total),
+                description=self.description,
+                layout=widgets.Layout(width='300px')
+            )
+            label = widgets.HTML(layout=widgets.Layout(padding='0 10px'))
+            cancel_button = widgets.Button(description='Cancel', layout=widgets.Layout(width='80px'))
+            cancel_button.on_click(lambda b: self.cancel())
+            self._widget = widgets.HBox([progress_bar, label, cancel_button])
+            self._update_widget()
+        return self._widget
+
+    def _ipython_display_(self):
+        display(self.widget())
+
+
+def run_in_background(processor, method, start=None, stop=None, chunk_size=100, **kwargs):
+    """
+    Start a processor method (e.g. ``"get_entry_df"``) as a :class:`BackgroundJob`.
+
+    ``start``/``stop`` default to the whole dataset.
+    """
+    n_entries = processor.n_entries
+    start = 0 if start is None else start
+    stop = n_entries if stop is None else min(stop, n_entries)
+    job = BackgroundJob(
+        getattr(processor, method),
+        start,
+        stop,
+        chunk_size=chunk_size,
+        description=method,
+        **kwargs
+    )
+    return job.start()
@@ -0,0 +1,278 @@
+"""
+Entry tables whose molecule columns are computed on first access.
+"""
+
+import sys
+import weakref
+
+import numpy as np
+import pandas as pd
+from rdkit import Chem
+
+from cache import approximate_size
+
+# Columns computed per row on access, with the conversion they need
+LAZY_COLUMNS = ('OpenFFMol', 'RDKit Molecule', 'SMILES')
+_ERROR_COLUMNS = {'OpenFFMol': 'OpenFFMol_Error', 'RDKit Molecule': 'RDKit_Error'}
+# Columns made for the row itself. The entry, molecules and errors are the
+# objects held by the processor's entry and conversion caches, which
+# already count them against the memory budget.
+_OWN_COLUMNS = ('SMILES',)
+
+
+def _forget_rows(memory, frame_id, rows):
+    for i in list(rows):
+        memory.pop(('lazy', frame_id, i))
+
+
+class _Indexer:
+    def __init__(self, getter):
+        self._getter = getter
+
+    def __getitem__(self, key):
+        return self._getter(key)
+
+
+class LazyColumn:
+    """
+    One column of a :class:`LazyEntryFrame`.
+
+    Indexing with a position, slice or list of positions computes just
+    those rows.
+    """
+
+    def __init__(self, frame, name):
+        self.frame = frame
+        self.name = name
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __iter__(self):
+        for i in range(len(self.frame)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.frame._values([self.frame._position(key)], [self.name])[0][self.name]
+        positions = self.frame._positions(key)
+        return [row[self.name] for row in self.frame._values(positions, [self.name])]
+
+    def to_series(self) -> pd.Series:
+        """Compute the column for every row."""
+        return self.frame.to_dataframe(columns=[self.name]).set_index('Entry Name')[self.name]
+
+    def __repr__(self):
+        return f'<LazyColumn {self.name!r}: {len(self)} rows>'
+
+
+class LazyEntryFrame:
+    """
+    Entry table whose OpenFF, RDKit and SMILES columns are computed lazily.
+
+    Only the rows that are accessed are fetched and converted, and computed
+    values are memoized, so requesting a column "just in case" costs
+    nothing until it is used::
+
+        lazy = processor.get_entry_df(lazy=True)
+        lazy['RDKit Molecule'][:20]   # converts 20 entries
+        lazy.iloc[:20]                # DataFrame of the same rows, no new work
+        lazy.iloc[20:40, ['SMILES']]  # only what the SMILES column needs
+
+    ``iloc``, ``loc`` and :meth:`head` take an optional column selection
+    and compute only those columns. Conversions go through the processor,
+    so they share its cache, memory budget and conversion timeout. Computed
+    rows are accounted in the processor's memory budget too, and dropped
+    from the frame when the budget evicts them.
+
+    Parameters
+    ----------
+    processor : SinglePointDatasetProcessor
+        Processor used to fetch and convert entries.
+    entry_names : list of str
+        Rows of the frame.
+    store_entry : bool, default=False
+        Include the (lazily fetched) entry objects as an ``Entry`` column.
+    include_error : bool, default=False
+        Include the conversion error columns.
+    rdkit_engine : {"openff", "rdkit"}, default="openff"
+        How RDKit molecules are built, see `get_entry_df`.
+    conversion_timeout : float, optional
+        Per-entry conversion time limit, see `get_entry_df`.
+    """
+
+    def __init__(self, processor, entry_names, store_entry=False, include_error=False,
+                 rdkit_engine='openff', conversion_timeout=None):
+        self.processor = processor
+        self.entry_names = list(entry_names)
+        self.store_entry = store_entry
+        self.include_error = include_error
+        self.rdkit_engine = rdkit_engine
+        self.conversion_timeout = conversion_timeout
+
+        self._rows = {}  # position -> computed values
+        self._index = None
+        self.iloc = _Indexer(self._iloc)
+        self.loc = _Indexer(self._loc)
+        # Rows are tracked as ('lazy', id(frame), position); stop tracking them with the frame
+        weakref.finalize(self, _forget_rows, processor.memory, id(self), self._rows)
+
+    def __len__(self):
+        return len(self.entry_names)
+
+    @property
+    def columns(self) -> list:
+        columns = ['Entry Name']
+        if self.store_entry:
+            columns.append('Entry')
+        for column in LAZY_COLUMNS:
+            columns.append(column)
+            if self.include_error and column in _ERROR_COLUMNS:
+                columns.append(_ERROR_COLUMNS[column])
+        return columns
+
+    @property
+    def n_computed(self) -> int:
+        """Number of rows with at least one computed value."""
+        return len(self._rows)
+
+    def __getitem__(self, column):
+        if column == 'Entry Name':
+            return pd.Series(self.entry_names, name='Entry Name')
+        if column not in self.columns:
+            raise KeyError(column)
+        return LazyColumn(self, column)
+
+    def _check_columns(self, columns) -> list:
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise KeyError(unknown[0] if len(unknown) == 1 else unknown)
+        return columns
+
+    def _position(self, i) -> int:
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(f"Row {i} out of range for {n} entries")
+        return int(i) % n
+
+    def _positions(self, key) -> list:
+        if isinstance(key, slice):
+            return list(range(len(self)))[key]
+        if isinstance(key, (int, np.integer)):
+            return [self._position(key)]
+        key = np.asarray(key)
+        if key.dtype == bool:
+            return np.flatnonzero(key).tolist()
+        return [self._position(i) for i in key.tolist()]
+
+    def _entry_position(self, name) -> int:
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.entry_names)}
+        return self._index[name]
+
+    def _compute(self, positions, columns):
+        """
+        Fetch and convert what the rows at ``positions`` still need for ``columns``.
+
+        Returns the rows computed here, which stay valid even if the memory
+        budget evicts them from the frame right away.
+        """
+        processor = self.processor
+        need_entry = self.store_entry and 'Entry' in columns
+        need_openff = 'OpenFFMol' in columns or 'OpenFFMol_Error' in columns
+        need_rdkit = bool({'RDKit Molecule', 'RDKit_Error', 'SMILES'} & set(columns))
+
+        def missing(i, key):
+            return key not in self._rows.get(i, {})
+
+        todo = [
+            i for i in positions
+            if (need_entry and missing(i, 'Entry'))
+            or (need_openff and missing(i, 'OpenFFMol'))
+            or (need_rdkit and missing(i, 'RDKit Molecule'))
+        ]
+        if not todo:
+            return {}
+
+        names = [self.entry_names[i] for i in todo]
+        processor.fetcher.fetch_entries(processor.ds, names)
+        fresh = {}
+        if self.conversion_timeout is not None and (need_openff or need_rdkit):
+            fresh = processor._convert_in_workers(
+                names, need_openff, need_rdkit, self.rdkit_engine, self.conversion_timeout
+            )
+
+        computed = {}
+        for i, name in zip(todo, names):
+            row = computed[i] = self._rows.get(i, {})
+            entry = processor.ds.get_entry(name)
+            if need_entry:
+                row['Entry'] = entry
+            if need_openff or need_rdkit:
+                converted = processor._convert_entry(
+                    name, entry, need_openff, need_rdkit, self.rdkit_engine, fresh
+                )
+                row.update(converted)
+                if need_rdkit:
+                    mol = converted.get('RDKit Molecule')
+                    row['SMILES'] = Chem.MolToSmiles(mol) if mol is not None else None
+            self._rows[i] = row
+            # The processor's on_evict drops the row from self._rows
+            size = sys.getsizeof(row) + sum(approximate_size(row.get(c)) for c in _OWN_COLUMNS)
+            processor.memory.put(('lazy', id(self), i), self._rows, size=size)
+        processor._track_entries(names)
+        return computed
+
+    def _values(self, positions, columns) -> list:
+        """Computed values of ``columns`` for each row at ``positions``."""
+        computed = self._compute(positions, columns)
+        values = []
+        for i in positions:
+            self.processor.memory.touch(('lazy', id(self), i))
+            row = computed.get(i) or self._rows.get(i, {})
+            values.append({column: row.get(column) for column in columns})
+        return values
+
+    def _frame(self, positions, columns=None) -> pd.DataFrame:
+        columns = self.columns if columns is None else self._check_columns(columns)
+        computed = [c for c in columns if c != 'Entry Name']
+        df = pd.DataFrame(self._values(positions, computed), columns=computed)
+        if 'Entry Name' in columns:
+            df.insert(0, 'Entry Name', [self.entry_names[i] for i in positions])
+        return df[columns]
+
+    def _select(self, positions, single_row, columns):
+        """Select like pandas: a single row or column gives a Series, both give a scalar."""
+        df = self._frame(positions, columns)
+        if isinstance(columns, str):
+            df = df[columns]
+        return df.iloc[0] if single_row else df
+
+    def _iloc(self, key):
+        rows, columns = key if isinstance(key, tuple) else (key, None)
+        if isinstance(rows, (int, np.integer)):
+            return self._select([self._position(rows)], True, columns)
+        return self._select(self._positions(rows), False, columns)
+
+    def _loc(self, key):
+        rows, columns = key if isinstance(key, tuple) else (key, None)
+        if isinstance(rows, str):
+            return self._select([self._entry_position(rows)], True, columns)
+        if isinstance(rows, slice) and rows == slice(None):
+            return self._select(list(range(len(self))), False, columns)
+        return self._select([self._entry_position(name) for name in rows], False, columns)
+
+    def head(self, n=5, columns=None) -> pd.DataFrame:
+        """First ``n`` rows, computing only ``columns`` if given."""
+        return self._frame(self._positions(slice(0, n)), columns)
+
+    def to_dataframe(self, columns=None) -> pd.DataFrame:
+        """Compute every row and return a regular DataFrame, as `get_entry_df` would."""
+        return self._frame(list(range(len(self))), columns)
+
+    def __repr__(self):
+        return (
+            f'<LazyEntryFrame: {len(self)} entries, {self.n_computed} computed, '
+            f'columns={self.columns}>'
+        )
@@ -4,6 +4,8 @@
 
 from functools import wraps
 
+from jobs import run_in_background
+from multi import MultiDatasetBrowserWidget, MultiDatasetProcessor
 from singlepoint import SinglePointDatasetBrowser, SinglePointDatasetProcessor
 
 _processors = {
@@ -14,11 +16,11 @@ _browsers = {
     "singlepointdataset": SinglePointDatasetBrowser
 }
 class DatasetBrowser:
-    def __init__(self, dataset, dataset_type):
+    def __init__(self, dataset, dataset_type, **processor_kwargs):
         ProcessorClass = _processors[dataset_type]
         BrowserClass = _browsers[dataset_type]
         
-        self.processor = ProcessorClass(dataset)
+        self.processor = ProcessorClass(dataset, **processor_kwargs)
         self.browser = BrowserClass(self.processor)
 
         # Create wrapped methods at instantiation time
@@ -37,12 +39,98 @@ class DatasetBrowser:
         self.get_properties = wraps(self.processor.ds.get_properties_df)(
             lambda *args, **kwargs: self.processor.ds.get_properties_df(*args, **kwargs)
         )
+
+        self.compare_specifications = wraps(self.processor.compare_specifications)(
+            lambda *args, **kwargs: self.processor.compare_specifications(*args, **kwargs)
+        )
+
+        self.get_error_clusters = wraps(self.processor.get_error_clusters)(
+            lambda *args, **kwargs: self.processor.get_error_clusters(*args, **kwargs)
+        )
+
+        self.get_geometry_store = wraps(self.processor.get_geometry_store)(
+            lambda *args, **kwargs: self.processor.get_geometry_store(*args, **kwargs)
+        )
+
+        self.memory_usage = wraps(self.processor.memory_usage)(
+            lambda *args, **kwargs: self.processor.memory_usage(*args, **kwargs)
+        )
+
+        self.save_session = wraps(self.processor.save_session)(
+            lambda *args, **kwargs: self.processor.save_session(*args, **kwargs)
+        )
+
+        self.load_session = wraps(self.processor.load_session)(
+            lambda *args, **kwargs: self.processor.load_session(*args, **kwargs)
+        )
     
+    def get_entries_background(self, start=None, stop=None, chunk_size=100, **kwargs):
+        """
+        Run `get_entries` as a cancellable background job.
+
+        Returns a `BackgroundJob`; display it for a progress bar, and use
+        `job.result()` or `await job` for the (possibly partial) DataFrame.
+        """
+        return run_in_background(
+            self.processor, "get_entry_df", start=start, stop=stop, chunk_size=chunk_size, **kwargs
+        )
+
+    def get_records_background(self, start=None, stop=None, chunk_size=100, **kwargs):
+        """Run `get_records` as a cancellable background job. See `get_entries_background`."""
+        return run_in_background(
+            self.processor, "get_record_df", start=start, stop=stop, chunk_size=chunk_size, **kwargs
+        )
+
     def _ipython_display_(self):
         self.browser._ipython_display_()
 
-def create_dataset_browser(dataset):
+def create_dataset_browser(dataset, **processor_kwargs):
 
     dataset_type = type(dataset).__name__.lower()
 
-    return DatasetBrowser(dataset, dataset_type)
+    return DatasetBrowser(dataset, dataset_type, **processor_kwargs)
+
+
+class MultiDatasetBrowser:
+    def __init__(self, datasets, **processor_kwargs):
+        self.processor = MultiDatasetProcessor(datasets, **processor_kwargs)
+        self.browser = MultiDatasetBrowserWidget(self.processor)
+
+        self.get_entries = wraps(self.processor.get_entry_df)(
+            lambda *args, **kwargs: self.processor.get_entry_df(*args, **kwargs)
+        )
+
+        self.get_specifications = wraps(self.processor.get_specification_df)(
+            lambda *args, **kwargs: self.processor.get_specification_df(*args, **kwargs)
+        )
+
+        self.get_record_properties = wraps(self.processor.get_record_property_df)(
+            lambda *args, **kwargs: self.processor.get_record_property_df(*args, **kwargs)
+        )
+
+        self.find_entry = wraps(self.processor.find_entry)(
+            lambda *args, **kwargs: self.processor.find_entry(*args, **kwargs)
+        )
+
+        self.cache_savings = wraps(self.processor.cache_savings)(
+            lambda *args, **kwargs: self.processor.cache_savings(*args, **kwargs)
+        )
+
+        self.memory_usage = wraps(self.processor.memory_usage)(
+            lambda *args, **kwargs: self.processor.memory_usage(*args, **kwargs)
+        )
+
+    def __getitem__(self, label):
+        """Single-dataset processor for one of the datasets."""
+        return self.processor.processors[label]
+
+    def _ipython_display_(self):
+        self.browser._ipython_display_()
+
+def create_multi_dataset_browser(datasets, **processor_kwargs):
+    """
+    Browse several singlepoint datasets that share one molecule conversion cache.
+
+    ``datasets`` is a list of datasets, or a dict of datasets by label.
+    """
+    return MultiDatasetBrowser(datasets, **processor_kwargs)
@@ -0,0 +1,316 @@
+"""
+Processing and browsing several singlepoint datasets that share molecules.
+"""
+
+import html
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import ipywidgets as widgets
+from IPython.display import display, HTML
+
+from base import BaseDatasetBrowser
+from cache import DEFAULT_MEMORY_BUDGET, SharedConversionCache
+from singlepoint import SinglePointDatasetBrowser, SinglePointDatasetProcessor
+from util import molecule_key
+
+
+def _dataset_labels(datasets):
+    """Unique labels for datasets: their names, with the ID added where names repeat."""
+    names = [ds.name for ds in datasets]
+    return [
+        f"{ds.name} ({ds.id})" if names.count(ds.name) > 1 else ds.name
+        for ds in datasets
+    ]
+
+
+class MultiDatasetProcessor:
+    """
+    Processors for several datasets sharing one conversion cache.
+
+    Conversions are cached by molecule (see `util.molecule_key`) in a
+    :class:`SharedConversionCache`, so a molecule that appears in several
+    datasets is converted once. Per-dataset work runs in parallel threads,
+    each dataset fetching through its own scheduler.
+
+    Parameters
+    ----------
+    datasets : list or dict
+        Datasets, or datasets by label. Labels default to dataset names.
+    conversion_cache : SharedConversionCache, optional
+        Cache to share; a new one is created by default.
+    memory_budget : int, default=DEFAULT_MEMORY_BUDGET
+        Bytes for the shared conversion cache and for each processor.
+    max_workers : int, optional
+        Number of datasets processed at once. Defaults to all of them.
+    **processor_kwargs
+        Passed to each `SinglePointDatasetProcessor`.
+    """
+
+    def __init__(self, datasets, conversion_cache=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 max_workers=None, **processor_kwargs):
+        if not isinstance(datasets, dict):
+            datasets = list(datasets)
+            datasets = dict(zip(_dataset_labels(datasets), datasets))
+
+        self.conversion_cache = (
+            conversion_cache if conversion_cache is not None
+            else SharedConversionCache(max_bytes=memory_budget)
+        )
+        self.processors = OrderedDict(
+            (label, SinglePointDatasetProcessor(
+                ds,
+                memory_budget=memory_budget,
+                conversion_cache=self.conversion_cache,
+                **processor_kwargs
+            ))
+            for label, ds in datasets.items()
+        )
+        self.max_workers = max_workers or max(1, len(self.processors))
+        self._entry_index = None
+
+    @property
+    def labels(self) -> list:
+        return list(self.processors)
+
+    @property
+    def name(self) -> str:
+        return f"{len(self.processors)} singlepoint datasets"
+
+    @property
+    def description(self) -> str:
+        return ', '.join(self.labels)
+
+    @property
+    def n_entries(self) -> int:
+        """Total number of entries over all datasets."""
+        return sum(p.n_entries for p in self.processors.values())
+
+    def map(self, fn, datasets=None) -> OrderedDict:
+        """
+        Call ``fn(processor)`` for each dataset in parallel.
+
+        Returns the results by label, in dataset order.
+        """
+        labels = self.labels if datasets is None else list(datasets)
+        if len(labels) <= 1 or self.max_workers <= 1:
+            return OrderedDict((label, fn(self.processors[label])) for label in labels)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='qcbrowser-multi') as executor:
+            futures = [(label, executor.submit(fn, self.processors[label])) for label in labels]
+            return OrderedDict((label, future.result()) for label, future in futures)
+
+    @staticmethod
+    def _concat(frames: dict) -> pd.DataFrame:
+        frames = [df.assign(Dataset=label) for label, df in frames.items()]
+        if not frames:
+            return pd.DataFrame(columns=['Dataset'])
+        df = pd.concat(frames, ignore_index=True)
+        return df[['Dataset'] + [col for col in df.columns if col != 'Dataset']]
+
+    def get_specification_df(self, merged=False) -> pd.DataFrame:
+        """
+        Return the specifications of all datasets, with a ``Dataset`` column.
+
+        With ``merged=True``, specifications with the same name, program,
+        method and basis are combined into one row, with their record counts
+        summed and the datasets they appear in listed.
+        """
+        df = self._concat(self.map(lambda p: p.get_specification_df()))
+        if not merged:
+            return df
+
+        keys = ['Specification Name', 'Program', 'Method', 'Basis']
+        return (
+            df.groupby(keys, sort=False, dropna=False)
+            .agg(**{
+                'Datasets': ('Dataset', list),
+                'Num Complete': ('Num Complete', 'sum'),
+                'Num Error': ('Num Error', 'sum'),
+                'Num Invalid': ('Num Invalid', 'sum'),
+            })
+            .reset_index()
+        )
+
+    def get_entry_df(self, start=None, stop=None, datasets=None, **kwargs) -> pd.DataFrame:
+        """
+        Return `get_entry_df` of each dataset, fetched in parallel, with a ``Dataset`` column.
+
+        ``start``/``stop`` apply to each dataset.
+        """
+        return self._concat(self.map(
+            lambda p: p.get_entry_df(start=start, stop=stop, **kwargs), datasets
+        ))
+
+    def get_record_property_df(self, start=None, stop=None, datasets=None, **kwargs) -> pd.DataFrame:
+        """Return `get_record_property_df` of each dataset, fetched in parallel, with a ``Dataset`` column."""
+        return self._concat(self.map(
+            lambda p: p.get_record_property_df(start=start, stop=stop, **kwargs), datasets
+        ))
+
+    def entry_index(self) -> dict:
+        """Map each entry name to the labels of the datasets containing it."""
+        if self._entry_index is None:
+            index = {}
+            for label, processor in self.processors.items():
+                for name in processor.entry_names:
+                    index.setdefault(name, []).append(label)
+            self._entry_index = index
+        return self._entry_index
+
+    def find_entry(self, entry_name) -> pd.DataFrame:
+        """
+        Look up an entry by name in every dataset.
+
+        Returns one row per dataset containing it, with the entry and its
+        molecule key, so entries with the same molecule in different
+        datasets can be recognized.
+        """
+        labels = self.entry_index().get(entry_name, [])
+
+        def lookup(processor):
+            entry = processor.ds.get_entry(entry_name)
+            return entry, molecule_key(entry)
+
+        found = self.map(lookup, labels)
+        return pd.DataFrame(
+            [
+                {'Dataset': label, 'Entry Name': entry_name, 'Molecule Key': key, 'Entry': entry}
+                for label, (entry, key) in found.items()
+            ],
+            columns=['Dataset', 'Entry Name', 'Molecule Key', 'Entry'],
+        )
+
+    def cache_savings(self) -> dict:
+        """Report the conversions reused through the shared cache (see `SharedConversionCache.savings`)."""
+        return self.conversion_cache.savings()
+
+    def memory_usage(self) -> dict:
+        """Report memory held by each dataset's processor and by the shared conversion cache."""
+        return {
+            'datasets': {label: p.memory_usage() for label, p in self.processors.items()},
+            'shared_conversions': {
+                'bytes': self.conversion_cache.current_bytes,
+                'max_bytes': self.conversion_cache.max_bytes,
+                'molecules': len(self.conversion_cache),
+            },
+        }
+
+
+class MultiDatasetBrowserWidget(BaseDatasetBrowser):
+    """Browser for several datasets: merged specifications, entry lookup and per-dataset browsers."""
+
+    def __init__(self, dataset_processor):
+        super().__init__(dataset_processor)
+        self._output = widgets.Output()
+        self._browsers = {}
+
+    def create_header(self):
+        """Create the header listing the datasets."""
+        processor = self.dataset_processor
+        rows = ''.join(
+            f'<li>{label}: {p.n_entries} entries, {p.n_specifications} specifications</li>'
+            for label, p in processor.processors.items()
+        )
+        return widgets.HTML(f"""
+        <div style="
+            background: #f5f5f5;
+            border: 1px solid #ddd;
+            padding: 10px;
+            border-radius: 5px;
+            font-family: Arial, sans-serif;
+            font-size: 14px;
+            line-height: 1.5;
+            width: 100%;
+            margin-bottom: 10px;
+            box-sizing: border-box;
+        ">
+            <strong>{processor.name}</strong>
+            <ul style="margin: 5px 0;">{rows}</ul>
+        </div>
+        """)
+
+    def create_navigation(self):
+        """Create navigation controls."""
+        spec_button = widgets.Button(
+            description='Specifications',
+            layout=widgets.Layout(width='150px')
+        )
+        savings_button = widgets.Button(
+            description='Cache Savings',
+            layout=widgets.Layout(width='150px')
+        )
+        dataset_dropdown = widgets.Dropdown(
+            options=self.dataset_processor.labels,
+            layout=widgets.Layout(width='250px')
+        )
+        open_button = widgets.Button(
+            description='Open Dataset',
+            layout=widgets.Layout(width='120px')
+        )
+        search_input = widgets.Text(
+            placeholder='Entry name',
+            layout=widgets.Layout(width='200px')
+        )
+        search_button = widgets.Button(
+            description='Find Entry',
+            layout=widgets.Layout(width='100px')
+        )
+
+        def show(create):
+            def handler(b):
+                self._output.clear_output()
+                with self._output:
+                    create()
+            return handler
+
+        spec_button.on_click(show(self._create_specification_table))
+        savings_button.on_click(show(self._create_savings_table))
+        open_button.on_click(show(lambda: display(self._get_browser(dataset_dropdown.value))))
+        find = show(lambda: self._create_entry_lookup(search_input.value.strip()))
+        search_button.on_click(find)
+        search_input.on_submit(find)
+
+        return widgets.HBox(
+            [spec_button, savings_button, dataset_dropdown, open_button, search_input, search_button],
+            layout=widgets.Layout(justify_content='flex-start', margin='10px 0')
+        )
+
+    def create_content(self):
+        """Create the main content area."""
+        with self._output:
+            self._create_specification_table()
+        return self._output
+
+    def _get_browser(self, label):
+        browser = self._browsers.get(label)
+        if browser is None:
+            browser = SinglePointDatasetBrowser(self.dataset_processor.processors[label])
+            self._browsers[label] = browser
+        return browser
+
+    def _create_specification_table(self):
+        """Show the merged specifications of all datasets."""
+        df = self.dataset_processor.get_specification_df(merged=True)
+        df['Datasets'] = df['Datasets'].apply(', '.join)
+        display(HTML(df.to_html(index=False)))
+
+    def _create_savings_table(self):
+        """Show how much conversion work the shared cache saved."""
+        savings = self.dataset_processor.cache_savings()
+        display(HTML(pd.DataFrame([savings]).T.rename(columns={0: 'Value'}).to_html()))
+
+    def _create_entry_lookup(self, entry_name):
+        """Show the datasets containing an entry."""
+        if not entry_name:
+            return
+        df = self.dataset_processor.find_entry(entry_name)
+        if df.empty:
+            display(HTML(f"<p>No dataset contains an entry named <code>{html.escape(entry_name)}</code>.</p>"))
+            return
+        shared = df['Molecule Key'].nunique() == 1
+        display(HTML(
+            df.drop(columns=['Entry']).to_html(index=False)
+            + f"<p>{'Same molecule in all datasets' if shared else 'Molecules differ between datasets'}.</p>"
+        ))
@@ -0,0 +1,144 @@
+"""
+Debounced, superseding page loading for the paginated browsers.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+# Seconds to wait for further navigation before loading a page
+DEFAULT_DEBOUNCE = 0.15
+
+# Returned instead of data for loads skipped because a newer page was requested
+_SUPERSEDED = object()
+
+
+class PageLoader:
+    """
+    Load and render pages so that only the latest requested page is shown.
+
+    Every call to :meth:`request` supersedes the previous ones. Requests
+    are debounced, loads run in a worker thread, and a load that finishes
+    after a newer request was made is discarded instead of rendered. So
+    clicking Next five times quickly fetches and renders only the final page.
+    Loads run one at a time, and a load that is superseded while it waits
+    for the worker is skipped, so stale loads never compete with the
+    current one for the processor.
+
+    When there is no running event loop (e.g. outside a kernel), requests
+    are loaded and rendered synchronously.
+
+    Parameters
+    ----------
+    load : callable
+        ``load(page)`` fetches and prepares the data for a page. Runs in a
+        worker thread.
+    render : callable
+        ``render(page, data)`` displays a loaded page. Runs on the event
+        loop thread, so it can write to Output widgets.
+    debounce : float, default=DEFAULT_DEBOUNCE
+        Seconds without a newer request before a load starts.
+    on_error : callable, optional
+        ``on_error(page, exception)`` for failed loads of the current page.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(
+        self,
+        load: Callable[[Hashable], Any],
+        render: Callable[[Hashable, Any], None],
+        debounce: float = DEFAULT_DEBOUNCE,
+        on_error: Callable[[Hashable, Exception], None] = None,
+    ):
+        self.load = load
+        self.render = render
+        self.debounce = debounce
+        self.on_error = on_error
+
+        self._generation = 0
+        self._task = None
+        self.stats = {'requested': 0, 'loaded': 0, 'rendered': 0, 'discarded': 0}
+
+    @classmethod
+    def _get_executor(cls):
+        # Shared by all browsers. One worker, so loads never run concurrently
+        # against the same processor.
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='qcbrowser-page')
+            return cls._executor
+
+    def is_current(self, generation) -> bool:
+        return generation == self._generation
+
+    def request(self, page):
+        """Request a page, superseding all earlier requests."""
+        self._generation += 1
+        generation = self._generation
+        self.stats['requested'] += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            self._load_and_render_sync(page, generation)
+            return None
+
+        if self._task is not None and not self._task.done():
+            # Cancels the debounce wait, or drops the in-flight load's result
+            self._task.cancel()
+            self.stats['discarded'] += 1
+        self._task = loop.create_task(self._load_and_render(page, generation))
+        return self._task
+
+    def _handle_error(self, page, error):
+        if self.on_error is None:
+            raise error
+        self.on_error(page, error)
+
+    def _load_and_render_sync(self, page, generation):
+        try:
+            data = self.load(page)
+        except Exception as e:
+            self._handle_error(page, e)
+            return
+        self.stats['loaded'] += 1
+        self._finish(page, data, generation)
+
+    async def _load_and_render(self, page, generation):
+        if self.debounce:
+            await asyncio.sleep(self.debounce)
+        if not self.is_current(generation):
+            self.stats['discarded'] += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(self._get_executor(), self._load_if_current, page, generation)
+        except Exception as e:
+            if self.is_current(generation):
+                self._handle_error(page, e)
+            return
+        if data is _SUPERSEDED:
+            self.stats['discarded'] += 1
+            return
+        self.stats['loaded'] += 1
+        self._finish(page, data, generation)
+
+    def _load_if_current(self, page, generation):
+        # Runs in the worker; a newer request may have been made while queued
+        if not self.is_current(generation):
+            return _SUPERSEDED
+        return self.load(page)
+
+    def _finish(self, page, data, generation):
+        if not self.is_current(generation):
+            self.stats['discarded'] += 1
+            return
+        self.render(page, data)
+        self.stats['rendered'] += 1
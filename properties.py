@@ -0,0 +1,196 @@
+"""
+Columnar cache of scalar record properties across a whole dataset.
+"""
+
+import threading
+
+import numpy as np
+
+from cache import release_from_dataset
+from fetch import split_batches
+
+
+def is_scalar(value) -> bool:
+    """Whether a property value is a scalar number (booleans included)."""
+    return isinstance(value, (bool, np.bool_, int, float, np.integer, np.floating))
+
+
+def _is_missing(value) -> bool:
+    """Whether a property value is absent (None, or NaN filled in by a DataFrame)."""
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def scalar_value(value) -> float:
+    """Return a property value as a float, or NaN if it isn't a scalar number."""
+    return float(value) if is_scalar(value) else np.nan
+
+
+class PropertyColumnCache:
+    """
+    Scalar record properties stored as float64 arrays aligned with the dataset's entry order.
+
+    A column for ``(specification, property)`` holds one value per entry,
+    with NaN where there is no complete record or no scalar value. Columns
+    are filled in batches with the dataset's properties query
+    (``get_properties_df``), which transfers only the requested properties
+    rather than whole records. Datasets without one fall back to fetching
+    the records through the processor's fetch scheduler. Either way,
+    records that the processor isn't otherwise holding are released again,
+    so filling a column doesn't keep records alive.
+
+    Parameters
+    ----------
+    processor : SinglePointDatasetProcessor
+        Processor whose dataset, fetcher and memory budget are used.
+    batch_size : int, default=1000
+        Number of entries whose records are fetched and extracted at a time.
+    """
+
+    def __init__(self, processor, batch_size=1000):
+        self.processor = processor
+        self.batch_size = batch_size
+        self._columns = {}
+        self._scalar_properties = {}
+        self._version = 0
+        self._lock = threading.RLock()
+
+    @property
+    def version(self) -> int:
+        """Incremented every time a column gains values."""
+        return self._version
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def _entry_names(self):
+        return self.processor.entry_names
+
+    def _property_values(self, spec, properties, names) -> dict:
+        """Values of ``properties`` by entry name, for the complete records of ``names``."""
+        ds = self.processor.ds
+        if hasattr(ds, 'get_properties_df'):
+            try:
+                df = ds.get_properties_df(
+                    properties, entry_names=names, specification_names=[spec]
+                )
+            except StopIteration:
+                # QCPortal raises this when none of the records are complete
+                df = None
+            if df is None or spec not in df.columns.get_level_values(0):
+                values = {}
+            else:
+                table = df[spec].reindex(columns=properties)
+                values = table[table.index.isin(names)].to_dict('index')
+        else:
+            self.processor.fetcher.fetch_records(ds, names, spec)
+            values = {}
+            for name in names:
+                record = ds.get_record(name, spec)
+                if record is not None and getattr(record.status, 'value', record.status) == 'complete':
+                    record_properties = record.properties or {}
+                    values[name] = {prop: record_properties.get(prop) for prop in properties}
+
+        for name in names:
+            if ('record', name, spec) not in self.processor.memory:
+                release_from_dataset(ds, ('record', name, spec))
+        return values
+
+    def _fetch(self, spec, properties, positions):
+        """Fetch the properties of the entries at ``positions`` and fill their values."""
+        names = self._entry_names()
+        columns = {prop: self._columns[(spec, prop)] for prop in properties}
+        filled = False
+
+        for batch in split_batches(positions, self.batch_size):
+            batch_names = [names[i] for i in batch]
+            values = self._property_values(spec, properties, batch_names)
+            for i, name in zip(batch, batch_names):
+                if name not in values:
+                    continue
+                for prop, column in columns.items():
+                    column[i] = scalar_value(values[name][prop])
+                filled = True
+
+        if filled:
+            self._version += 1
+
+    def load(self, spec, properties):
+        """Fill columns for several properties of a specification with one pass over the records."""
+        with self._lock:
+            n_entries = len(self._entry_names())
+            missing = [p for p in properties if (spec, p) not in self._columns]
+            for prop in missing:
+                self._columns[(spec, prop)] = np.full(n_entries, np.nan)
+            if missing:
+                self._fetch(spec, missing, list(range(n_entries)))
+
+    def scalar_properties(self, spec, sample_size=50) -> list:
+        """
+        Return the computed properties of a specification that hold scalar numbers.
+
+        Judged once per specification from the complete records of the first
+        ``sample_size`` entries: properties with any non-scalar value there
+        (e.g. gradients) are left out.
+        """
+        with self._lock:
+            if spec not in self._scalar_properties:
+                properties = self.processor.ds.computed_properties.get(spec, [])
+                names = self._entry_names()[:sample_size]
+                non_scalar = set()
+                for values in self._property_values(spec, properties, names).values():
+                    for prop, value in values.items():
+                        if not is_scalar(value) and not _is_missing(value):
+                            non_scalar.add(prop)
+                self._scalar_properties[spec] = [
+                    prop for prop in properties if prop not in non_scalar
+                ]
+            return list(self._scalar_properties[spec])
+
+    def get(self, spec, prop) -> np.ndarray:
+        """
+        Return the column for a property of a specification, filling it on first use.
+
+        The returned array is shared with the cache and must not be modified.
+        """
+        self.load(spec, [prop])
+        return self._columns[(spec, prop)]
+
+    def refresh(self, spec, properties=None):
+        """
+        Fetch values only for entries that are still missing in cached columns.
+
+        Use this after more records of a specification have completed.
+        """
+        with self._lock:
+            if properties is None:
+                properties = [p for s, p in self._columns if s == spec]
+            properties = [p for p in properties if (spec, p) in self._columns]
+            if not properties:
+                return
+            missing = np.zeros(len(self._entry_names()), dtype=bool)
+            for prop in properties:
+                missing |= np.isnan(self._columns[(spec, prop)])
+            self._fetch(spec, properties, np.flatnonzero(missing).tolist())
+
+    def clear(self):
+        with self._lock:
+            self._columns.clear()
+            self._scalar_properties.clear()
+            self._version += 1
+
+
+def order_by_values(values, ascending=True, k=None) -> np.ndarray:
+    """
+    Return the positions of the non-NaN ``values`` in sorted order.
+
+    With ``k``, only the first ``k`` positions are selected, using
+    ``np.argpartition`` so the cost stays linear in the number of entries.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    keys = values[valid] if ascending else -values[valid]
+
+    if k is not None and k < len(valid):
+        selected = np.argpartition(keys, k)[:k]
+        return valid[selected[np.argsort(keys[selected], kind='stable')]]
+    return valid[np.argsort(keys, kind='stable')]
@@ -0,0 +1,112 @@
+"""
+Index of entry names for exact, prefix and substring lookup.
+"""
+
+from bisect import bisect_left
+from itertools import islice
+
+import numpy as np
+
+# Separates names in the text searched for substrings; never part of a name
+_SEPARATOR = '\n'
+
+
+class EntryNameIndex:
+    """
+    Name lookup over a fixed list of entry names.
+
+    Built once per dataset:
+
+    * a dict from name to position, for exact lookup,
+    * the names sorted (case-insensitively) in a list, with their
+      positions, for prefix search with ``bisect``,
+    * all names joined into one lower-cased string with the start offset of
+      each name, for substring search with ``str.find`` instead of a Python
+      loop over the names.
+
+    Parameters
+    ----------
+    entry_names : list of str
+        Entry names in dataset order.
+    """
+
+    def __init__(self, entry_names):
+        self.entry_names = entry_names
+        self.positions = {name: i for i, name in enumerate(entry_names)}
+
+        lowered = [name.lower() for name in entry_names]
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        self._sorted = [lowered[i] for i in order]
+        self._sorted_positions = np.asarray(order, dtype=np.int64)
+
+        self._text = _SEPARATOR.join(lowered)
+        lengths = np.fromiter((len(name) + 1 for name in lowered), dtype=np.int64, count=len(lowered))
+        self._starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lowered) else np.empty(0, np.int64)
+
+    def __len__(self):
+        return len(self.entry_names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def position(self, name):
+        """Position of an entry name, or None."""
+        return self.positions.get(name)
+
+    def prefix(self, prefix, limit=None) -> np.ndarray:
+        """Positions of names starting with ``prefix`` (case-insensitive), in name order."""
+        prefix = prefix.lower()
+        lo = bisect_left(self._sorted, prefix)
+        hi = bisect_left(self._sorted, prefix + '\U0010ffff', lo)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._sorted_positions[lo:hi]
+
+    def _iter_substring(self, query):
+        query = query.lower()
+        if not query or _SEPARATOR in query:
+            return
+        text, find = self._text, self._text.find
+        offset = find(query)
+        while offset != -1:
+            position = int(np.searchsorted(self._starts, offset, side='right')) - 1
+            yield position
+            # Continue after the end of this name, so each name counts once
+            next_start = self._starts[position + 1] if position + 1 < len(self._starts) else len(text)
+            offset = find(query, next_start)
+
+    def substring(self, query, limit=None) -> np.ndarray:
+        """Positions of names containing ``query`` (case-insensitive), in dataset order."""
+        return np.fromiter(islice(self._iter_substring(query), limit), dtype=np.int64)
+
+    def search(self, query, limit=50, accept=None) -> list:
+        """
+        Positions of names matching ``query``, best matches first.
+
+        An exact match comes first, then prefix matches, then other names
+        containing the query, up to ``limit`` positions. If ``accept`` is
+        given, only positions for which ``accept(position)`` is true are
+        returned, and they count towards the limit.
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        results = []
+        seen = set()
+
+        def add(positions):
+            for position in positions:
+                if len(results) >= limit:
+                    return
+                position = int(position)
+                if position not in seen and (accept is None or accept(position)):
+                    seen.add(position)
+                    results.append(position)
+
+        exact = self.positions.get(query)
+        if exact is not None:
+            add([exact])
+        add(self.prefix(query, limit=None if accept is not None else limit))
+        add(self._iter_substring(query))
+        return results
@@ -0,0 +1,163 @@
+"""
+Warm-start snapshots of a processor's memoized state.
+
+A session file is an 8-byte magic string, a format version and a
+zlib-compressed pickle of the state. The state includes a fingerprint of
+the dataset, and it is only restored if the dataset still matches.
+
+Because the state is pickled, loading a session file can run arbitrary
+code. Only load session files from a trusted source.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import struct
+import time
+import warnings
+import zlib
+
+from cache import restore_to_dataset
+
+MAGIC = b"QCBSESS\x00"
+VERSION = 1
+_HEADER = struct.Struct("<8sH")
+
+# Kinds of processor memory values that are saved (converted molecules)
+_SAVED_KINDS = ("openff", "rdkit")
+
+
+def dataset_fingerprint(ds) -> dict:
+    """
+    Identify a dataset and the state of its records.
+
+    Uses the dataset ID and name, the specification names, a hash of the
+    record status counts and, where the dataset has them, its entry count
+    and modification time.
+    """
+    status = json.dumps(ds.status(), sort_keys=True, default=str)
+    fingerprint = {
+        "id": getattr(ds, "id", None),
+        "name": ds.name,
+        "specification_names": sorted(ds.specification_names),
+        "status": hashlib.sha1(status.encode()).hexdigest(),
+    }
+    for attribute in ("entry_count", "modified_on"):
+        value = getattr(ds, attribute, None)
+        if value is not None:
+            fingerprint[attribute] = value.isoformat() if isinstance(value, datetime.datetime) else value
+    return fingerprint
+
+
+def write_session(path, state: dict):
+    """Write a state dictionary as a session file, atomically."""
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION))
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_session(path) -> dict:
+    """
+    Read a session file.
+
+    The state is unpickled, which can run arbitrary code: only read
+    trusted files.
+
+    Raises
+    ------
+    ValueError
+        If the file isn't a session file or has an unsupported version.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a session file")
+        magic, version = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported session version {version} in {path} (expected {VERSION})")
+        return pickle.loads(zlib.decompress(f.read()))
+
+
+def capture_state(processor) -> dict:
+    """
+    Collect a processor's memoized state.
+
+    Saves the entry names, the specification table, the RDKit availability
+    check, the entries currently held (e.g. the pages shown) and the
+    converted molecules. Records are not saved; they are refetched on
+    demand.
+    """
+    ds = processor.ds
+    entries = []
+    conversions = []
+    for key, value, size in processor.memory.snapshot():
+        if key[0] == "entry":
+            entries.append((ds.get_entry(key[1]), size))
+        elif key[0] in _SAVED_KINDS:
+            conversions.append((key, value, size))
+
+    return {
+        "fingerprint": dataset_fingerprint(ds),
+        "entry_names": processor.entry_names,
+        "specification_df": processor._specification_df,
+        "specification_status": processor._specification_status,
+        "rdkit_available": processor._rdkit_available,
+        "entries": entries,
+        "conversions": conversions,
+    }
+
+
+def restore_state(processor, state: dict):
+    """Load state collected by :func:`capture_state` into a processor."""
+    processor._entry_names = list(state["entry_names"])
+    processor._entry_index = None
+    processor._specification_df = state["specification_df"]
+    processor._specification_status = state.get("specification_status")
+    processor._rdkit_available = state["rdkit_available"]
+
+    entries = state["entries"]
+    if restore_to_dataset(processor.ds, [entry for entry, _ in entries]):
+        for entry, size in entries:
+            processor.memory.track(("entry", entry.name), size)
+    for key, value, size in state["conversions"]:
+        processor.memory.put(key, value, size=size)
+
+
+def save_session(processor, path):
+    """Save a processor's memoized state to ``path``."""
+    write_session(path, capture_state(processor))
+
+
+def load_session(processor, path) -> bool:
+    """
+    Restore a processor's memoized state from ``path``.
+
+    Returns False, with a warning, if the session was saved for a different
+    dataset or the dataset's records have changed since.
+
+    .. warning::
+        Session files are pickles, and loading one can run arbitrary code.
+        Only load session files you created yourself or otherwise trust.
+    """
+    state = read_session(path)
+    fingerprint = dataset_fingerprint(processor.ds)
+    if state["fingerprint"] != fingerprint:
+        changed = sorted(
+            key for key in set(fingerprint) | set(state["fingerprint"])
+            if fingerprint.get(key) != state["fingerprint"].get(key)
+        )
+        warnings.warn(
+            f"Session {path} does not match the dataset (changed: {', '.join(changed)}); not restored"
+        )
+        return False
+    restore_state(processor, state)
+    # The fingerprint has just confirmed the saved record status
+    processor._specification_checked = time.monotonic()
+    return True
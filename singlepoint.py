@@ -2,6 +2,13 @@
 Classes for Singlepoint records and datasets
 """
 
+import html
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
 import pandas as pd
 import mols2grid
 
@@ -9,7 +16,20 @@ from base import BaseDatasetProcessor, BaseDatasetBrowser, BaseRecordBrowser
 from rdkit import Chem
 
 from copy import deepcopy
-from util import gather_molecular_data
+from cache import DEFAULT_MEMORY_BUDGET, MemoryBudget, approximate_size, release_from_dataset
+from comparison import SpecificationComparison
+from conversion import ConversionPool
+from dtypes import compact_dataframe
+from errors import ErrorClusters, aggregate_errors
+from fetch import FetchScheduler, serialize_cache_writes
+from geometry import GeometryStore
+from lazy import LazyEntryFrame
+from paging import PageLoader
+from properties import PropertyColumnCache, order_by_values
+from search import EntryNameIndex
+from session import load_session, save_session
+from util import RDKIT_ENGINES, gather_molecular_data, molecule_key
+from viewers import ArrayPropertyViewer, is_array_like
 
 import ipywidgets as widgets
 from IPython.display import display, HTML
@@ -17,6 +37,20 @@ from IPython.display import display, HTML
 from IPython.display import display, HTML
 import ipywidgets as widgets
 
+# Number of built record detail widgets kept for instant re-display
+RECORD_DETAIL_CACHE_SIZE = 32
+
+# Rough allowance, in bytes, for the widgets of one record detail browser
+RECORD_BROWSER_WIDGET_BYTES = 64 * 1024
+
+# Seconds the record status behind the specification table is trusted
+# before get_specification_df asks the server again
+SPECIFICATION_STATUS_TTL = 60.0
+
+# Record fields prefetched with each records page so details open without
+# further requests. Properties are part of the default record fields.
+RECORD_DETAIL_INCLUDE = ['molecule']
+
 class SinglePointDatasetBrowser(BaseDatasetBrowser):
     """Browser for viewing single point datasets."""
     
@@ -25,6 +59,9 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
         self._current_view = None
         self._output = widgets.Output()
         self._num_headers = 0
+        # Sort settings and resulting entry order of the records tab
+        self._record_sort = None
+        self._record_order = None
     
     def create_header(self):
         """Create the dataset header display."""
@@ -60,6 +97,10 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
             description='View Records',
             layout=widgets.Layout(width='150px')
         )
+        error_button = widgets.Button(
+            description='View Errors',
+            layout=widgets.Layout(width='150px')
+        )
         
         def show_specs(b):
             self._current_view = 'specifications'
@@ -75,16 +116,21 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
         
         def show_records(b):
             self._current_view = 'records'
+            self._refresh_record_table()
+        
+        def show_errors(b):
+            self._current_view = 'errors'
             self._output.clear_output()
             with self._output:
-                self._create_record_table()
+                self._create_error_table()
         
         spec_button.on_click(show_specs)
         entry_button.on_click(show_entries)
         record_button.on_click(show_records)
+        error_button.on_click(show_errors)
         
         return widgets.HBox(
-            [spec_button, entry_button, record_button],
+            [spec_button, entry_button, record_button, error_button],
             layout=widgets.Layout(
                 justify_content='flex-start',
                 margin='10px 0'
@@ -178,8 +224,7 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
         current_page = [0]
 
         # Check if we have any RDKit molecules
-        sample_df = self.dataset_processor.get_entry_df(stop=100, get_rdkit=True)
-        has_rdkit = sample_df["RDKit Molecule"].notna().any()
+        has_rdkit = self.dataset_processor.has_rdkit_molecules()
 
         # Create view toggle with new names
         view_toggle = widgets.ToggleButtons(
@@ -220,15 +265,19 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
 
         # Create content area
         content_output = widgets.Output()
+        loading_label = widgets.HTML(layout=widgets.Layout(padding='5px 10px'))
 
-        def update_qc_grid_view(page_num):
-            """Update grid with QC molecule representations."""
+        def load_qc_grid_view(page_num):
+            """Fetch the entries shown in the QC molecule grid."""
             start_idx = page_num * PAGE_SIZE
-            df = self.dataset_processor.get_entry_df(
+            return self.dataset_processor.get_entry_df(
                 start=start_idx,
-                stop=start_idx + PAGE_SIZE
+                stop=start_idx + PAGE_SIZE,
+                store_entry=True
             )
-            
+
+        def render_qc_grid_view(df):
+            """Update grid with QC molecule representations."""
             content_output.clear_output()
             with content_output:
                 # Create grid items
@@ -239,8 +288,7 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
                     # Create cell output for molecule
                     cell_output = widgets.Output()
                     with cell_output:
-                        entry = self.dataset_processor.ds.get_entry(entry_name)
-                        display(entry.molecule)
+                        display(row['Entry'].molecule)
                     
                     # Create cell with name and molecule
                     cell = widgets.VBox([
@@ -266,8 +314,8 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
                 )
                 display(grid)
 
-        def update_rdkit_grid_view(page_num):
-            """Update grid with RDKit molecule representations."""
+        def load_rdkit_grid_view(page_num):
+            """Fetch and convert the entries shown in the RDKit molecule grid."""
             start_idx = page_num * PAGE_SIZE
             df = self.dataset_processor.get_entry_df(
                 start=start_idx,
@@ -275,13 +323,16 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
                 get_rdkit=True
             )
             df_filtered = df.dropna(subset=["RDKit Molecule"], inplace=False)
-            
+            # Hide the warning. The chained assignment is fine.
+            with pd.option_context("mode.chained_assignment", None):
+                df_filtered["SMILES"] = df_filtered["RDKit Molecule"].apply(Chem.MolToSmiles)
+            return df_filtered
+
+        def render_rdkit_grid_view(df_filtered):
+            """Update grid with RDKit molecule representations."""
             content_output.clear_output()
             with content_output:
                 if len(df_filtered) > 0:
-                    # Hide the warning. The chained assignment is fine.
-                    with pd.option_context("mode.chained_assignment", None):
-                        df_filtered["SMILES"] = df_filtered["RDKit Molecule"].apply(Chem.MolToSmiles)
                     display(mols2grid.display(df_filtered, size=(200, 200)))
                 else:
                     display(HTML(
@@ -289,17 +340,36 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
                         "No RDKit molecules available for current page</p>"
                     ))
 
+        def load_view(request):
+            view_type, page_num = request
+            if view_type == 'View QC Molecules':
+                return load_qc_grid_view(page_num)
+            return load_rdkit_grid_view(page_num)
+
+        def render_view(request, df):
+            view_type, page_num = request
+            loading_label.value = ''
+            if view_type == 'View QC Molecules':
+                render_qc_grid_view(df)
+            else:
+                render_rdkit_grid_view(df)
+
+        loader = PageLoader(
+            load_view,
+            render_view,
+            on_error=self._make_page_error_handler(content_output, loading_label)
+        )
+
         def update_view(view_type, page_num):
             """Update display based on selected view type."""
             # Update button states first
             prev_button.disabled = page_num == 0
             next_button.disabled = page_num == total_pages - 1
             page_input.value = str(page_num + 1)
-            
-            if view_type == 'View QC Molecules':
-                update_qc_grid_view(page_num)
-            else:
-                update_rdkit_grid_view(page_num)
+
+            # Only the last requested page is loaded and rendered
+            loading_label.value = f'Loading page {page_num + 1}...'
+            loader.request((view_type, page_num))
 
         def on_view_change(change):
             """Handle view toggle changes."""
@@ -338,13 +408,18 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
         
         # Create pagination
         pagination = widgets.HBox(
-            [prev_button, page_input, page_label, next_button],
+            [prev_button, page_input, page_label, next_button, loading_label],
             layout=widgets.Layout(justify_content='center', margin='10px 0')
         )
         
+        def go_to_entry(position):
+            current_page[0] = position // PAGE_SIZE
+            update_view(view_toggle.value, current_page[0])
+
         # Build final container
         container = widgets.VBox([
             view_controls,
+            self._create_entry_search(go_to_entry),
             pagination,
             content_output
         ])
@@ -352,11 +427,120 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
         display(container)
         update_view('View QC Molecules', 0)
     
+    def _create_record_sort_controls(self):
+        """Create controls to sort the records tab by a property over the whole dataset."""
+        processor = self.dataset_processor
+        specs = list(processor.ds.specification_names)
+        settings = self._record_sort or {}
+
+        def scalar_properties(spec):
+            return processor.property_columns.scalar_properties(spec) if spec is not None else []
+
+        spec_dropdown = widgets.Dropdown(
+            options=specs,
+            value=settings.get('specification', specs[0] if specs else None),
+            description='Sort by:',
+            layout=widgets.Layout(width='250px')
+        )
+        property_dropdown = widgets.Dropdown(
+            options=scalar_properties(spec_dropdown.value),
+            value=settings.get('property_name'),
+            layout=widgets.Layout(width='200px')
+        )
+        reference_dropdown = widgets.Dropdown(
+            options=[('(no reference)', None)] + [(f'minus {spec}', spec) for spec in specs],
+            value=settings.get('reference'),
+            layout=widgets.Layout(width='200px')
+        )
+        absolute_checkbox = widgets.Checkbox(
+            value=settings.get('absolute', False),
+            description='Absolute',
+            indent=False,
+            layout=widgets.Layout(width='90px')
+        )
+        order_toggle = widgets.ToggleButtons(
+            options=['Descending', 'Ascending'],
+            value='Ascending' if settings.get('ascending') else 'Descending',
+            style={'button_width': '90px'}
+        )
+        top_k_input = widgets.IntText(
+            value=settings.get('k') or 0,
+            description='Top k:',
+            layout=widgets.Layout(width='150px')
+        )
+        apply_button = widgets.Button(description='Sort', layout=widgets.Layout(width='80px'))
+        reset_button = widgets.Button(
+            description='Dataset order',
+            disabled=self._record_order is None,
+            layout=widgets.Layout(width='120px')
+        )
+
+        if self._record_order is not None:
+            status = (
+                f"Sorted by {settings['property_name']} ({settings['specification']}"
+                f"{' minus ' + settings['reference'] if settings.get('reference') else ''})"
+                f", {len(self._record_order)} entries"
+            )
+        else:
+            status = ''
+        status_label = widgets.HTML(status, layout=widgets.Layout(padding='5px 10px'))
+
+        def on_spec_change(change):
+            property_dropdown.options = scalar_properties(change.new)
+
+        def load_sorted(request):
+            # Fills the property columns over the whole dataset on first use
+            return processor.sort_entries(**dict(request))
+
+        def render_sorted(request, order):
+            self._record_sort, self._record_order = dict(request), order
+            self._refresh_record_table()
+
+        def on_sort_error(request, error):
+            status_label.value = f"<span style='color: #a00;'>Sort failed: {error}</span>"
+
+        loader = PageLoader(load_sorted, render_sorted, debounce=0, on_error=on_sort_error)
+
+        def show_sorted(b):
+            if property_dropdown.value is None:
+                return
+            settings = {
+                'specification': spec_dropdown.value,
+                'property_name': property_dropdown.value,
+                'reference': reference_dropdown.value,
+                'absolute': absolute_checkbox.value,
+                'ascending': order_toggle.value == 'Ascending',
+                'k': top_k_input.value if top_k_input.value > 0 else None,
+            }
+            status_label.value = 'Sorting...'
+            # Sorted in the page loader's worker, so the kernel stays responsive
+            loader.request(tuple(settings.items()))
+
+        def show_dataset_order(b):
+            self._record_order = None
+            self._refresh_record_table()
+
+        spec_dropdown.observe(on_spec_change, names='value')
+        apply_button.on_click(show_sorted)
+        reset_button.on_click(show_dataset_order)
+
+        return widgets.VBox([
+            widgets.HBox([spec_dropdown, property_dropdown, reference_dropdown, absolute_checkbox]),
+            widgets.HBox([order_toggle, top_k_input, apply_button, reset_button, status_label]),
+        ], layout=widgets.Layout(margin='0 0 10px 0'))
+
+    def _refresh_record_table(self):
+        """Redraw the records tab, e.g. after its entry order changed."""
+        self._output.clear_output()
+        with self._output:
+            self._create_record_table()
+
     def _create_record_table(self):
         """Create a paginated table of records with clickable entries."""
         PAGE_SIZE = 5
-        total_entries = self.dataset_processor.n_entries
-        total_pages = (total_entries + PAGE_SIZE - 1) // PAGE_SIZE
+        entry_order = self._record_order
+        total_entries = len(entry_order) if entry_order is not None else self.dataset_processor.n_entries
+        total_pages = max(1, (total_entries + PAGE_SIZE - 1) // PAGE_SIZE)
         current_page = [0]
 
         # Create content areas
@@ -369,12 +553,14 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
             widgets.VBox([details_output], layout=widgets.Layout(width='100%', margin='20px 0'))
         ])
 
+        page_records = {}  # (entry, spec) -> record for the visible page
+
         def show_record_details(entry_name, spec_name):
             details_output.clear_output()
             with details_output:
-                record = self.dataset_processor.ds.get_record(entry_name, spec_name)
-                if record is not None:
-                    display(SinglePointRecordBrowser(record, entry_name=entry_name))
+                browser = self._get_record_browser(entry_name, spec_name, page_records)
+                if browser is not None:
+                    display(browser)
                 else:
                     display(HTML("<p>No record found.</p>"))
 
@@ -383,13 +569,23 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
                 callback(entry_name, spec_name)
             return handler
 
-        def update_table(page_num):
+        def load_table(page_num):
             start_idx = page_num * PAGE_SIZE
-            df = self.dataset_processor.get_record_df(
+            return self.dataset_processor.get_record_df(
                 start=start_idx,
-                stop=start_idx + PAGE_SIZE
+                stop=start_idx + PAGE_SIZE,
+                include=RECORD_DETAIL_INCLUDE,
+                entry_names=entry_order
             )
+
+        def render_table(page_num, df):
+            loading_label.value = ''
             specs = [col for col in df.columns if col != 'Entry Name']
+
+            page_records.clear()
+            for _, row in df.iterrows():
+                for spec in specs:
+                    page_records[(row['Entry Name'], spec)] = row[spec]
             self._num_headers = len(specs) + 1
             
             headers = [widgets.HTML('<div style="font-weight: bold; padding: 8px;">Entry</div>')]
@@ -439,15 +635,249 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
             with table_output:
                 display(grid)
 
+        loading_label = widgets.HTML(layout=widgets.Layout(padding='5px 10px'))
+        loader = PageLoader(
+            load_table,
+            render_table,
+            on_error=self._make_page_error_handler(table_output, loading_label)
+        )
+
+        def update_table(page_num):
+            # Only the last requested page is loaded and rendered
+            loading_label.value = f'Loading page {page_num + 1}...'
+            loader.request(page_num)
+
         # Create pagination controls and wire them up
-        pagination = self._create_pagination(total_pages, current_page, update_table)
+        pagination, go_to_page = self._create_pagination(total_pages, current_page, update_table)
+        pagination.children = (*pagination.children, loading_label)
+
+        search = self._create_entry_search(
+            lambda position: go_to_page(position // PAGE_SIZE),
+            entry_order=entry_order
+        )
         
-        container = widgets.VBox([pagination, contents])
+        container = widgets.VBox([self._create_record_sort_controls(), search, pagination, contents])
         display(container)
         update_table(0)
 
+    def _create_error_table(self):
+        """Create a view clustering the error messages of a specification's failed records."""
+        processor = self.dataset_processor
+        status = processor.ds.status()
+        error_counts = {
+            spec: status.get(spec, {}).get('error', 0)
+            for spec in processor.ds.specification_names
+        }
+
+        spec_dropdown = widgets.Dropdown(
+            options=[(f'{spec} ({n} errors)', spec) for spec, n in error_counts.items()],
+            description='Specification:',
+            style={'description_width': 'initial'},
+            layout=widgets.Layout(width='350px')
+        )
+        analyze_button = widgets.Button(description='Cluster Errors', layout=widgets.Layout(width='120px'))
+        progress_label = widgets.HTML(layout=widgets.Layout(padding='5px 10px'))
+        table_output = widgets.Output()
+        details_output = widgets.Output()
+
+        def show_example(entry_name, spec_name):
+            details_output.clear_output()
+            with details_output:
+                browser = self._get_record_browser(entry_name, spec_name)
+                if browser is not None:
+                    display(browser)
+                else:
+                    display(HTML("<p>No record found.</p>"))
+
+        def make_handler(entry_name, spec_name):
+            def handler(b):
+                show_example(entry_name, spec_name)
+            return handler
+
+        def render_clusters(spec, clusters):
+            df = clusters.to_dataframe()
+            headers = ['Error Type', 'Count', 'Message', 'Examples']
+            self._num_headers = len(headers)
+            grid_items = [widgets.HTML(f'<strong>{col}</strong>') for col in headers]
+
+            for _, row in df.iterrows():
+                message = html.escape(row['Message'])
+                example = html.escape(row['Example Message'])
+                grid_items.append(widgets.HTML(html.escape(str(row['Error Type']))))
+                grid_items.append(widgets.HTML(str(row['Count'])))
+                grid_items.append(widgets.HTML(
+                    f'<pre style="white-space: pre-wrap; margin: 0;" title="{example}">{message}</pre>'
+                ))
+                example_buttons = []
+                for entry_name in row['Example Entries']:
+                    button = widgets.Button(description=entry_name, layout=widgets.Layout(width='auto'))
+                    button.on_click(make_handler(entry_name, spec))
+                    example_buttons.append(button)
+                grid_items.append(widgets.VBox(example_buttons))
+
+            table_output.clear_output()
+            with table_output:
+                display(widgets.GridBox(
+                    grid_items,
+                    layout=widgets.Layout(
+                        grid_template_columns='auto auto 1fr auto',
+                        grid_gap='0',
+                        width='100%'
+                    )
+                ))
+
+        def on_progress(clusters):
+            progress_label.value = f'{clusters.n_errors} errors in {len(clusters)} clusters...'
+
+        def analyze(b):
+            spec = spec_dropdown.value
+            if spec is None:
+                return
+            analyze_button.disabled = True
+            details_output.clear_output()
+            progress_label.value = 'Fetching errors...'
+            try:
+                clusters = processor.get_error_clusters(spec, on_progress=on_progress)
+            except Exception as e:
+                progress_label.value = f"<span style='color: #a00;'>Failed to cluster errors: {e}</span>"
+                return
+            finally:
+                analyze_button.disabled = False
+            progress_label.value = f'{clusters.n_errors} errors in {len(clusters)} clusters'
+            render_clusters(spec, clusters)
+
+        analyze_button.on_click(analyze)
+
+        display(widgets.VBox([
+            widgets.HBox([spec_dropdown, analyze_button, progress_label]),
+            table_output,
+            widgets.HTML('<hr style="margin: 20px 0;">'),
+            details_output,
+        ]))
+
+    def _create_entry_search(self, go_to_entry, entry_order=None):
+        """
+        Create a search box that jumps to the page of a matching entry.
+
+        ``go_to_entry(position)`` shows the page containing the entry at
+        ``position`` of the tab's order: the dataset order, or
+        ``entry_order`` if the tab shows a sorted subset.
+        """
+        processor = self.dataset_processor
+        search_input = widgets.Text(
+            placeholder='Find entry by name',
+            continuous_update=False,  # Only sync the value on Enter or blur
+            layout=widgets.Layout(width='250px')
+        )
+        search_button = widgets.Button(description='Find', layout=widgets.Layout(width='60px'))
+        matches_dropdown = widgets.Dropdown(
+            options=[],
+            layout=widgets.Layout(width='300px', display='none')
+        )
+        status_label = widgets.HTML(layout=widgets.Layout(padding='5px 10px'))
+        order_positions = (
+            {name: i for i, name in enumerate(entry_order)} if entry_order is not None else None
+        )
+        updating = [False]  # Set while the dropdown is filled with new matches
+
+        def in_order(position):
+            return processor.entry_names[position] in order_positions
+
+        def on_search(_):
+            # Matches outside the sorted subset don't count towards the limit
+            positions = processor.entry_index.search(
+                search_input.value, limit=50, accept=in_order if order_positions is not None else None
+            )
+            matches = []
+            for position in positions:
+                name = processor.entry_names[position]
+                if order_positions is not None:
+                    position = order_positions[name]
+                matches.append((name, position))
+
+            if not matches:
+                matches_dropdown.layout.display = 'none'
+                status_label.value = 'No matching entries'
+                return
+            status_label.value = f'{len(matches)} match{"es" if len(matches) > 1 else ""}'
+            updating[0] = True
+            try:
+                matches_dropdown.options = matches
+                matches_dropdown.value = matches[0][1]
+            finally:
+                updating[0] = False
+            matches_dropdown.layout.display = 'flex' if len(matches) > 1 else 'none'
+            go_to_entry(matches[0][1])
+
+        def on_select(change):
+            if not updating[0] and change.new is not None:
+                go_to_entry(change.new)
+
+        search_input.observe(on_search, names='value')
+        search_button.on_click(on_search)
+        matches_dropdown.observe(on_select, names='value')
+
+        return widgets.HBox([search_input, search_button, matches_dropdown, status_label])
+
+    def _make_page_error_handler(self, output, loading_label):
+        """Show a failed page load in the output instead of losing the error."""
+        def on_error(page, error):
+            loading_label.value = ''
+            output.clear_output()
+            with output:
+                display(HTML(
+                    f"<p style='color: #a00;'>Failed to load page: {error}</p>"
+                ))
+        return on_error
+
+    def _get_record_browser(self, entry_name, spec_name, page_records=None):
+        """
+        Return a (cached) record browser, or None if there is no record.
+
+        Browsers are kept in the processor's memory budget as
+        ``('record_browser', entry, spec)``, at most
+        ``RECORD_DETAIL_CACHE_SIZE`` of them. A cached browser is rebuilt
+        when the record's ID or status has changed, e.g. after the page was
+        refetched. Its size is a widget allowance, plus the record's size
+        unless the record is tracked on its own; evicting that record also
+        drops the browser, so the record can actually be freed.
+        """
+        processor = self.dataset_processor
+        record = (page_records or {}).get((entry_name, spec_name))
+        if not hasattr(record, 'status'):
+            # Not on the prefetched page (or a missing-record placeholder)
+            record = processor.ds.get_record(entry_name, spec_name)
+        if record is None:
+            return None
+
+        key = ('record_browser', entry_name, spec_name)
+        browser = processor.memory.get(key)
+        if browser is not None and _record_signature(browser.record) == _record_signature(record):
+            return browser
+        if browser is not None:
+            processor.memory.pop(key)
+            browser.close()
+
+        browser = SinglePointRecordBrowser(record, entry_name=entry_name)
+        size = RECORD_BROWSER_WIDGET_BYTES
+        if ('record', entry_name, spec_name) not in processor.memory:
+            size += approximate_size(record)
+        processor.memory.put(key, browser, size=size)
+
+        cached = [k for k in processor.memory.keys() if k[0] == 'record_browser']
+        for old_key in cached[:-RECORD_DETAIL_CACHE_SIZE]:
+            old = processor.memory.pop(old_key)
+            if old is not None:
+                old.close()
+        return browser
+
     def _create_pagination(self, total_pages, current_page, update_callback):
-        """Create pagination controls for tables."""
+        """
+        Create pagination controls for tables.
+
+        Returns the controls and a ``go_to_page(page)`` function that lets
+        callers (e.g. the entry search) jump to a page.
+        """
         prev_button = widgets.Button(
             description='Previous',
             disabled=True,
@@ -467,14 +897,18 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
             layout=widgets.Layout(padding='5px 10px')
         )
 
+        def go_to_page(new_page):
+            current_page[0] = new_page
+            page_input.value = str(new_page + 1)
+            prev_button.disabled = new_page == 0
+            next_button.disabled = new_page == total_pages - 1
+            update_callback(new_page)
+
         def on_page_submit(event):
             try:
                 new_page = int(page_input.value) - 1
                 if 0 <= new_page < total_pages:
-                    current_page[0] = new_page
-                    prev_button.disabled = new_page == 0
-                    next_button.disabled = new_page == total_pages - 1
-                    update_callback(new_page)
+                    go_to_page(new_page)
                 else:
                     page_input.value = str(current_page[0] + 1)
             except ValueError:
@@ -498,10 +932,15 @@ class SinglePointDatasetBrowser(BaseDatasetBrowser):
         next_button.on_click(on_next_clicked)
         page_input.on_submit(on_page_submit)
 
-        return widgets.HBox(
+        pagination = widgets.HBox(
             [prev_button, page_input, page_label, next_button],
             layout=widgets.Layout(justify_content='center', margin='10px 0')
         )
+        return pagination, go_to_page
+
+def _record_signature(record):
+    return record.id, getattr(record.status, 'value', record.status)
+
 
 class SinglePointRecordBrowser(BaseRecordBrowser):
     """Browser for single point calculation records."""
@@ -608,12 +1047,20 @@ class SinglePointRecordBrowser(BaseRecordBrowser):
         table_output = widgets.Output()
         details_output = widgets.Output()
 
+        array_viewers = {}  # Arrays are converted to NumPy once per property
+
         def show_detail(prop_name):
             """Display details for a property with its label"""
+            value = self.record.properties[prop_name]
             details_output.clear_output()
             with details_output:
-                display(widgets.HTML(f"<div style='font-weight: bold; margin-bottom: 10px;'>{prop_name}</div>"))
-                display(self.record.properties[prop_name])
+                if is_array_like(value):
+                    if prop_name not in array_viewers:
+                        array_viewers[prop_name] = ArrayPropertyViewer(prop_name, value)
+                    display(array_viewers[prop_name].widget())
+                else:
+                    display(widgets.HTML(f"<div style='font-weight: bold; margin-bottom: 10px;'>{prop_name}</div>"))
+                    display(value)
 
         def update_table(page_num):
             # Update pagination controls
@@ -711,11 +1158,413 @@ class SinglePointRecordBrowser(BaseRecordBrowser):
 class SinglePointDatasetProcessor(BaseDatasetProcessor):
     """Dataset processor for singlepoint datasets."""
 
-    def get_specification_df(self) -> pd.DataFrame:
-        """Return a DataFrame of specifications with protocols and properties."""
+    def __init__(self, ds, fetch_scheduler=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 conversion_timeout=None, conversion_workers=None, conversion_cache=None):
+        super().__init__(ds)
+        # All entry and record fetches go through the scheduler
+        self.fetcher = fetch_scheduler if fetch_scheduler is not None else FetchScheduler()
+        # Batches run in several threads, which share the dataset's cache
+        serialize_cache_writes(ds)
+        # Approximate bytes of fetched entries, records and converted molecules.
+        # Least-recently-used data is released once the budget is exceeded.
+        self.memory = MemoryBudget(max_bytes=memory_budget, on_evict=self._release)
+        # Per-entry conversion time budget. If set, conversions run in worker
+        # processes and entries that exceed it are recorded as failures.
+        self.conversion_timeout = conversion_timeout
+        self.conversion_workers = conversion_workers
+        self._conversion_pool = None
+        self._conversion_pool_lock = threading.Lock()
+        # Conversions in progress by key, so concurrent callers (e.g. a page
+        # load and a background job) wait instead of converting twice
+        self._conversion_lock = threading.Lock()
+        self._pending_conversions = {}
+        # Optional SharedConversionCache, keyed by molecule, shared with
+        # the processors of other datasets
+        self.conversion_cache = conversion_cache
+        self._entry_names = None
+        self._entry_index = None
+        # Memoized specification table (with the record status it was built
+        # from and when that status was last checked) and RDKit
+        # availability, see save_session
+        self._specification_df = None
+        self._specification_status = None
+        self._specification_checked = None
+        self._rdkit_available = None
+        # Scalar properties for the whole dataset, for sorting and comparisons
+        self.property_columns = PropertyColumnCache(self)
+        self._geometry_store = None
+
+    @property
+    def entry_names(self) -> list:
+        """Entry names in dataset order, cached after first access."""
+        if self._entry_names is None:
+            self._entry_names = list(self.ds.entry_names)
+        return self._entry_names
+
+    @property
+    def n_entries(self) -> int:
+        return len(self.entry_names)
+
+    @property
+    def entry_index(self) -> EntryNameIndex:
+        """Search index over the entry names, built on first use."""
+        if self._entry_index is None:
+            self._entry_index = EntryNameIndex(self.entry_names)
+        return self._entry_index
+
+    def find_entries(self, query, limit=50) -> pd.DataFrame:
+        """
+        Find entries by name: an exact match first, then prefix and substring matches.
+
+        Matching is case-insensitive. Returns the entry names with their
+        positions in the dataset.
+        """
+        positions = self.entry_index.search(query, limit=limit)
+        return pd.DataFrame({
+            'Entry Name': [self.entry_names[i] for i in positions],
+            'Position': np.asarray(positions, dtype=np.int64),
+        })
+
+    def _release(self, key, value):
+        """
+        Release evicted data: entries and records from the dataset cache,
+        lazy frame rows from their frame and record browsers' widgets.
+        """
+        if key[0] == 'lazy':
+            # The value is the row memo of the LazyEntryFrame
+            value.pop(key[2], None)
+        elif key[0] == 'record_browser':
+            value.close()
+        else:
+            release_from_dataset(self.ds, key)
+            if key[0] == 'record':
+                # A browser of the record would keep it alive
+                browser = self.memory.pop(('record_browser',) + tuple(key[1:]))
+                if browser is not None:
+                    browser.close()
+
+    def _track_entries(self, entry_names):
+        for name in entry_names:
+            key = ('entry', name)
+            if not self.memory.touch(key):
+                self.memory.track(key, approximate_size(self.ds.get_entry(name)))
+
+    def _track_records(self, record_dict, spec):
+        for name, record in record_dict.items():
+            key = ('record', name, spec)
+            if record is not None and not self.memory.touch(key):
+                self.memory.track(key, approximate_size(record))
+
+    def _shared_key(self, key, entry):
+        """Key of a conversion in the shared cache: the molecule instead of the entry name."""
+        if self.conversion_cache is None or entry is None:
+            return None
+        return (key[0], molecule_key(entry)) + tuple(key[2:])
+
+    def _cached_conversion(self, key, convert, entry=None):
+        while True:
+            with self._conversion_lock:
+                data = self.memory.get(key)
+                if data is not None:
+                    return data
+                pending = self._pending_conversions.get(key)
+                if pending is None:
+                    pending = self._pending_conversions[key] = threading.Event()
+                    break
+            # Another thread is converting this entry
+            pending.wait()
+
+        try:
+            shared_key = self._shared_key(key, entry)
+            if shared_key is not None:
+                data = self.conversion_cache.get_or_convert(shared_key, self.name, convert)
+            else:
+                data = convert()
+            self.memory.put(key, data)
+        finally:
+            with self._conversion_lock:
+                self._pending_conversions.pop(key).set()
+        return data
+
+    def _from_shared_cache(self, key, entry) -> bool:
+        """Copy a conversion from the shared cache into this processor's cache, if it is there."""
+        shared_key = self._shared_key(key, entry)
+        if shared_key is None:
+            return False
+        data = self.conversion_cache.get_conversion(shared_key, owner=self.name)
+        if data is None:
+            return False
+        self.memory.put(key, data)
+        return True
+
+    def _get_conversion_pool(self, timeout) -> ConversionPool:
+        """Return the conversion pool, creating it on first use."""
+        # Page loads and background jobs may ask for it from different threads
+        with self._conversion_pool_lock:
+            if self._conversion_pool is None:
+                self._conversion_pool = ConversionPool(timeout=timeout, max_workers=self.conversion_workers)
+            return self._conversion_pool
+
+    def _convert_in_workers(self, entry_names, get_openff, get_rdkit, rdkit_engine, timeout):
+        """
+        Convert uncached entries in worker processes.
+
+        Returns the conversions made by this call by key (``('openff', name)``
+        or ``('rdkit', name, engine)``). Callers should build their rows from
+        these rather than from the memory budget, which may already have
+        evicted them; the budget only caches them for later calls.
+        """
+        tasks = []
+        for name in entry_names:
+            entry = self.ds.get_entry(name)
+            openff_key, rdkit_key = ('openff', name), ('rdkit', name, rdkit_engine)
+            options = {
+                'get_openff': (get_openff or (get_rdkit and rdkit_engine == 'openff'))
+                              and openff_key not in self.memory
+                              and not self._from_shared_cache(openff_key, entry),
+                'get_rdkit': get_rdkit and rdkit_key not in self.memory
+                             and not self._from_shared_cache(rdkit_key, entry),
+                'rdkit_engine': rdkit_engine,
+            }
+            if options['get_openff'] or options['get_rdkit']:
+                tasks.append((name, entry, options))
+        if not tasks:
+            return {}
+
+        results = self._get_conversion_pool(timeout).convert(tasks, timeout=timeout)
+        conversions = {}
+
+        for name, entry, options in tasks:
+            data = results[name]
+            for requested, key, columns in (
+                (options['get_openff'], ('openff', name), ('OpenFFMol', 'OpenFFMol_Error')),
+                (options['get_rdkit'], ('rdkit', name, rdkit_engine), ('RDKit Molecule', 'RDKit_Error')),
+            ):
+                if not requested:
+                    continue
+                converted = conversions[key] = {k: data[k] for k in columns if k in data}
+                self.memory.put(key, converted)
+                shared_key = self._shared_key(key, entry)
+                if shared_key is not None:
+                    self.conversion_cache.put_conversion(shared_key, converted, owner=self.name)
+        return conversions
+
+    def _convert_entry(self, name, entry, get_openff, get_rdkit, rdkit_engine='openff', converted=None):
+        """
+        Return molecule conversions for an entry, reusing cached ones.
+
+        ``converted`` holds conversions already made for this call (see
+        `_convert_in_workers`) and takes precedence over the cache.
+        """
+        converted = converted or {}
+
+        def lookup(key, convert):
+            if key in converted:
+                return converted[key]
+            return self._cached_conversion(key, convert, entry)
+
+        data = {}
+        if get_openff or (get_rdkit and rdkit_engine == 'openff'):
+            data.update(lookup(
+                ('openff', name),
+                lambda: gather_molecular_data(entry, get_openff=True, include_error=True),
+            ))
+
+        if get_rdkit and rdkit_engine == 'openff':
+            def convert():
+                # Reuse the (cached) OpenFF molecule instead of converting again
+                openff_mol = data['OpenFFMol']
+                if openff_mol is None:
+                    return {'RDKit Molecule': None, 'RDKit_Error': data.get('OpenFFMol_Error')}
+                try:
+                    return {'RDKit Molecule': openff_mol.to_rdkit()}
+                except Exception as e:
+                    return {'RDKit Molecule': None, 'RDKit_Error': str(e)}
+        elif get_rdkit:
+            def convert():
+                return gather_molecular_data(
+                    entry,
+                    get_openff=False,
+                    get_rdkit=True,
+                    include_error=True,
+                    rdkit_engine=rdkit_engine
+                )
+
+        if get_rdkit:
+            data.update(lookup(('rdkit', name, rdkit_engine), convert))
+        return data
+
+    def memory_usage(self) -> dict:
+        """Report approximate memory held by fetched and converted data."""
+        return self.memory.usage()
+
+    def save_session(self, path):
+        """
+        Save the memoized state to a session file for a warm start in a new kernel.
+
+        Saves the entry names, specification table, RDKit availability,
+        the entries currently held and the converted molecules.
+        """
+        save_session(self, path)
+
+    def load_session(self, path) -> bool:
+        """
+        Restore state saved with `save_session`.
+
+        The session is only restored if it was saved for this dataset and
+        the record status hasn't changed since; otherwise a warning is
+        issued and False is returned.
+
+        .. warning::
+            Session files are pickles, and loading one can run arbitrary
+            code. Only load session files you created yourself or otherwise
+            trust.
+        """
+        return load_session(self, path)
+
+    def get_property_column(self, specification, property_name, reference=None, absolute=False) -> np.ndarray:
+        """
+        Return a scalar property for every entry as a float array in dataset order.
+
+        Missing values are NaN. With ``reference``, the reference
+        specification's values are subtracted; ``absolute`` takes the
+        absolute value of the result.
+        """
+        values = self.property_columns.get(specification, property_name)
+        if reference is not None:
+            values = values - self.property_columns.get(reference, property_name)
+        if absolute:
+            values = np.abs(values)
+        return values
+
+    def sort_entries(self, specification, property_name, ascending=True, k=None,
+                     reference=None, absolute=False) -> list:
+        """
+        Return entry names sorted by a scalar property over the whole dataset.
+
+        Entries without a value are left out. With ``k``, only the first ``k``
+        entries are selected (top-k), without sorting the rest.
+        """
+        values = self.get_property_column(specification, property_name, reference, absolute)
+        names = self.entry_names
+        return [names[i] for i in order_by_values(values, ascending=ascending, k=k)]
+
+    def top_k(self, specification, property_name, k=50, largest=True,
+              reference=None, absolute=False) -> pd.DataFrame:
+        """
+        Return the ``k`` entries with the largest (or smallest) property values.
+
+        For example, the 50 entries with the largest energy difference
+        between two specifications::
+
+            processor.top_k("spec-a", "return_energy", k=50, reference="spec-b", absolute=True)
+        """
+        values = self.get_property_column(specification, property_name, reference, absolute)
+        positions = order_by_values(values, ascending=not largest, k=k)
+        return pd.DataFrame({
+            'Entry Name': [self.entry_names[i] for i in positions],
+            property_name: values[positions],
+        })
+
+    def compare_specifications(self, reference, targets=None, property_name='return_energy',
+                               scale=1.0) -> SpecificationComparison:
+        """
+        Compare a scalar property of specifications against a reference specification.
+
+        ``targets`` defaults to every other specification. The result gives
+        MAE/RMSE/max error per target (``.statistics``), per-entry deltas
+        (``.deltas``) and histograms (``.distribution``), and can be
+        updated incrementally with ``.update()`` as more records complete.
+        """
+        if targets is None:
+            targets = [spec for spec in self.ds.specification_names if spec != reference]
+        return SpecificationComparison(self, reference, targets, property_name, scale=scale)
+
+    def has_rdkit_molecules(self, sample_size=100) -> bool:
+        """Whether any of the first ``sample_size`` entries converts to RDKit. Checked once."""
+        if self._rdkit_available is None:
+            sample_df = self.get_entry_df(stop=sample_size, get_rdkit=True)
+            self._rdkit_available = bool(sample_df["RDKit Molecule"].notna().any())
+        return self._rdkit_available
+
+    def get_geometry_store(self, path=None, refresh=False) -> GeometryStore:
+        """
+        Return the geometries of all entries as a :class:`GeometryStore`.
+
+        The store is built from batched entry fetches on first use and kept
+        for later calls. With ``path``, a store saved there is memory-mapped
+        instead, or the built store is saved there if none exists yet. A
+        saved store that doesn't match the dataset's entries is rebuilt and
+        overwritten, with a warning.
+        """
+        if self._geometry_store is None or refresh:
+            store = None
+            if path is not None and os.path.exists(path) and not refresh:
+                store = GeometryStore.load(path)
+                if not store.matches(self):
+                    warnings.warn(f"Geometry store {path} does not match the dataset's entries; rebuilding it")
+                    store = None
+            if store is None:
+                store = GeometryStore.from_processor(self)
+                if path is not None:
+                    store.save(path)
+            self._geometry_store = store
+        return self._geometry_store
+
+    def get_error_clusters(self, specification, batch_size=500, max_clusters=200,
+                           max_examples=5, on_progress=None) -> ErrorClusters:
+        """
+        Cluster the error messages of a specification's failed records.
+
+        Error records are streamed in batches and released as they are
+        processed, so memory stays bounded by the number of clusters.
+        Messages are grouped after normalizing numbers, paths and addresses;
+        ``.to_dataframe()`` of the result gives counts and example entries,
+        largest cluster first.
+        """
+        return aggregate_errors(
+            self, specification,
+            batch_size=batch_size,
+            max_clusters=max_clusters,
+            max_examples=max_examples,
+            on_progress=on_progress,
+        )
+
+    def get_specification_df(self, compact=False, refresh=False) -> pd.DataFrame:
+        """
+        Return a DataFrame of specifications with protocols and properties.
+
+        The record status is fetched from the server at most once every
+        `SPECIFICATION_STATUS_TTL` seconds (a session load counts as a
+        check), and the table is rebuilt when the status has changed since
+        it was built. ``refresh=True`` checks the status and rebuilds the
+        table now. ``compact`` selects memory-efficient dtypes (see
+        `get_entry_df`).
+        """
+        now = time.monotonic()
+        expired = (
+            self._specification_checked is None
+            or now - self._specification_checked >= SPECIFICATION_STATUS_TTL
+        )
+        if self._specification_df is None or refresh or expired:
+            status = self.ds.status()
+            self._specification_checked = now
+            if self._specification_df is None or refresh or status != self._specification_status:
+                self._specification_df = self._build_specification_df(status)
+                self._specification_status = status
+        df = self._specification_df.copy()
+        if compact:
+            compact_dataframe(
+                df,
+                strings=["Specification Name"],
+                categories=["Program", "Method", "Basis"],
+                integers=["Num Complete", "Num Error", "Num Invalid"],
+            )
+        return df
+
+    def _build_specification_df(self, status) -> pd.DataFrame:
         specs_table = []
         specifications = deepcopy(self.ds.specifications)
-        status = self.ds.status()
 
         for v in specifications.values():
             protocols = {
@@ -756,46 +1605,120 @@ class SinglePointDatasetProcessor(BaseDatasetProcessor):
                     store_entry=False, 
                     get_openff=False, 
                     get_rdkit=False,
-                    include_error=False) -> pd.DataFrame:
+                    include_error=False,
+                    rdkit_engine='openff',
+                    conversion_timeout=None,
+                    lazy=False,
+                    compact=False) -> pd.DataFrame:
         """
         Return a DataFrame of entries with optional molecule processing.
+
+        ``rdkit_engine`` selects how RDKit molecules are built: ``"openff"``
+        converts through the OpenFF toolkit, ``"rdkit"`` builds them directly
+        from QCSchema and skips OpenFF perception.
+
+        ``conversion_timeout`` (default: the processor's) limits the seconds
+        spent converting each entry. Conversions then run in worker processes,
+        and entries that time out get None with the reason in the error columns.
+
+        With ``lazy=True``, nothing is fetched or converted up front. A
+        `LazyEntryFrame` is returned instead, whose OpenFF, RDKit and SMILES
+        columns are computed (and memoized) only for the rows that are
+        accessed; ``get_openff``/``get_rdkit`` are not needed.
+
+        ``compact=True`` selects memory-efficient dtypes: Arrow-backed
+        strings (if pyarrow is installed), categoricals for repeated values
+        and ``Int32`` counts. Property values keep their dtypes.
         """
-        entry_names = self.ds.entry_names[start:stop]
+        if rdkit_engine not in RDKIT_ENGINES:
+            raise ValueError(f"rdkit_engine must be one of {RDKIT_ENGINES}, not {rdkit_engine!r}")
+        if conversion_timeout is None:
+            conversion_timeout = self.conversion_timeout
+
+        entry_names = self.entry_names[start:stop]
+
+        if lazy:
+            return LazyEntryFrame(
+                self, entry_names,
+                store_entry=store_entry,
+                include_error=include_error,
+                rdkit_engine=rdkit_engine,
+                conversion_timeout=conversion_timeout,
+            )
         
-        self.ds.fetch_entries(entry_names)
+        self.fetcher.fetch_entries(self.ds, entry_names)
+
+        converted = {}
+        if conversion_timeout is not None and (get_openff or get_rdkit):
+            converted = self._convert_in_workers(
+                entry_names, get_openff, get_rdkit, rdkit_engine, conversion_timeout
+            )
         
         def process_entry(name):
             entry = self.ds.get_entry(name)
-            return gather_molecular_data(
-                entry,
-                store_entry=store_entry,
-                get_openff=get_openff,
-                get_rdkit=get_rdkit,
-                include_error=include_error
+            data = {}
+            if store_entry:
+                data['Entry'] = entry
+            if not (get_openff or get_rdkit):
+                return data
+
+            conversion = self._convert_entry(
+                name, entry, get_openff, get_rdkit, rdkit_engine, converted
             )
+            for column, error_column, requested in (
+                ('OpenFFMol', 'OpenFFMol_Error', get_openff),
+                ('RDKit Molecule', 'RDKit_Error', get_rdkit),
+            ):
+                if requested:
+                    data[column] = conversion[column]
+                    if include_error and error_column in conversion:
+                        data[error_column] = conversion[error_column]
+            return data
         
         # Process entries sequentially but with pre-fetched data
         entries_data = [process_entry(name) for name in entry_names]
+        self._track_entries(entry_names)
         
         df = pd.DataFrame({'Entry Name': entry_names})
         molecular_data = pd.DataFrame(entries_data)
         
-        return pd.concat([df, molecular_data], axis=1)
+        df = pd.concat([df, molecular_data], axis=1)
+        if compact:
+            compact_dataframe(
+                df,
+                strings=['Entry Name'],
+                categories=['OpenFFMol_Error', 'RDKit_Error'],
+            )
+        return df
     
-    def get_record_df(self, start=None, stop=None, **kwargs) -> pd.DataFrame:
+    def get_record_df(self, start=None, stop=None, include=None, entry_names=None, compact=False,
+                      **kwargs) -> pd.DataFrame:
         """
         Return a DataFrame of records with specifications.
+
+        Records for all specifications are fetched in one batch. ``include``
+        is passed to the fetch, e.g. ``["molecule"]`` to prefetch molecules.
+        ``entry_names`` gives an entry order (e.g. from `sort_entries`) to
+        slice instead of the dataset order. ``compact`` selects
+        memory-efficient dtypes (see `get_entry_df`).
         """
         specifications = self.ds.specification_names
-        entries = list(self.ds.entry_names)[slice(start, stop)]
+        if entry_names is None:
+            entry_names = self.entry_names
+        elif not isinstance(entry_names, list):
+            entry_names = list(entry_names)
+        # Slicing copies only the requested page of names
+        entries = entry_names[start:stop]
         
         # Initialize empty DataFrame with entries as index
         df = pd.DataFrame(index=pd.Index(entries, name='Entry Name'), columns=specifications)
         
-        # Pre-fetch and fill records by specification
+        # Pre-fetch records for every specification at once
+        fetch_kwargs = {'include': include} if include is not None else {}
+        self.fetcher.fetch_records(self.ds, entries, specifications, **fetch_kwargs)
+
+        # Fill records by specification
         for spec in specifications:
-            self.ds.fetch_records(specification_names=spec, entry_names=entries)
-            
             # Create dictionary mapping entries to their records to ensure alignment
             record_dict = {
                 entry: self.ds.get_record(entry, spec) 
@@ -804,7 +1727,48 @@ class SinglePointDatasetProcessor(BaseDatasetProcessor):
             
             # Fill column using the mapping
             df[spec] = df.index.map(record_dict)
-        
-        return df.reset_index()
+            self._track_records(record_dict, spec)
+
+        df = df.reset_index()
+        if compact:
+            compact_dataframe(df, strings=['Entry Name'])
+        return df
+
+    def get_record_property_df(self, start=None, stop=None, properties=None, compact=False) -> pd.DataFrame:
+        """
+        Return a long DataFrame with one row per (entry, specification) record.
+
+        Scalar properties are expanded into columns. If ``properties`` is
+        given, only those properties are kept. ``compact`` selects
+        memory-efficient dtypes (see `get_entry_df`).
+        """
+        record_df = self.get_record_df(start=start, stop=stop, compact=False)
+        specs = [col for col in record_df.columns if col != 'Entry Name']
+
+        rows = []
+        for _, row in record_df.iterrows():
+            for spec in specs:
+                record = row[spec]
+                if record is None or not hasattr(record, 'status'):
+                    continue
+
+                row_data = {
+                    'Entry Name': row['Entry Name'],
+                    'Specification': spec,
+                    'Record ID': record.id,
+                    'Status': getattr(record.status, 'value', record.status),
+                }
+                for name, value in (record.properties or {}).items():
+                    if properties is not None and name not in properties:
+                        continue
+                    if isinstance(value, (int, float, str, bool)) or value is None:
+                        row_data[name] = value
+                rows.append(row_data)
+
+        df = pd.DataFrame(rows, columns=None if rows else ['Entry Name', 'Specification', 'Record ID', 'Status'])
+        if compact:
+            # Property columns are left as they are
+            compact_dataframe(df, strings=['Entry Name'], categories=['Specification', 'Status'])
+        return df
             
         
\ No newline at end of file
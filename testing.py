@@ -0,0 +1,308 @@
+"""
+Local stand-in for a QCPortal singlepoint dataset.
+
+``FakeSinglePointDataset`` implements the parts of the dataset API the
+processors use, without a server. It can inject latency and transient
+faults into fetches, which makes it useful for exercising the fetch
+scheduler, the browsers and benchmarks offline.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# (symbols, geometry in angstrom, connectivity)
+_TEMPLATES = {
+    "water": (
+        ["O", "H", "H"],
+        [[0.0, 0.0, 0.117], [0.0, 0.757, -0.467], [0.0, -0.757, -0.467]],
+        [(0, 1, 1.0), (0, 2, 1.0)],
+    ),
+    "ammonia": (
+        ["N", "H", "H", "H"],
+        [[0.0, 0.0, 0.113], [0.0, 0.939, -0.264], [0.813, -0.470, -0.264], [-0.813, -0.470, -0.264]],
+        [(0, 1, 1.0), (0, 2, 1.0), (0, 3, 1.0)],
+    ),
+    "methane": (
+        ["C", "H", "H", "H", "H"],
+        [[0.0, 0.0, 0.0], [0.629, 0.629, 0.629], [-0.629, -0.629, 0.629],
+         [-0.629, 0.629, -0.629], [0.629, -0.629, -0.629]],
+        [(0, 1, 1.0), (0, 2, 1.0), (0, 3, 1.0), (0, 4, 1.0)],
+    ),
+    "methanol": (
+        ["C", "O", "H", "H", "H", "H"],
+        [[-0.047, 0.665, 0.0], [-0.047, -0.758, 0.0], [-1.086, 0.969, 0.0],
+         [0.434, 1.081, 0.890], [0.434, 1.081, -0.890], [0.872, -1.040, 0.0]],
+        [(0, 1, 1.0), (0, 2, 1.0), (0, 3, 1.0), (0, 4, 1.0), (1, 5, 1.0)],
+    ),
+}
+
+# (error type, message template) for failed records
+_ERROR_TEMPLATES = [
+    ("convergence_error", "SCF did not converge in {n} iterations"),
+    ("convergence_error", "Could not converge geometry: max force {x:.4f} exceeds threshold"),
+    ("unknown_error", "Traceback (most recent call last):\n"
+                      "  File \"/opt/conda/lib/python3.10/site-packages/psi4/driver/driver.py\", line {n}, in energy\n"
+                      "psi4.driver.p4util.exceptions.ValidationError: Process {pid} ran out of memory"),
+]
+
+_ATOMIC_NUMBERS = {"H": 1, "C": 6, "N": 7, "O": 8}
+ANGSTROM_TO_BOHR = 1.8897261246257702
+
+
+class FakeFetchError(ConnectionError):
+    """Transient fault injected by the fake dataset."""
+
+
+class FakeMolecule(SimpleNamespace):
+    """Minimal QCElemental-like molecule."""
+
+    def get_hash(self):
+        h = hashlib.sha1()
+        h.update(" ".join(self.symbols).encode())
+        h.update(np.round(self.geometry, 6).tobytes())
+        h.update(str(self.molecular_charge).encode())
+        return h.hexdigest()
+
+
+def make_molecule(template, seed=0, noise=0.02):
+    """Create a fake molecule from a template, with slightly perturbed geometry."""
+    symbols, geometry, connectivity = _TEMPLATES[template]
+    rng = np.random.default_rng(seed)
+    geometry = np.asarray(geometry, dtype=float) * ANGSTROM_TO_BOHR
+    geometry = geometry + rng.normal(scale=noise, size=geometry.shape)
+    return FakeMolecule(
+        symbols=list(symbols),
+        geometry=geometry,
+        connectivity=list(connectivity),
+        molecular_charge=0.0,
+        molecular_multiplicity=1,
+        atomic_numbers=np.array([_ATOMIC_NUMBERS[s] for s in symbols]),
+    )
+
+
+class _FakeDatasetCache:
+    """Mirrors the update and deletion API of QCPortal's dataset cache."""
+
+    def __init__(self):
+        self.entries = {}
+        self.records = {}
+
+    def update_entries(self, entries):
+        for entry in entries:
+            self.entries[entry.name] = entry
+
+    def delete_entry(self, name):
+        self.entries.pop(name, None)
+
+    def delete_dataset_record(self, entry_name, specification_name):
+        self.records.pop((entry_name, specification_name), None)
+
+
+class FakeSinglePointDataset:
+    """
+    In-memory singlepoint dataset with optional latency and fault injection.
+
+    Parameters
+    ----------
+    n_entries : int, default=100
+        Number of entries.
+    specifications : list of str, optional
+        Specification names. Defaults to two specifications.
+    latency : float, default=0.0
+        Seconds slept on every fetch call.
+    per_item_latency : float, default=0.0
+        Additional seconds slept per entry in a fetch call.
+    failure_rate : float, default=0.0
+        Probability that a fetch call raises :class:`FakeFetchError`.
+    error_rate : float, default=0.05
+        Fraction of records with status ``error``.
+    seed : int, default=0
+        Seed for generated data and injected faults.
+    """
+
+    def __init__(
+        self,
+        n_entries=100,
+        specifications=None,
+        latency=0.0,
+        per_item_latency=0.0,
+        failure_rate=0.0,
+        error_rate=0.05,
+        name="Fake singlepoint dataset",
+        seed=0,
+    ):
+        self.id = seed
+        self.name = name
+        self.description = f"Local stand-in dataset with {n_entries} entries"
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.failure_rate = failure_rate
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {"fetch_entries": 0, "fetch_records": 0, "failures": 0}
+
+        spec_names = specifications or ["b3lyp/def2-svp", "hf/sto-3g"]
+        self.specifications = {
+            spec: SimpleNamespace(
+                name=spec,
+                specification=SimpleNamespace(
+                    program="psi4",
+                    method=spec.split("/")[0],
+                    basis=spec.split("/")[-1],
+                    protocols=SimpleNamespace(dict=lambda: {"wavefunction": "none"}),
+                ),
+            )
+            for spec in spec_names
+        }
+
+        templates = sorted(_TEMPLATES)
+        self._entries = {}
+        self._records = {}
+        for i in range(n_entries):
+            entry_name = f"entry-{i:06d}"
+            template = templates[i % len(templates)]
+            molecule = make_molecule(template, seed=seed * 100003 + i)
+            self._entries[entry_name] = SimpleNamespace(
+                name=entry_name,
+                molecule=molecule,
+                attributes={},
+                comment=template,
+            )
+            for j, spec in enumerate(spec_names):
+                failed = self._rng.random() < error_rate
+                energy = -40.0 * len(molecule.symbols) + 0.01 * j + self._rng.gauss(0, 0.05)
+                self._records[(entry_name, spec)] = SimpleNamespace(
+                    id=i * len(spec_names) + j + 1,
+                    status=SimpleNamespace(value="error" if failed else "complete"),
+                    molecule=molecule,
+                    specification=self.specifications[spec].specification,
+                    provenance=SimpleNamespace(creator="psi4", version="1.9"),
+                    properties={} if failed else {
+                        "return_energy": energy,
+                        "scf_total_energy": energy,
+                        "scf_iterations": self._rng.randint(5, 30),
+                        "return_gradient": np.zeros((len(molecule.symbols), 3)).tolist(),
+                    },
+                    error=self._make_error() if failed else None,
+                )
+
+        self._cache_data = _FakeDatasetCache()
+
+    def _make_error(self):
+        error_type, template = self._rng.choice(_ERROR_TEMPLATES)
+        return {
+            "error_type": error_type,
+            "error_message": template.format(
+                n=self._rng.randint(50, 200),
+                x=self._rng.uniform(0.1, 2.0),
+                pid=self._rng.randint(1000, 99999),
+            ),
+        }
+
+    @property
+    def entry_names(self):
+        return list(self._entries)
+
+    @property
+    def specification_names(self):
+        return list(self.specifications)
+
+    @property
+    def computed_properties(self):
+        return {
+            spec: ["return_energy", "scf_total_energy", "scf_iterations", "return_gradient"]
+            for spec in self.specifications
+        }
+
+    def status(self):
+        counts = {}
+        for (_, spec), record in self._records.items():
+            spec_counts = counts.setdefault(spec, {})
+            spec_counts[record.status.value] = spec_counts.get(record.status.value, 0) + 1
+        return counts
+
+    def _simulate_call(self, kind, n_items):
+        with self._lock:
+            self.calls[kind] += 1
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(self.latency + self.per_item_latency * n_items)
+        if fail:
+            with self._lock:
+                self.calls["failures"] += 1
+            raise FakeFetchError(f"Injected fault in {kind}")
+
+    def fetch_entries(self, entry_names=None, force_refetch=False):
+        if isinstance(entry_names, str):
+            entry_names = [entry_names]
+        entry_names = self.entry_names if entry_names is None else list(entry_names)
+        if not force_refetch:
+            # Like QCPortal, only entries that aren't cached yet are requested
+            entry_names = [name for name in entry_names if name not in self._cache_data.entries]
+            if not entry_names:
+                return
+        self._simulate_call("fetch_entries", len(entry_names))
+        self._cache_data.update_entries(
+            self._entries[name] for name in entry_names if name in self._entries
+        )
+
+    def fetch_records(self, entry_names=None, specification_names=None, status=None,
+                      include=None, fetch_updated=True, force_refetch=False):
+        if isinstance(entry_names, str):
+            entry_names = [entry_names]
+        if isinstance(specification_names, str):
+            specification_names = [specification_names]
+        entry_names = self.entry_names if entry_names is None else list(entry_names)
+        specification_names = specification_names or self.specification_names
+        self._simulate_call("fetch_records", len(entry_names) * len(specification_names))
+        for name in entry_names:
+            for spec in specification_names:
+                record = self._records.get((name, spec))
+                if record is not None and (status is None or record.status.value == status):
+                    self._cache_data.records[(name, spec)] = record
+
+    def iterate_records(self, entry_names=None, specification_names=None, status=None,
+                        include=None, fetch_updated=True, force_refetch=False):
+        if isinstance(entry_names, str):
+            entry_names = [entry_names]
+        if isinstance(specification_names, str):
+            specification_names = [specification_names]
+        entry_names = self.entry_names if entry_names is None else list(entry_names)
+        specification_names = specification_names or self.specification_names
+        self.fetch_records(entry_names=entry_names, specification_names=specification_names, status=status)
+        for name in entry_names:
+            for spec in specification_names:
+                record = self._cache_data.records.get((name, spec))
+                if record is not None and (status is None or record.status.value == status):
+                    yield name, spec, record
+
+    def get_entry(self, entry_name, force_refetch=False):
+        if entry_name not in self._cache_data.entries:
+            self.fetch_entries([entry_name])
+        return self._cache_data.entries.get(entry_name)
+
+    def get_record(self, entry_name, specification_name, include=None, force_refetch=False):
+        if (entry_name, specification_name) not in self._cache_data.records:
+            self.fetch_records([entry_name], [specification_name])
+        return self._cache_data.records.get((entry_name, specification_name))
+
+    def get_properties_df(self, properties_list, entry_names=None, specification_names=None):
+        import pandas as pd
+
+        # Like QCPortal: complete records only, and columns without values dropped
+        data = {}
+        for name, spec, record in self.iterate_records(
+            entry_names, specification_names, status="complete"
+        ):
+            for prop in properties_list:
+                data.setdefault((spec, prop), {})[name] = record.properties.get(prop)
+        df = pd.DataFrame(data)
+        df.index.name = "entry"
+        if data:
+            df.columns = pd.MultiIndex.from_tuples(df.columns)
+        return df.dropna(how="all", axis=1)
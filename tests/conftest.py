@@ -0,0 +1,9 @@
+import pytest
+
+from testing import FakeSinglePointDataset
+
+
+@pytest.fixture
+def fake_dataset():
+    """Small fake dataset without latency or faults."""
+    return FakeSinglePointDataset(n_entries=40)
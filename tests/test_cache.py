@@ -0,0 +1,143 @@
+import threading
+
+import numpy as np
+import pytest
+
+from cache import (
+    LRUCache,
+    MemoryBudget,
+    SharedConversionCache,
+    approximate_size,
+    release_from_dataset,
+)
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    evicted = []
+    cache = LRUCache(max_bytes=30, on_evict=lambda key, value: evicted.append(key))
+    for key in "abc":
+        cache.put(key, key.upper(), size=10)
+    cache.get("a")
+    cache.put("d", "D", size=10)
+
+    assert evicted == ["b"]
+    assert cache.keys() == ["c", "a", "d"]
+    assert cache.current_bytes == 30
+    assert cache.evictions == 1
+
+
+def test_lru_evicts_by_item_count():
+    cache = LRUCache(max_items=2)
+    for key in "abc":
+        cache.put(key, key)
+    assert cache.keys() == ["b", "c"]
+
+
+def test_lru_keeps_newest_value_even_if_oversized():
+    cache = LRUCache(max_bytes=10)
+    cache.put("a", None, size=5)
+    cache.put("b", None, size=50)
+    assert cache.keys() == ["b"]
+    assert cache.current_bytes == 50
+
+
+def test_lru_replace_pop_and_touch():
+    evicted = []
+    cache = LRUCache(max_bytes=100, on_evict=lambda key, value: evicted.append(key))
+    cache.put("a", 1, size=10)
+    cache.put("a", 2, size=20)
+    assert cache.current_bytes == 20 and cache.get("a") == 2
+
+    cache.put("b", 3, size=10)
+    assert cache.touch("a") and not cache.touch("missing")
+    assert cache.keys() == ["b", "a"]
+
+    assert cache.pop("a") == 2
+    assert cache.current_bytes == 10
+    assert evicted == []  # pop doesn't notify
+
+    cache.clear()
+    assert evicted == ["b"] and cache.current_bytes == 0
+
+
+def test_approximate_size():
+    array = np.zeros(1000)
+    assert array.nbytes <= approximate_size(array) < array.nbytes + 200
+    assert array.nbytes <= approximate_size(array[::2]) * 2 < 2 * array.nbytes
+    # Shared objects are counted once
+    assert approximate_size({"a": array, "b": array}) < 2 * array.nbytes
+    assert approximate_size(None) == 0
+
+
+def test_memory_budget_usage_by_kind():
+    released = []
+    budget = MemoryBudget(max_bytes=250, on_evict=lambda key, value: released.append(key))
+    budget.track(("entry", "a"), 100)
+    budget.track(("record", "a", "spec"), 100)
+    budget.put(("openff", "a"), "molecule", size=40)
+
+    usage = budget.usage()
+    assert usage["bytes"] == 240
+    assert usage["by_kind"]["entry"] == {"items": 1, "bytes": 100}
+    assert usage["by_kind"]["openff"]["items"] == 1
+
+    budget.track(("entry", "b"), 100)
+    assert released == [("entry", "a")]
+    assert budget.usage()["evictions"] == 1
+
+
+def test_release_from_dataset(fake_dataset):
+    name = fake_dataset.entry_names[0]
+    spec = fake_dataset.specification_names[0]
+    fake_dataset.get_entry(name)
+    fake_dataset.get_record(name, spec)
+
+    release_from_dataset(fake_dataset, ("entry", name))
+    release_from_dataset(fake_dataset, ("record", name, spec))
+    release_from_dataset(fake_dataset, ("openff", name))  # not held by the dataset
+    assert name not in fake_dataset._cache_data.entries
+    assert (name, spec) not in fake_dataset._cache_data.records
+
+
+def test_processor_stays_within_memory_budget(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    entry_size = approximate_size(fake_dataset._entries[fake_dataset.entry_names[0]])
+    processor = SinglePointDatasetProcessor(fake_dataset, memory_budget=10 * entry_size)
+
+    for start in range(0, 40, 10):
+        processor.get_entry_df(start=start, stop=start + 10)
+
+    usage = processor.memory_usage()
+    assert usage["bytes"] <= usage["max_bytes"]
+    assert usage["evictions"] > 0
+    # Evicted entries are released from the dataset's cache as well
+    held = {key[1] for key in processor.memory.keys() if key[0] == "entry"}
+    assert set(fake_dataset._cache_data.entries) == held
+    assert fake_dataset.entry_names[-1] in held
+
+
+def test_shared_cache_converts_each_key_once_across_threads():
+    cache = SharedConversionCache()
+    calls = []
+    start = threading.Barrier(4)
+
+    def convert():
+        calls.append(1)
+        return {"OpenFFMol": "molecule"}
+
+    def worker(owner):
+        start.wait()
+        return cache.get_or_convert(("openff", "key"), owner, convert)
+
+    threads = [threading.Thread(target=worker, args=(f"ds{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    savings = cache.savings()
+    assert savings["conversions"] == 1
+    assert savings["reused"] == 3
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from comparison import error_statistics
+
+
+def test_error_statistics_ignore_missing_values():
+    deltas = np.array([
+        [1.0, -1.0, 3.0, np.nan],
+        [np.nan, np.nan, np.nan, np.nan],
+    ])
+    stats = error_statistics(deltas)
+
+    assert stats["n"].tolist() == [3, 0]
+    assert stats["mae"][0] == pytest.approx(5 / 3)
+    assert stats["rmse"][0] == pytest.approx(np.sqrt(11 / 3))
+    assert stats["max_error"][0] == 3.0
+    assert stats["mean_signed_error"][0] == pytest.approx(1.0)
+    assert stats["std"][0] == pytest.approx(np.std([1.0, -1.0, 3.0]))
+    for key in ("mae", "rmse", "max_error", "mean_signed_error"):
+        assert np.isnan(stats[key][1])
+
+
+@pytest.fixture
+def processor(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    return SinglePointDatasetProcessor(fake_dataset)
+
+
+def _energies(ds, spec):
+    return np.array([
+        ds._records[(name, spec)].properties.get("return_energy", np.nan)
+        for name in ds.entry_names
+    ])
+
+
+def test_compare_specifications_matches_records(processor):
+    ds = processor.ds
+    reference, target = ds.specification_names
+    comparison = processor.compare_specifications(reference, scale=2.0)
+
+    expected = (_energies(ds, target) - _energies(ds, reference)) * 2.0
+    stats = comparison.statistics.iloc[0]
+    assert stats["Specification"] == target
+    assert stats["N"] == np.count_nonzero(~np.isnan(expected))
+    assert stats["MAE"] == pytest.approx(np.nanmean(np.abs(expected)))
+    assert stats["Max Error"] == pytest.approx(np.nanmax(np.abs(expected)))
+
+    deltas = comparison.deltas
+    assert len(deltas) == np.count_nonzero(~np.isnan(_energies(ds, reference)))
+    np.testing.assert_allclose(
+        deltas[target].to_numpy(), expected[~np.isnan(_energies(ds, reference))]
+    )
+
+    counts, edges = comparison.distribution(target, bins=5, absolute=True)
+    assert counts.sum() == stats["N"] and edges[0] >= 0
+
+
+def test_update_fetches_only_newly_completed_records(processor):
+    ds = processor.ds
+    reference, target = ds.specification_names
+    comparison = processor.compare_specifications(reference)
+    n_before = comparison.statistics["N"].iloc[0]
+
+    # Complete a record that had failed, as if it had been recomputed
+    name = next(
+        name for name in ds.entry_names
+        if ds._records[(name, target)].status.value == "error"
+        and ds._records[(name, reference)].status.value == "complete"
+    )
+    energy = ds._records[(name, reference)].properties["return_energy"] + 0.5
+    ds._records[(name, target)] = SimpleNamespace(
+        **{**vars(ds._records[(name, target)]),
+           "status": SimpleNamespace(value="complete"),
+           "properties": {"return_energy": energy},
+           "error": None}
+    )
+
+    fetched = []
+    fetch_records = ds.fetch_records
+
+    def recording_fetch_records(entry_names=None, **kwargs):
+        fetched.extend(entry_names)
+        return fetch_records(entry_names, **kwargs)
+
+    ds.fetch_records = recording_fetch_records
+    comparison.update()
+    assert comparison.statistics["N"].iloc[0] == n_before + 1
+    assert comparison.deltas.loc[name, target] == pytest.approx(0.5)
+    # Only entries that were missing a value are fetched again
+    missing = {
+        n for n in ds.entry_names for s in (reference, target)
+        if ds._records[(n, s)].status.value != "complete"
+    }
+    assert name in fetched and set(fetched) <= missing | {name}
@@ -0,0 +1,178 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openff.toolkit")
+
+import conversion
+from conversion import ConversionPool
+from singlepoint import SinglePointDatasetProcessor
+from testing import FakeSinglePointDataset
+from util import gather_molecular_data
+
+OPTIONS = {"get_openff": True, "get_rdkit": True, "rdkit_engine": "openff"}
+
+
+class SlowEntry(SimpleNamespace):
+    """Entry that takes ``delay`` seconds to arrive in a worker process."""
+
+    def __setstate__(self, state):
+        time.sleep(state["delay"])
+        self.__dict__.update(state)
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**kwargs):
+        pools.append(ConversionPool(**kwargs))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def _tasks(ds, n, prefix=""):
+    return [(prefix + name, ds.get_entry(name), OPTIONS) for name in ds.entry_names[:n]]
+
+
+def _timed_out(results):
+    return sorted(key for key, data in results.items() if "timed out" in str(data.get("OpenFFMol_Error")))
+
+
+def test_worker_start_up_does_not_count_against_timeout(make_pool):
+    ds = FakeSinglePointDataset(n_entries=8)
+    pool = make_pool(timeout=0.1, max_workers=2)
+
+    results = pool.convert(_tasks(ds, 8))
+    assert sorted(results) == ds.entry_names
+    assert _timed_out(results) == []
+    assert pool.stats["timeouts"] == 0
+
+
+def test_slow_entry_times_out_without_cascading(make_pool):
+    ds = FakeSinglePointDataset(n_entries=4)
+    pool = make_pool(timeout=0.1, max_workers=1)
+    slow = SlowEntry(name="slow", molecule=None, attributes={}, delay=30)
+
+    t0 = time.monotonic()
+    results = pool.convert([("slow", slow, OPTIONS)] + _tasks(ds, 4))
+    assert time.monotonic() - t0 < 20
+
+    # The replacement worker starts cold, but the entries after it still convert
+    assert _timed_out(results) == ["slow"]
+    assert results["slow"]["RDKit_Error"] == "Conversion timed out after 0.1s"
+    assert pool.stats["timeouts"] == 1
+
+
+def _fail_start(monkeypatch, calls):
+    """Make the start-up calls numbered in ``calls`` fail as if the worker died."""
+    receive_ready = conversion._Worker.receive_ready
+    count = []
+
+    def patched(worker):
+        count.append(worker)
+        if len(count) in calls:
+            worker.process.kill()
+            worker.process.join()
+            raise RuntimeError(f"Conversion worker failed to start (exit code {worker.process.exitcode})")
+        receive_ready(worker)
+
+    monkeypatch.setattr(conversion._Worker, "receive_ready", patched)
+
+
+def test_worker_failing_to_start_leaves_others_running(make_pool, monkeypatch):
+    ds = FakeSinglePointDataset(n_entries=6)
+    pool = make_pool(timeout=30, max_workers=2)
+    _fail_start(monkeypatch, {2})
+
+    results = pool.convert(_tasks(ds, 6))
+    assert sorted(results) == ds.entry_names[:6]
+    assert all("failed to start" not in str(data.get("OpenFFMol_Error")) for data in results.values())
+    assert pool.stats["start_failures"] == 1
+
+    # Nothing from the first call is left behind for the next one
+    assert sorted(pool.convert(_tasks(ds, 3, "b-"))) == ["b-" + name for name in ds.entry_names[:3]]
+
+
+def test_entries_fail_when_no_worker_starts(make_pool, monkeypatch):
+    ds = FakeSinglePointDataset(n_entries=4)
+    pool = make_pool(timeout=30, max_workers=2)
+    _fail_start(monkeypatch, {1, 2})
+
+    results = pool.convert(_tasks(ds, 4))
+    assert sorted(results) == ds.entry_names[:4]
+    for data in results.values():
+        assert data["OpenFFMol"] is None
+        assert data["RDKit_Error"].startswith("Conversion worker failed to start")
+
+
+def test_pool_is_shared_between_threads(make_pool):
+    ds = FakeSinglePointDataset(n_entries=6)
+    pool = make_pool(timeout=30, max_workers=2)
+    results = {}
+
+    def convert(prefix):
+        results[prefix] = pool.convert(_tasks(ds, 6, prefix))
+
+    threads = [threading.Thread(target=convert, args=(prefix,)) for prefix in ("a-", "b-", "c-")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    for prefix in ("a-", "b-", "c-"):
+        assert sorted(results[prefix]) == [prefix + name for name in ds.entry_names[:6]]
+    assert pool.stats["converted"] == 18
+
+
+def test_worker_failures_match_in_process_conversion(make_pool):
+    bad = SimpleNamespace(name="bad", molecule=None, attributes={})
+    pool = make_pool(timeout=30, max_workers=1)
+
+    in_process = gather_molecular_data(bad, include_error=True, **OPTIONS)
+    in_worker = pool.convert([("bad", bad, OPTIONS)])["bad"]
+
+    assert in_worker["OpenFFMol"] is None and in_worker["RDKit Molecule"] is None
+    assert in_worker["RDKit_Error"] == in_worker["OpenFFMol_Error"] == in_process["OpenFFMol_Error"]
+    assert in_process["RDKit_Error"] == in_process["OpenFFMol_Error"]
+
+
+def test_processor_errors_are_the_same_with_and_without_timeout():
+    ds = FakeSinglePointDataset(n_entries=8)
+    columns = ["Entry Name", "OpenFFMol_Error", "RDKit_Error"]
+
+    def errors(conversion_timeout):
+        processor = SinglePointDatasetProcessor(ds, conversion_timeout=conversion_timeout, conversion_workers=2)
+        df = processor.get_entry_df(get_openff=True, get_rdkit=True, include_error=True)
+        if processor._conversion_pool is not None:
+            processor._conversion_pool.close()
+        return df.reindex(columns=columns).fillna("")
+
+    assert errors(None).equals(errors(30))
+
+
+def test_worker_results_are_used_even_when_evicted(monkeypatch):
+    ds = FakeSinglePointDataset(n_entries=2)
+    for name, entry in ds._entries.items():
+        ds._entries[name] = SlowEntry(**vars(entry), delay=30)
+
+    def hang(*args, **kwargs):
+        raise AssertionError("converted in-process, bypassing the timeout")
+
+    monkeypatch.setattr("singlepoint.gather_molecular_data", hang)
+    processor = SinglePointDatasetProcessor(
+        ds, memory_budget=1, conversion_timeout=0.5, conversion_workers=2
+    )
+    try:
+        df = processor.get_entry_df(get_openff=True, get_rdkit=True, include_error=True)
+    finally:
+        processor._conversion_pool.close()
+
+    assert df["OpenFFMol"].isna().all()
+    assert df["OpenFFMol_Error"].str.contains("timed out").all()
+    assert df["RDKit_Error"].str.contains("timed out").all()
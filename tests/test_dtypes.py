@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from dtypes import INTEGER_DTYPE, STRING_DTYPE, compact_dataframe
+
+
+def test_integer_dtype_does_not_depend_on_values():
+    small = compact_dataframe(pd.DataFrame({"n": [1, 2, 3]}), integers=["n"])
+    large = compact_dataframe(pd.DataFrame({"n": [1, 70_000, None]}), integers=["n"])
+
+    assert small["n"].dtype == large["n"].dtype == INTEGER_DTYPE
+    assert large["n"].tolist()[:2] == [1, 70_000] and pd.isna(large["n"][2])
+    assert pd.concat([small, large])["n"].dtype == INTEGER_DTYPE
+
+
+def test_compact_dataframe_skips_missing_columns():
+    df = pd.DataFrame({"name": ["a", "b"], "kind": ["x", "x"]})
+    compact_dataframe(df, strings=["name", "absent"], categories=["kind"], integers=["absent"])
+    assert df["name"].dtype == STRING_DTYPE
+    assert df["kind"].dtype == "category"
+
+
+def test_processor_outputs_are_compact_only_on_request(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    processor = SinglePointDatasetProcessor(fake_dataset)
+    default = processor.get_record_property_df()
+    compact = processor.get_record_property_df(compact=True)
+
+    assert not isinstance(default["Specification"].dtype, pd.CategoricalDtype)
+    assert compact["Specification"].dtype == "category"
+    # IDs and property values keep their dtypes
+    for column in ("Record ID", "scf_iterations", "return_energy"):
+        assert compact[column].dtype == default[column].dtype
+    assert compact["Record ID"].dtype == "int64"
+
+    specs = processor.get_specification_df(compact=True)
+    assert specs["Num Complete"].dtype == INTEGER_DTYPE
+    assert processor.get_specification_df()["Num Complete"].dtype == "int64"
@@ -0,0 +1,61 @@
+import pytest
+
+from errors import ErrorClusters, error_signature, normalize_error_message
+
+
+@pytest.mark.parametrize("message, expected", [
+    ('File "/opt/conda/lib/python3.10/driver.py", line 12', 'File "<path>", line <num>'),
+    (r"Could not open C:\Users\me\scratch\psi.123", "Could not open <path>"),
+    ("Missing basis at /usr/share/psi4/basis/", "Missing basis at <path>"),
+    ("Basis hf/sto-3g failed for 3 atoms", "Basis hf/sto-3g failed for <num> atoms"),
+    ("Use the density and/or the gradient", "Use the density and/or the gradient"),
+    ("Process 0x7f3a at 1.5e-3", "Process <hex> at <num>"),
+])
+def test_normalize_error_message(message, expected):
+    assert normalize_error_message(message) == expected
+
+
+def test_traceback_keeps_last_lines():
+    message = "Traceback:\n  a\n  b\n  c\nValueError: bad value 3"
+    assert normalize_error_message(message, max_lines=2) == "c\nValueError: bad value <num>"
+
+
+def test_error_clusters_are_bounded():
+    clusters = ErrorClusters(max_clusters=2, max_examples=2)
+    for i in range(5):
+        clusters.add(f"a{i}", {"error_type": "convergence_error",
+                               "error_message": f"SCF did not converge in {i} iterations"})
+    clusters.add("b", {"error_type": "unknown_error", "error_message": "out of memory"})
+    clusters.add("c", {"error_type": "unknown_error", "error_message": "segfault"})
+
+    df = clusters.to_dataframe()
+    assert clusters.n_errors == 7 and len(clusters) == 3
+    assert df["Count"].tolist() == [5, 1, 1]
+    assert df["Example Entries"][0] == ["a0", "a1"]
+    assert df["Error Type"].tolist()[-1] == "other"
+    assert error_signature("x")[1] == "unknown"
+
+
+def test_error_records_are_fetched_with_their_outputs(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    processor = SinglePointDatasetProcessor(fake_dataset)
+    spec = fake_dataset.specification_names[0]
+    includes = []
+    iterate_records = fake_dataset.iterate_records
+
+    def recording_iterate_records(*args, include=None, **kwargs):
+        includes.append(include)
+        return iterate_records(*args, include=include, **kwargs)
+
+    fake_dataset.iterate_records = recording_iterate_records
+    clusters = processor.get_error_clusters(spec, batch_size=10)
+
+    n_failed = sum(
+        record.status.value == "error"
+        for (_, s), record in fake_dataset._records.items() if s == spec
+    )
+    assert clusters.n_errors == n_failed
+    assert includes and all(include == ["outputs"] for include in includes)
+    assert fake_dataset._cache_data.records == {}
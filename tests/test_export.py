@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("openff.toolkit")
+
+import export
+from testing import FakeSinglePointDataset
+
+
+@pytest.fixture
+def fake_export(monkeypatch):
+    """Run exports against a fake dataset, with threads instead of worker processes."""
+    ds = FakeSinglePointDataset(n_entries=50)
+    monkeypatch.setattr(export, "_connect", lambda *args, **kwargs: ds)
+    # Unlike worker processes, threads see the patched module
+    monkeypatch.setattr(export, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+    processed = []
+    failing = set()
+    process_shard = export.process_shard
+
+    def tracked_process_shard(shard, *args, **kwargs):
+        processed.append(shard[0])
+        if shard[0] in failing:
+            raise RuntimeError(f"shard {shard[0]} killed")
+        return process_shard(shard, *args, **kwargs)
+
+    monkeypatch.setattr(export, "process_shard", tracked_process_shard)
+    return processed, failing
+
+
+def _run(output_dir, **kwargs):
+    return export.run_export(
+        "local", 1, str(output_dir), shard_size=10, workers=1, log=lambda message: None, **kwargs
+    )
+
+
+def test_make_shards():
+    assert export.make_shards(25, 10) == [(0, 0, 10), (1, 10, 20), (2, 20, 25)]
+    assert export.make_shards(25, 10, start=5, stop=18) == [(0, 5, 15), (1, 15, 18)]
+
+
+def test_resume_skips_completed_shards(fake_export, tmp_path):
+    processed, failing = fake_export
+    failing.add(3)
+
+    checkpoint = _run(tmp_path)
+    assert sorted(checkpoint.completed) == [0, 1, 2, 4]
+
+    processed.clear()
+    failing.clear()
+    checkpoint = _run(tmp_path)
+    assert processed == [3]
+    assert sorted(checkpoint.completed) == [0, 1, 2, 3, 4]
+    for shard in range(5):
+        assert (tmp_path / f"shard-{shard:05d}.entries.csv").exists()
+        assert (tmp_path / f"shard-{shard:05d}.records.csv").exists()
+
+
+def test_resume_redoes_shards_with_missing_files(fake_export, tmp_path):
+    processed, _ = fake_export
+    _run(tmp_path)
+    (tmp_path / "shard-00001.records.csv").unlink()
+
+    processed.clear()
+    _run(tmp_path)
+    assert processed == [1]
+
+
+def test_checkpoint_of_other_job_is_rejected(fake_export, tmp_path):
+    _run(tmp_path)
+    with pytest.raises(ValueError, match="different job"):
+        _run(tmp_path, stop=30)
+
+    processed, _ = fake_export
+    processed.clear()
+    checkpoint = _run(tmp_path, stop=30, restart=True)
+    assert sorted(processed) == [0, 1, 2]
+    assert sorted(checkpoint.completed) == [0, 1, 2]
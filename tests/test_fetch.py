@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from fetch import FetchError, FetchScheduler, serialize_cache_writes, split_batches
+from testing import FakeFetchError, FakeSinglePointDataset
+
+
+class _Sleeps(list):
+    """Records the delays a scheduler would sleep for."""
+
+    def __call__(self, seconds):
+        self.append(seconds)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP status {status_code}")
+        self.status_code = status_code
+
+
+def _flaky(n_failures, error=None):
+    """Batch function that fails ``n_failures`` times, with an injected fault by default."""
+    calls = []
+
+    def fn(batch):
+        calls.append(list(batch))
+        if len(calls) <= n_failures:
+            raise error or FakeFetchError("injected")
+        return batch
+
+    return fn, calls
+
+
+def test_split_batches():
+    assert split_batches(range(5), 2) == [[0, 1], [2, 3], [4]]
+    assert split_batches([], 2) == []
+    assert split_batches(range(3), None) == [[0, 1, 2]]
+
+
+def test_retries_with_exponential_backoff():
+    sleeps = _Sleeps()
+    scheduler = FetchScheduler(max_retries=3, backoff=0.5, max_backoff=1.5, sleep=sleeps)
+    fn, calls = _flaky(3)
+
+    assert scheduler.map_batches(fn, ["a", "b"]) == [["a", "b"]]
+    assert len(calls) == 4
+    assert scheduler.stats["retries"] == 3
+    # Jittered between half and all of 0.5, 1.0 and then the 1.5 cap
+    for delay, full in zip(sleeps, [0.5, 1.0, 1.5]):
+        assert full / 2 <= delay <= full
+
+
+def test_gives_up_after_max_retries():
+    sleeps = _Sleeps()
+    scheduler = FetchScheduler(max_retries=2, sleep=sleeps)
+    fn, calls = _flaky(10)
+
+    with pytest.raises(FetchError) as info:
+        scheduler.map_batches(fn, ["a"])
+    assert info.value.attempts == 3
+    assert info.value.batch == ["a"]
+    assert isinstance(info.value.cause, FakeFetchError)
+    assert len(calls) == 3 and len(sleeps) == 2
+    assert scheduler.stats["failures"] == 1
+
+
+@pytest.mark.parametrize("error", [KeyError("name"), TypeError("bad argument"), _HTTPError(404)])
+def test_programming_and_client_errors_are_not_retried(error):
+    sleeps = _Sleeps()
+    scheduler = FetchScheduler(retry_on=FetchScheduler().retry_on + (_HTTPError,), sleep=sleeps)
+    fn, calls = _flaky(1, error=error)
+
+    with pytest.raises(type(error)):
+        scheduler.map_batches(fn, ["a"])
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_server_errors_are_retried(status_code):
+    scheduler = FetchScheduler(retry_on=(_HTTPError,), sleep=_Sleeps())
+    fn, calls = _flaky(1, error=_HTTPError(status_code))
+
+    assert scheduler.map_batches(fn, ["a"]) == [["a"]]
+    assert len(calls) == 2
+
+
+def test_fetches_fake_dataset_with_injected_faults():
+    ds = FakeSinglePointDataset(n_entries=200, failure_rate=0.3, seed=3)
+    sleeps = _Sleeps()
+    scheduler = FetchScheduler(entry_batch_size=20, max_workers=4, max_retries=10, sleep=sleeps)
+
+    scheduler.fetch_entries(ds, ds.entry_names)
+    assert set(ds._cache_data.entries) == set(ds.entry_names)
+    assert ds.calls["failures"] > 0
+    assert scheduler.stats["retries"] == ds.calls["failures"] == len(sleeps)
+    assert scheduler.stats["batches"] == 10
+
+
+def test_cache_writes_are_serialized():
+    ds = FakeSinglePointDataset(n_entries=0)
+    active, peak = [0], [0]
+    update_entries = ds._cache_data.update_entries
+
+    def slow_update_entries(entries):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        update_entries(entries)
+        active[0] -= 1
+
+    ds._cache_data.update_entries = slow_update_entries
+    serialize_cache_writes(ds)
+    serialize_cache_writes(ds)  # no effect the second time
+
+    threads = [threading.Thread(target=ds._cache_data.update_entries, args=([],)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 1
+
+
+def test_map_batches_waits_for_all_batches_on_any_error():
+    scheduler = FetchScheduler(max_workers=4, max_retries=0, sleep=lambda s: None)
+    finished = []
+
+    def fn(batch):
+        if batch[0] == 0:
+            raise KeyError("bad batch")
+        time.sleep(0.05)
+        finished.append(batch[0])
+
+    with pytest.raises(KeyError):
+        scheduler.map_batches(fn, list(range(8)), batch_size=2)
+    assert sorted(finished) == [2, 4, 6]
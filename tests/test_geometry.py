@@ -0,0 +1,82 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from testing import FakeSinglePointDataset
+
+pytest.importorskip("openff.toolkit")
+
+from geometry import GeometryStore, kabsch_rmsd  # noqa: E402
+from singlepoint import SinglePointDatasetProcessor  # noqa: E402
+
+
+def test_kabsch_rmsd_ignores_rotation_and_translation():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(6, 3))
+    angle = 0.7
+    rotation = np.array([[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0], [0, 0, 1]])
+    assert kabsch_rmsd(a, a @ rotation.T + 3.0) == pytest.approx(0.0, abs=1e-10)
+    moved = a.copy()
+    moved[0] += [0.5, 0.0, 0.0]
+    assert kabsch_rmsd(a, moved) > 0
+
+
+@pytest.fixture
+def processor(fake_dataset):
+    return SinglePointDatasetProcessor(fake_dataset)
+
+
+def test_store_matches_entries(processor):
+    store = processor.get_geometry_store()
+    ds = processor.ds
+
+    assert store.names == ds.entry_names
+    name = ds.entry_names[5]
+    z, xyz = store.get(name)
+    assert z.tolist() == ds._entries[name].molecule.atomic_numbers.tolist()
+    np.testing.assert_allclose(xyz, ds._entries[name].molecule.geometry * 0.529177210903)
+
+    # The fake dataset cycles through four molecules
+    groups = store.conformer_groups()
+    assert len(store.key_table) == len(groups) == 4
+    assert sorted(len(g) for g in groups.values()) == [10, 10, 10, 10]
+    assert all(store.keys[i] == key for key, group in groups.items() for i in group)
+    assert store.find_clashes() == []
+
+
+def test_save_stores_keys_as_ids(processor, tmp_path):
+    path = tmp_path / "geometries"
+    store = processor.get_geometry_store(path=str(path))
+
+    assert sorted(os.listdir(path)) == [
+        "atomic_numbers.npy", "coordinates.npy", "index.json", "key_ids.npy", "offsets.npy"
+    ]
+    assert np.load(path / "key_ids.npy").dtype == np.int32
+    with open(path / "index.json") as f:
+        assert len(json.load(f)["key_table"]) == 4
+
+    loaded = GeometryStore.load(str(path))
+    # Memory-mapped, not read into memory
+    assert not loaded.coordinates.flags.owndata
+    assert loaded.names == store.names and loaded.keys == store.keys
+    assert loaded.matches(processor)
+    np.testing.assert_array_equal(loaded.radius_of_gyration(), store.radius_of_gyration())
+
+
+def test_mismatched_saved_store_is_rebuilt(tmp_path):
+    path = str(tmp_path / "geometries")
+    SinglePointDatasetProcessor(FakeSinglePointDataset(n_entries=20)).get_geometry_store(path=path)
+
+    processor = SinglePointDatasetProcessor(FakeSinglePointDataset(n_entries=30))
+    with pytest.warns(UserWarning, match="does not match"):
+        store = processor.get_geometry_store(path=path)
+    assert len(store) == 30
+    assert GeometryStore.load(path).matches(processor)
+
+    # A matching store is loaded without fetching entries
+    fresh = SinglePointDatasetProcessor(processor.ds)
+    calls = processor.ds.calls["fetch_entries"]
+    assert len(fresh.get_geometry_store(path=path)) == 30
+    assert processor.ds.calls["fetch_entries"] == calls
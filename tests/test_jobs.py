@@ -0,0 +1,125 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from jobs import BackgroundJob
+
+
+def _chunks(start, stop):
+    return pd.DataFrame({"index": range(start, stop)})
+
+
+def _finish(job):
+    job._thread.join(timeout=10)
+    assert not job._thread.is_alive()
+
+
+def test_job_concatenates_chunks():
+    job = BackgroundJob(_chunks, 5, 27, chunk_size=10).start()
+    df = job.result(timeout=10)
+    assert df["index"].tolist() == list(range(5, 27))
+    assert job.progress["done"] == job.total == 22
+    assert job.done and job.eta == 0.0
+
+
+def test_widget_shows_final_state_when_done():
+    job = BackgroundJob(_chunks, 0, 10, chunk_size=5)
+    progress_bar, label, cancel_button = job.widget().children
+    job.start()
+    _finish(job)
+
+    assert progress_bar.value == 10
+    assert progress_bar.bar_style == "success"
+    assert cancel_button.disabled
+    assert "done" in label.value and "ETA" not in label.value
+
+
+def test_cancel_keeps_processed_chunks():
+    first_chunk_done = threading.Event()
+    release = threading.Event()
+
+    def slow_chunks(start, stop):
+        if start > 0:
+            first_chunk_done.set()
+            release.wait(timeout=10)
+        return _chunks(start, stop)
+
+    job = BackgroundJob(slow_chunks, 0, 100, chunk_size=10)
+    progress_bar, label, cancel_button = job.widget().children
+    job.start()
+    assert first_chunk_done.wait(timeout=10)
+
+    job.cancel()
+    assert "cancelling" in label.value and cancel_button.disabled
+    release.set()
+    df = job.result(timeout=10)
+    _finish(job)
+
+    assert job.cancelled
+    assert df["index"].tolist() == list(range(20))
+    assert progress_bar.bar_style == "warning"
+    assert "cancelled" in label.value and "cancelling" not in label.value
+
+
+def test_failed_job_raises_and_shows_error():
+    def failing(start, stop):
+        if start >= 10:
+            raise RuntimeError("server went away")
+        return _chunks(start, stop)
+
+    job = BackgroundJob(failing, 0, 30, chunk_size=10)
+    progress_bar, label, _ = job.widget().children
+    job.start()
+    with pytest.raises(RuntimeError, match="server went away") as excinfo:
+        job.result(timeout=10)
+    _finish(job)
+
+    # The chunks processed before the failure come with the error
+    assert excinfo.value.partial["index"].tolist() == list(range(10))
+
+    assert job.partial_result()["index"].tolist() == list(range(10))
+    assert progress_bar.bar_style == "danger"
+    assert "failed: server went away" in label.value
+
+
+def test_run_in_background_on_processor(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from jobs import run_in_background
+    from singlepoint import SinglePointDatasetProcessor
+
+    processor = SinglePointDatasetProcessor(fake_dataset)
+    job = run_in_background(processor, "get_entry_df", stop=25, chunk_size=10)
+    df = job.result(timeout=30)
+    assert df["Entry Name"].tolist() == fake_dataset.entry_names[:25]
+
+
+def test_concurrent_callers_convert_an_entry_once(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    processor = SinglePointDatasetProcessor(fake_dataset)
+    calls = []
+    started = threading.Event()
+
+    def slow_convert():
+        calls.append(1)
+        started.set()
+        threading.Event().wait(0.2)
+        return {"OpenFFMol": "converted"}
+
+    results = []
+
+    def convert():
+        results.append(processor._cached_conversion(("openff", "entry-000000"), slow_convert))
+
+    threads = [threading.Thread(target=convert) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(calls) == 1
+    assert results == [{"OpenFFMol": "converted"}] * 4
@@ -0,0 +1,91 @@
+import gc
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("openff.toolkit")
+
+from singlepoint import SinglePointDatasetProcessor  # noqa: E402
+
+
+@pytest.fixture
+def processor(fake_dataset):
+    return SinglePointDatasetProcessor(fake_dataset)
+
+
+def _count_conversions(processor):
+    conversions = []
+    convert_entry = processor._convert_entry
+
+    def counting_convert_entry(name, *args, **kwargs):
+        conversions.append(name)
+        return convert_entry(name, *args, **kwargs)
+
+    processor._convert_entry = counting_convert_entry
+    return conversions
+
+
+def test_only_selected_columns_are_computed(processor):
+    lazy = processor.get_entry_df(lazy=True, store_entry=True)
+    conversions = _count_conversions(processor)
+
+    names = lazy.head(3, columns=["Entry Name"])
+    assert names["Entry Name"].tolist() == processor.entry_names[:3]
+    assert processor.ds.calls["fetch_entries"] == 0
+
+    entries = lazy.iloc[:5, ["Entry Name", "Entry"]]
+    assert list(entries.columns) == ["Entry Name", "Entry"]
+    assert [e.name for e in entries["Entry"]] == processor.entry_names[:5]
+    assert conversions == []
+
+    smiles = lazy.loc[processor.entry_names[2:4], "SMILES"]
+    assert isinstance(smiles, pd.Series) and len(smiles) == 2
+    assert conversions == processor.entry_names[2:4]
+
+    # Already computed rows aren't converted again
+    lazy.iloc[2, ["RDKit Molecule", "SMILES"]]
+    lazy.loc[processor.entry_names[3], "SMILES"]
+    assert conversions == processor.entry_names[2:4]
+    assert lazy.n_computed == 5
+
+    with pytest.raises(KeyError):
+        lazy.iloc[:2, ["Nope"]]
+
+
+def test_full_rows_without_column_selection(processor):
+    lazy = processor.get_entry_df(lazy=True)
+    row = lazy.iloc[0]
+    assert list(row.index) == lazy.columns
+    assert row["Entry Name"] == processor.entry_names[0]
+    assert lazy.to_dataframe().shape == (len(processor.entry_names), len(lazy.columns))
+
+
+def test_rows_are_tracked_in_the_memory_budget(fake_dataset):
+    processor = SinglePointDatasetProcessor(fake_dataset, memory_budget=20_000)
+    lazy = processor.get_entry_df(lazy=True, include_error=True)
+
+    for start in range(0, 40, 5):
+        rows = lazy.iloc[start:start + 5, ["SMILES", "RDKit_Error"]]
+        # Every row is computed, even if the budget evicts it right away
+        assert (rows["SMILES"].notna() | rows["RDKit_Error"].notna()).all()
+        assert processor.memory.current_bytes <= processor.memory.max_bytes
+
+    lazy_usage = processor.memory_usage()["by_kind"]["lazy"]
+    # Rows evicted from the budget are dropped from the frame
+    assert 0 < lazy.n_computed == lazy_usage["items"] < 40
+
+    del lazy
+    gc.collect()
+    assert "lazy" not in processor.memory_usage()["by_kind"]
+
+
+def test_rows_do_not_count_shared_molecules_again(fake_dataset):
+    processor = SinglePointDatasetProcessor(fake_dataset)
+    lazy = processor.get_entry_df(lazy=True, store_entry=True)
+    lazy.iloc[0:10, ["Entry", "OpenFFMol", "SMILES"]]
+
+    # Molecules and entries are tracked under their own keys; rows add their SMILES
+    usage = processor.memory_usage()["by_kind"]
+    per_item = {kind: usage[kind]["bytes"] / usage[kind]["items"] for kind in usage}
+    assert usage["lazy"]["items"] == 10
+    assert per_item["lazy"] < min(per_item["openff"], per_item["entry"])
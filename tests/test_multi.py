@@ -0,0 +1,45 @@
+import pytest
+
+from testing import FakeSinglePointDataset
+
+pytest.importorskip("openff.toolkit")
+
+from multi import MultiDatasetProcessor  # noqa: E402
+
+
+def _datasets():
+    # The same seed gives the same molecules for the first entries
+    first = FakeSinglePointDataset(n_entries=20, name="first")
+    second = FakeSinglePointDataset(n_entries=30, name="second")
+    second.id = 1
+    return [first, second]
+
+
+def test_shared_molecules_are_converted_once():
+    multi = MultiDatasetProcessor(_datasets())
+    df = multi.get_entry_df(get_openff=True, get_rdkit=True)
+
+    assert df["Dataset"].value_counts().to_dict() == {"second": 30, "first": 20}
+    savings = multi.cache_savings()
+    # OpenFF and RDKit conversions of 30 distinct molecules, 20 of them shared
+    assert savings["conversions"] == 60
+    assert savings["reused"] == savings["reused_across_datasets"] == 40
+    assert savings["molecules"] == 60
+
+
+def test_repeated_requests_use_each_processors_own_cache():
+    multi = MultiDatasetProcessor(_datasets())
+    multi.get_entry_df(get_openff=True)
+    reused = multi.cache_savings()["reused"]
+
+    multi.get_entry_df(get_openff=True)
+    assert multi.cache_savings()["reused"] == reused
+    assert multi.cache_savings()["conversions"] == 30
+
+
+def test_find_entry_matches_molecule_keys():
+    multi = MultiDatasetProcessor(_datasets())
+    found = multi.find_entry("entry-000005")
+    assert found["Dataset"].tolist() == ["first", "second"]
+    assert found["Molecule Key"].nunique() == 1
+    assert multi.find_entry("entry-000025")["Dataset"].tolist() == ["second"]
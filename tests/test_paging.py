@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+from paging import PageLoader
+from testing import FakeSinglePointDataset
+
+PAGE_SIZE = 10
+
+
+class _Pages:
+    """Loads pages of a fake dataset and records what was loaded and rendered."""
+
+    def __init__(self, latency):
+        self.ds = FakeSinglePointDataset(n_entries=100, latency=latency)
+        self.loaded = []
+        self.rendered = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def load(self, page):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            names = self.ds.entry_names[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+            self.ds.fetch_entries(names)
+            self.loaded.append(page)
+            return names
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def render(self, page, names):
+        self.rendered.append((page, names[0]))
+
+
+def test_rapid_clicks_render_only_the_last_page():
+    pages = _Pages(latency=0.2)
+    loader = PageLoader(pages.load, pages.render, debounce=0.05)
+
+    async def click_next_five_times():
+        for page in range(5):
+            task = loader.request(page)
+            await asyncio.sleep(0.01)
+        await task
+
+    asyncio.run(click_next_five_times())
+
+    assert pages.rendered == [(4, "entry-000040")]
+    assert pages.loaded == [4]
+    assert pages.ds.calls["fetch_entries"] == 1
+    assert loader.stats["rendered"] == 1
+    assert loader.stats["discarded"] == 4
+
+
+def test_slow_in_flight_pages_are_dropped_and_queued_ones_skipped():
+    pages = _Pages(latency=0.2)
+    loader = PageLoader(pages.load, pages.render, debounce=0.02)
+
+    async def click_slower_than_debounce():
+        tasks = []
+        for page in range(4):
+            tasks.append(loader.request(page))
+            # Long enough for each load to start, shorter than a fetch
+            await asyncio.sleep(0.05)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Let a superseded load still running in the worker finish
+        await asyncio.sleep(0.3)
+
+    asyncio.run(click_slower_than_debounce())
+
+    assert pages.rendered == [(3, "entry-000030")]
+    # Page 0 was in flight; pages 1 and 2 were superseded while queued
+    assert pages.loaded == [0, 3]
+    assert pages.max_active == 1
+
+
+def test_requests_without_event_loop_load_synchronously():
+    pages = _Pages(latency=0.0)
+    loader = PageLoader(pages.load, pages.render)
+    for page in range(3):
+        loader.request(page)
+    assert pages.loaded == [0, 1, 2]
+    assert [page for page, _ in pages.rendered] == [0, 1, 2]
+
+
+def test_errors_of_superseded_pages_are_ignored():
+    errors = []
+
+    def load(page):
+        raise RuntimeError(f"page {page} failed")
+
+    loader = PageLoader(load, lambda page, data: None, debounce=0.0,
+                        on_error=lambda page, error: errors.append(str(error)))
+
+    async def run():
+        loader.request(0)
+        await asyncio.sleep(0)
+        await loader.request(1)
+
+    asyncio.run(run())
+    assert errors == ["page 1 failed"]
@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from properties import order_by_values, scalar_value
+
+
+def test_scalar_value():
+    assert scalar_value(3) == 3.0
+    assert scalar_value(True) == 1.0
+    assert scalar_value(np.float32(0.5)) == 0.5
+    assert np.isnan(scalar_value([1.0, 2.0]))
+    assert np.isnan(scalar_value(None))
+    assert np.isnan(scalar_value("1.0"))
+
+
+def test_order_by_values():
+    values = np.array([3.0, np.nan, 1.0, 2.0, 5.0])
+    assert order_by_values(values).tolist() == [2, 3, 0, 4]
+    assert order_by_values(values, ascending=False).tolist() == [4, 0, 3, 2]
+    assert order_by_values(values, ascending=False, k=2).tolist() == [4, 0]
+    assert order_by_values(values, k=10).tolist() == [2, 3, 0, 4]
+
+
+@pytest.fixture
+def processor(fake_dataset):
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    return SinglePointDatasetProcessor(fake_dataset)
+
+
+def test_scalar_properties_leave_out_arrays(processor):
+    spec = processor.ds.specification_names[0]
+    scalars = processor.property_columns.scalar_properties(spec)
+
+    assert scalars == ["return_energy", "scf_total_energy", "scf_iterations"]
+    assert "return_gradient" in processor.ds.computed_properties[spec]
+    for prop in scalars:
+        assert processor.sort_entries(spec, prop)
+    # Sampled records are released again
+    assert processor.ds._cache_data.records == {}
+
+
+def test_top_k_matches_full_sort(processor):
+    spec = processor.ds.specification_names[0]
+    energies = processor.get_property_column(spec, "return_energy")
+
+    top = processor.top_k(spec, "return_energy", k=5)
+    expected = order_by_values(energies, ascending=False)[:5]
+    assert top["Entry Name"].tolist() == [processor.entry_names[i] for i in expected]
+    assert processor.sort_entries(spec, "return_energy", ascending=False)[:5] == top["Entry Name"].tolist()
+    # Failed records have no value and are left out
+    assert len(processor.sort_entries(spec, "return_energy")) == np.count_nonzero(~np.isnan(energies))
+
+
+def test_difference_to_reference_specification(processor):
+    spec, reference = processor.ds.specification_names
+    values = processor.get_property_column(spec, "return_energy", reference=reference, absolute=True)
+    expected = np.abs(
+        processor.get_property_column(spec, "return_energy")
+        - processor.get_property_column(reference, "return_energy")
+    )
+    np.testing.assert_array_equal(values, expected)
+
+
+def _expected_column(ds, spec, prop):
+    return [ds._records[(name, spec)].properties.get(prop, np.nan) for name in ds.entry_names]
+
+
+def test_columns_come_from_the_properties_query(processor, monkeypatch):
+    ds = processor.ds
+    spec = ds.specification_names[0]
+
+    def get_record(*args, **kwargs):
+        raise AssertionError("whole record loaded")
+
+    monkeypatch.setattr(ds, "get_record", get_record)
+    values = processor.get_property_column(spec, "return_energy")
+    np.testing.assert_array_equal(values, _expected_column(ds, spec, "return_energy"))
+    assert ds._cache_data.records == {}
+
+
+def test_columns_fall_back_to_records(processor, monkeypatch):
+    ds = processor.ds
+    spec = ds.specification_names[0]
+    monkeypatch.delattr(type(ds), "get_properties_df")
+
+    values = processor.get_property_column(spec, "return_energy")
+    np.testing.assert_array_equal(values, _expected_column(ds, spec, "return_energy"))
+    assert processor.property_columns.scalar_properties(spec) == [
+        "return_energy", "scf_total_energy", "scf_iterations"
+    ]
+    assert ds._cache_data.records == {}
+
+
+def test_browser_sorts_outside_the_widget_callback(processor):
+    from singlepoint import SinglePointDatasetBrowser
+
+    spec = processor.ds.specification_names[0]
+    browser = SimpleNamespace(dataset_processor=processor, _record_sort=None, _record_order=None)
+    refreshed = []
+    browser._refresh_record_table = lambda: refreshed.append(browser._record_order)
+    controls = SinglePointDatasetBrowser._create_record_sort_controls(browser)
+    (spec_dropdown, property_dropdown, _, _), (_, _, apply_button, _, _) = (
+        box.children for box in controls.children
+    )
+    property_dropdown.value = "return_energy"
+
+    async def sort():
+        apply_button.click()
+        # The click only requests the sort
+        assert refreshed == [] and (spec, "return_energy") not in processor.property_columns
+        while not refreshed:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(asyncio.wait_for(sort(), timeout=30))
+    assert refreshed == [processor.sort_entries(spec, "return_energy", ascending=False)]
+    assert browser._record_sort["property_name"] == "return_energy"
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openff.toolkit")
+
+import singlepoint  # noqa: E402
+from singlepoint import SinglePointDatasetBrowser, SinglePointDatasetProcessor  # noqa: E402
+
+
+@pytest.fixture
+def browser(fake_dataset):
+    return SinglePointDatasetBrowser(SinglePointDatasetProcessor(fake_dataset))
+
+
+def _browser_keys(processor):
+    return [key for key in processor.memory.keys() if key[0] == "record_browser"]
+
+
+def test_browsers_are_cached_in_the_memory_budget(browser):
+    processor = browser.dataset_processor
+    name, spec = processor.entry_names[0], processor.ds.specification_names[0]
+
+    first = browser._get_record_browser(name, spec)
+    assert browser._get_record_browser(name, spec) is first
+    assert _browser_keys(processor) == [("record_browser", name, spec)]
+    assert processor.memory_usage()["by_kind"]["record_browser"]["bytes"] > 0
+    assert browser._get_record_browser("no-such-entry", spec) is None
+
+
+def test_changed_record_rebuilds_the_browser(browser):
+    processor = browser.dataset_processor
+    ds = processor.ds
+    name, spec = processor.entry_names[0], ds.specification_names[0]
+    old = browser._get_record_browser(name, spec)
+    old._ipython_display_()
+
+    # The record is recomputed and the page refetched
+    record = ds._records[(name, spec)]
+    recomputed = SimpleNamespace(**{**vars(record), "id": record.id + 1000})
+    new = browser._get_record_browser(name, spec, page_records={(name, spec): recomputed})
+
+    assert new is not old and new.record is recomputed
+    assert old._layout is None  # Widgets of the stale browser were closed
+    assert _browser_keys(processor) == [("record_browser", name, spec)]
+
+    errored = SimpleNamespace(**{**vars(recomputed), "status": SimpleNamespace(value="error")})
+    assert browser._get_record_browser(name, spec, page_records={(name, spec): errored}) is not new
+
+
+def test_browsers_are_bounded(browser, monkeypatch):
+    monkeypatch.setattr(singlepoint, "RECORD_DETAIL_CACHE_SIZE", 3)
+    processor = browser.dataset_processor
+    spec = processor.ds.specification_names[0]
+    for name in processor.entry_names[:5]:
+        browser._get_record_browser(name, spec)
+    assert [key[1] for key in _browser_keys(processor)] == processor.entry_names[2:5]
+
+
+def test_evicting_a_record_drops_its_browser(browser):
+    processor = browser.dataset_processor
+    name, spec = processor.entry_names[0], processor.ds.specification_names[0]
+    processor.get_record_df(stop=1)
+    assert ("record", name, spec) in processor.memory
+
+    browser._get_record_browser(name, spec)
+    size = dict((key, size) for key, _, size in processor.memory.snapshot())[("record_browser", name, spec)]
+    # The record is already counted on its own
+    assert size == singlepoint.RECORD_BROWSER_WIDGET_BYTES
+
+    processor.memory.max_bytes = 1
+    processor.memory.put(("other", 0), None, size=1)
+    assert ("record_browser", name, spec) not in processor.memory
+    assert (name, spec) not in processor.ds._cache_data.records
@@ -0,0 +1,69 @@
+import warnings
+from types import SimpleNamespace
+
+import pytest
+
+from search import EntryNameIndex
+
+NAMES = ["Water-1", "water-10", "methane", "Ethanol", "water-2", "ethane", "dimethyl-ether"]
+
+
+@pytest.fixture
+def index():
+    return EntryNameIndex(NAMES)
+
+
+def test_exact_prefix_and_substring(index):
+    assert index.position("methane") == 2 and "nope" not in index
+    assert [NAMES[i] for i in index.prefix("WATER")] == ["Water-1", "water-10", "water-2"]
+    assert [NAMES[i] for i in index.prefix("water", limit=2)] == ["Water-1", "water-10"]
+    assert index.prefix("zz").tolist() == []
+    assert index.substring("eth").tolist() == [2, 3, 5, 6]
+    assert index.substring("eth", limit=2).tolist() == [2, 3]
+    assert index.substring("").tolist() == []
+
+
+def test_search_ranks_exact_then_prefix_then_substring(index):
+    assert [NAMES[i] for i in index.search("ethane")] == ["ethane", "methane"]
+    assert [NAMES[i] for i in index.search(" eth ")] == ["ethane", "Ethanol", "methane", "dimethyl-ether"]
+    assert index.search("eth", limit=2) == [5, 3]
+    assert index.search("   ") == []
+
+
+def test_search_limit_applies_after_filtering(index):
+    # The prefix matches (ethane, Ethanol) are rejected; the limit still fills up
+    accepted = index.search("e", limit=3, accept=lambda position: position % 2 == 0)
+    assert accepted == [0, 2, 4]
+    assert index.search("water", accept=lambda position: False) == []
+
+
+def test_non_ascii_and_long_names():
+    names = ["ä" * 300, "b" * 5000, "äb"]
+    index = EntryNameIndex(names)
+    assert index.prefix("ä").tolist() == [2, 0]
+    assert index.search("b" * 4999) == [1]
+
+
+def test_records_tab_search_only_counts_the_sorted_subset():
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetBrowser
+
+    names = [f"entry-{i:04d}" for i in range(200)]
+    processor = SimpleNamespace(entry_names=names, entry_index=EntryNameIndex(names))
+    browser = SimpleNamespace(dataset_processor=processor)
+    # A sorted subset holding only the last entries, in reverse order
+    entry_order = names[:-61:-1]
+    visited = []
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        box = SinglePointDatasetBrowser._create_entry_search(browser, visited.append, entry_order=entry_order)
+    search_input, search_button, matches_dropdown, status_label = box.children
+    # Submitting the text (Enter) searches, as does the button
+    search_input.value = "entry"
+
+    assert status_label.value == "50 matches"
+    assert [name for name, _ in matches_dropdown.options] == names[140:190]
+    assert visited == [entry_order.index("entry-0140")]
+    search_button.click()
+    assert visited == [entry_order.index("entry-0140")] * 2
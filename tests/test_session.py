@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+from session import MAGIC, read_session, write_session
+from testing import FakeSinglePointDataset
+
+
+def test_write_and_read_session(tmp_path):
+    path = tmp_path / "state.qcb"
+    write_session(path, {"entry_names": ["a", "b"]})
+    assert path.read_bytes().startswith(MAGIC)
+    assert read_session(path) == {"entry_names": ["a", "b"]}
+    assert not (tmp_path / "state.qcb.tmp").exists()
+
+
+def test_read_session_rejects_other_files(tmp_path):
+    path = tmp_path / "other.qcb"
+    path.write_bytes(b"not a session file")
+    with pytest.raises(ValueError, match="not a session file"):
+        read_session(path)
+
+
+@pytest.fixture
+def processor_class():
+    pytest.importorskip("openff.toolkit")
+    from singlepoint import SinglePointDatasetProcessor
+
+    return SinglePointDatasetProcessor
+
+
+def _warm_up(processor):
+    processor.entry_names
+    processor.get_specification_df()
+    processor.get_entry_df(stop=10, get_openff=True)
+
+
+def test_session_round_trip(processor_class, tmp_path):
+    path = tmp_path / "session.qcb"
+    processor = processor_class(FakeSinglePointDataset(n_entries=30))
+    _warm_up(processor)
+    processor.save_session(path)
+
+    # A new kernel: same dataset, nothing fetched yet
+    ds = FakeSinglePointDataset(n_entries=30)
+    restored = processor_class(ds)
+    assert restored.load_session(path)
+
+    assert restored.entry_names == processor.entry_names
+    status_calls = _count_status_calls(ds)
+    assert restored.get_specification_df().equals(processor.get_specification_df())
+    # The status was checked by load_session
+    assert status_calls == []
+    df = restored.get_entry_df(stop=10, get_openff=True)
+    assert df["Entry Name"].tolist() == processor.entry_names[:10]
+    assert ds.calls["fetch_entries"] == 0
+    assert restored.memory_usage()["by_kind"]["openff"]["items"] == 10
+
+
+def test_session_for_another_dataset_is_rejected(processor_class, tmp_path):
+    path = tmp_path / "session.qcb"
+    processor = processor_class(FakeSinglePointDataset(n_entries=30))
+    _warm_up(processor)
+    processor.save_session(path)
+
+    other = processor_class(FakeSinglePointDataset(n_entries=30, error_rate=0.5))
+    with pytest.warns(UserWarning, match="changed: status"):
+        assert not other.load_session(path)
+    assert other._entry_names is None and other._specification_df is None
+
+
+def _count_status_calls(ds):
+    calls = []
+    status = ds.status
+
+    def counting_status():
+        calls.append(1)
+        return status()
+
+    ds.status = counting_status
+    return calls
+
+
+def test_specification_table_follows_the_record_status(processor_class, monkeypatch):
+    import singlepoint
+
+    ds = FakeSinglePointDataset(n_entries=30)
+    processor = processor_class(ds)
+    status_calls = _count_status_calls(ds)
+    spec = ds.specification_names[0]
+    before = processor.get_specification_df().set_index("Specification Name")
+
+    name = next(n for n in ds.entry_names if ds._records[(n, spec)].status.value == "complete")
+    ds._records[(name, spec)] = SimpleNamespace(
+        **{**vars(ds._records[(name, spec)]), "status": SimpleNamespace(value="error")}
+    )
+
+    # Within the TTL the memoized table is returned without asking the server
+    assert processor.get_specification_df().equals(before.reset_index())
+    assert len(status_calls) == 1
+
+    after = processor.get_specification_df(refresh=True).set_index("Specification Name")
+    assert after.loc[spec, "Num Error"] == before.loc[spec, "Num Error"] + 1
+    assert after.loc[spec, "Num Complete"] == before.loc[spec, "Num Complete"] - 1
+    assert len(status_calls) == 2
+
+    ds._records[(name, spec)] = SimpleNamespace(
+        **{**vars(ds._records[(name, spec)]), "status": SimpleNamespace(value="complete")}
+    )
+    monkeypatch.setattr(singlepoint, "SPECIFICATION_STATUS_TTL", 0.0)
+    assert processor.get_specification_df().equals(before.reset_index())
+    assert len(status_calls) == 3
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("openff.toolkit")
+
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from util import BOHR_TO_ANGSTROM, CMILES_KEY, molecule_key, rdkit_from_qcschema
+
+# (SMILES, whether the QCSchema connectivity uses aromatic 1.5 bond orders)
+MOLECULES = [
+    ("CCO", False),
+    ("C[S-]", False),
+    ("CC(=O)[O-]", False),
+    ("CC(=O)[O-]", True),
+    ("C[NH3+]", False),
+    ("c1ccccc1", True),
+    ("c1cc[nH]c1", False),
+    ("c1cc[nH]c1", True),
+    ("c1ccncc1", True),
+    ("[Cl-]", False),
+    ("[Na+]", False),
+]
+
+
+def _qcschema(smiles, aromatic):
+    """QCSchema-like molecule with connectivity, and its mapped SMILES."""
+    mol = Chem.AddHs(Chem.MolFromSmiles(smiles))
+    if mol.GetNumAtoms() > 1:
+        AllChem.EmbedMolecule(mol, randomSeed=7)
+    else:
+        mol.AddConformer(Chem.Conformer(1))
+    if not aromatic:
+        Chem.Kekulize(mol, clearAromaticFlags=True)
+
+    molecule = SimpleNamespace(
+        symbols=[atom.GetSymbol() for atom in mol.GetAtoms()],
+        geometry=mol.GetConformer().GetPositions() / BOHR_TO_ANGSTROM,
+        connectivity=[
+            (bond.GetBeginAtomIdx(), bond.GetEndAtomIdx(), bond.GetBondTypeAsDouble())
+            for bond in mol.GetBonds()
+        ],
+        molecular_charge=float(Chem.GetFormalCharge(mol)),
+        molecular_multiplicity=1,
+    )
+    for atom in mol.GetAtoms():
+        atom.SetAtomMapNum(atom.GetIdx() + 1)
+    return molecule, Chem.MolToSmiles(mol)
+
+
+def _smiles(mol):
+    return Chem.MolToSmiles(Chem.RemoveHs(mol))
+
+
+@pytest.mark.parametrize("smiles, aromatic", MOLECULES)
+def test_connectivity_matches_mapped_smiles(smiles, aromatic):
+    molecule, mapped_smiles = _qcschema(smiles, aromatic)
+
+    from_connectivity = rdkit_from_qcschema(molecule)
+    from_mapped_smiles = rdkit_from_qcschema(
+        SimpleNamespace(molecule=molecule, attributes={CMILES_KEY: mapped_smiles})
+    )
+
+    assert _smiles(from_connectivity) == _smiles(from_mapped_smiles) == Chem.CanonSmiles(smiles)
+    assert Chem.GetFormalCharge(from_connectivity) == molecule.molecular_charge
+    assert from_connectivity.GetNumConformers() == 1
+    np.testing.assert_allclose(
+        from_connectivity.GetConformer().GetPositions(),
+        molecule.geometry * BOHR_TO_ANGSTROM,
+    )
+
+
+@pytest.mark.parametrize("smiles, aromatic", MOLECULES)
+def test_direct_conversion_agrees_with_openff(smiles, aromatic):
+    from openff.toolkit import Molecule
+
+    molecule, mapped_smiles = _qcschema(smiles, aromatic)
+    openff_mol = Molecule.from_qcschema({
+        "attributes": {CMILES_KEY: mapped_smiles},
+        "molecule": {"symbols": molecule.symbols, "geometry": molecule.geometry.ravel().tolist()},
+    })
+
+    assert _smiles(rdkit_from_qcschema(molecule)) == _smiles(openff_mol.to_rdkit())
+
+
+def test_mapped_smiles_must_match_atoms():
+    molecule, mapped_smiles = _qcschema("CCO", False)
+    molecule.symbols = list(reversed(molecule.symbols))
+    with pytest.raises(ValueError, match="does not match"):
+        rdkit_from_qcschema(SimpleNamespace(molecule=molecule, attributes={CMILES_KEY: mapped_smiles}))
+
+
+def test_molecule_key(fake_dataset):
+    entries = [fake_dataset.get_entry(name) for name in fake_dataset.entry_names[:8]]
+    keys = [molecule_key(entry) for entry in entries]
+    assert len(set(keys)) == len(keys)
+    assert molecule_key(entries[0]) == molecule_key(entries[0].molecule)
@@ -0,0 +1,59 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from viewers import ArrayPropertyViewer, array_to_html, index_labels, parse_slice, summarize_array
+
+
+def _row_labels(html):
+    return [cell.split("</th>")[0] for cell in html.split("<tr><th>")[2:]]
+
+
+def test_parse_slice():
+    assert parse_slice("0:10, :3", 2) == (slice(0, 10), slice(None, 3))
+    assert parse_slice("5", 2) == (5,)
+    assert parse_slice("", 2) == ()
+    with pytest.raises(ValueError):
+        parse_slice("0, 1, 2", 2)
+    with pytest.raises(ValueError):
+        parse_slice("__import__('os')", 1)
+
+
+def test_index_labels():
+    assert index_labels((100, 3), (slice(40, 45),)) == [range(40, 45), range(3)]
+    assert index_labels((100, 3), (slice(10, 20, 5), slice(1, None))) == [range(10, 20, 5), range(1, 3)]
+    # An integer index drops its axis
+    assert index_labels((100, 3), (7,)) == [range(3)]
+
+
+def test_sliced_rows_keep_their_indices():
+    array = np.arange(300.0).reshape(100, 3)
+    index = parse_slice("40:43, 1:", array.ndim)
+    labels = index_labels(array.shape, index)
+
+    html = array_to_html(array[index], row_labels=labels[0], column_labels=labels[1])
+    assert _row_labels(html) == ["40", "41", "42"]
+    assert "<th>1</th><th>2</th>" in html
+    assert "<td>121</td>" in html
+
+
+def test_pages_are_labelled_from_their_offset():
+    viewer = ArrayPropertyViewer("gradient", np.zeros((50, 3)), rows_per_page=20)
+    html = array_to_html(viewer.page(2), row_offset=40)
+    assert viewer.n_pages == 3
+    assert _row_labels(html) == [str(i) for i in range(40, 50)]
+
+
+def test_complex_arrays_keep_their_imaginary_part():
+    array = np.array([1 + 2j, 3 - 4j, np.nan])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        summary = summarize_array(array)
+        html = array_to_html(array)
+
+    assert summary["nan"] == 1
+    assert summary["max_abs"] == pytest.approx(5.0)
+    assert summary["mean"] == pytest.approx(2 - 1j)
+    assert "min" not in summary
+    assert "3-4j" in html and "1+2j" in html
@@ -2,13 +2,184 @@
 Helper functions
 """
 
+import numpy as np
 from openff.toolkit import Molecule
+from rdkit import Chem
+from rdkit.Chem import rdDetermineBonds
+from rdkit.Geometry import Point3D
+
+BOHR_TO_ANGSTROM = 0.529177210903
+
+# Entry attribute holding the mapped SMILES written by OpenFF/QCSubmit
+CMILES_KEY = "canonical_isomeric_explicit_hydrogen_mapped_smiles"
+
+RDKIT_ENGINES = ("openff", "rdkit")
+
+
+_BOND_TYPES = {
+    1.0: Chem.BondType.SINGLE,
+    1.5: Chem.BondType.AROMATIC,
+    2.0: Chem.BondType.DOUBLE,
+    3.0: Chem.BondType.TRIPLE,
+}
+
+
+def _rdkit_from_mapped_smiles(mapped_smiles):
+    """Build an RDKit molecule whose atom order follows the SMILES atom map."""
+    params = Chem.SmilesParserParams()
+    params.removeHs = False
+    mol = Chem.MolFromSmiles(mapped_smiles, params)
+    if mol is None:
+        raise ValueError(f"Could not parse mapped SMILES: {mapped_smiles}")
+
+    new_order = [0] * mol.GetNumAtoms()
+    for atom in mol.GetAtoms():
+        map_number = atom.GetAtomMapNum()
+        if map_number < 1:
+            raise ValueError("Mapped SMILES must map every atom")
+        new_order[map_number - 1] = atom.GetIdx()
+        atom.SetAtomMapNum(0)
+
+    return Chem.RenumberAtoms(mol, new_order)
+
+
+def _conformer(geometry):
+    conformer = Chem.Conformer(len(geometry))
+    for i, (x, y, z) in enumerate(geometry):
+        conformer.SetAtomPosition(i, Point3D(float(x), float(y), float(z)))
+    return conformer
+
+
+def _rdkit_from_connectivity(symbols, geometry, connectivity, charge):
+    """Build an RDKit molecule from QCSchema connectivity, or perceive bonds if there is none."""
+    if len(symbols) == 1:
+        # A lone atom or ion: its charge is the molecule's
+        atom = Chem.Atom(symbols[0])
+        atom.SetFormalCharge(charge)
+        atom.SetNoImplicit(True)
+        rwmol = Chem.RWMol()
+        rwmol.AddAtom(atom)
+        mol = rwmol.GetMol()
+        Chem.SanitizeMol(mol)
+        return mol
+
+    if not connectivity:
+        xyz = "\n".join(
+            [str(len(symbols)), ""]
+            + [f"{s} {x:.10f} {y:.10f} {z:.10f}" for s, (x, y, z) in zip(symbols, geometry)]
+        )
+        mol = Chem.MolFromXYZBlock(xyz)
+        rdDetermineBonds.DetermineBonds(mol, charge=charge)
+        return Chem.Mol(mol)
+
+    rwmol = Chem.RWMol()
+    for symbol in symbols:
+        atom = Chem.Atom(symbol)
+        atom.SetNoImplicit(True)
+        rwmol.AddAtom(atom)
+    for i, j, order in connectivity:
+        bond_type = _BOND_TYPES.get(float(order))
+        if bond_type is None:
+            raise ValueError(f"Unsupported bond order {order} between atoms {i} and {j}")
+        rwmol.AddBond(int(i), int(j), bond_type)
+        if bond_type == Chem.BondType.AROMATIC:
+            rwmol.GetAtomWithIdx(int(i)).SetIsAromatic(True)
+            rwmol.GetAtomWithIdx(int(j)).SetIsAromatic(True)
+
+    # QCSchema has no per-atom formal charges. Assign the common ones from
+    # valence, and let RDKit assign bond orders if the total doesn't match.
+    for atom in rwmol.GetAtoms():
+        valence = sum(bond.GetBondTypeAsDouble() for bond in atom.GetBonds())
+        symbol = atom.GetSymbol()
+        if symbol == "N" and valence == 4:
+            atom.SetFormalCharge(1)
+        elif symbol == "O" and valence == 1:
+            atom.SetFormalCharge(-1)
+        elif symbol == "O" and valence == 3:
+            atom.SetFormalCharge(1)
+
+    if Chem.GetFormalCharge(rwmol) != charge:
+        # Perceive bond orders and charges from the connectivity alone,
+        # starting from single bonds. This needs the geometry.
+        for atom in rwmol.GetAtoms():
+            atom.SetFormalCharge(0)
+            atom.SetIsAromatic(False)
+        for bond in rwmol.GetBonds():
+            bond.SetBondType(Chem.BondType.SINGLE)
+            bond.SetIsAromatic(False)
+        rwmol.AddConformer(_conformer(geometry), assignId=True)
+        rdDetermineBonds.DetermineBondOrders(rwmol, charge=charge)
+    mol = rwmol.GetMol()
+    Chem.SanitizeMol(mol)
+    return mol
+
+
+def rdkit_from_qcschema(entry):
+    """
+    Build an RDKit molecule directly from a QCSchema entry or molecule.
+
+    This skips OpenFF's chemical perception. The mapped SMILES in the entry
+    attributes is used for the chemical graph when present, otherwise the
+    QCSchema connectivity and charge are used (bonds are perceived from the
+    geometry when there is no connectivity). The geometry is added as a
+    conformer and stereochemistry is assigned from it.
+
+    Parameters
+    ----------
+    entry : QCPortal Entry or QCElemental Molecule
+        Entry (with ``molecule`` and ``attributes``) or molecule to convert
+
+    Returns
+    -------
+    rdkit.Chem.Mol
+    """
+    molecule = getattr(entry, "molecule", entry)
+    attributes = getattr(entry, "attributes", None) or {}
+    extras = getattr(molecule, "extras", None) or {}
+    mapped_smiles = attributes.get(CMILES_KEY) or extras.get(CMILES_KEY)
+
+    symbols = list(molecule.symbols)
+    geometry = np.asarray(molecule.geometry, dtype=float).reshape(-1, 3) * BOHR_TO_ANGSTROM
+    charge = int(round(float(getattr(molecule, "molecular_charge", 0) or 0)))
+
+    if mapped_smiles:
+        mol = _rdkit_from_mapped_smiles(mapped_smiles)
+        mol_symbols = [atom.GetSymbol() for atom in mol.GetAtoms()]
+        if mol_symbols != symbols:
+            raise ValueError("Mapped SMILES does not match the molecule's atoms")
+    else:
+        mol = _rdkit_from_connectivity(
+            symbols, geometry, getattr(molecule, "connectivity", None), charge
+        )
+
+    mol.RemoveAllConformers()
+    mol.AddConformer(_conformer(geometry), assignId=True)
+
+    Chem.AssignStereochemistryFrom3D(mol)
+    return mol
+
+
+def molecule_key(entry) -> str:
+    """
+    Key identifying the molecule of an entry across datasets.
+
+    Combines the QCElemental molecule hash (symbols, geometry, charge and
+    multiplicity) with the mapped SMILES, if any, since both determine the
+    converted molecule.
+    """
+    molecule = getattr(entry, "molecule", entry)
+    attributes = getattr(entry, "attributes", None) or {}
+    extras = getattr(molecule, "extras", None) or {}
+    mapped_smiles = attributes.get(CMILES_KEY) or extras.get(CMILES_KEY) or ""
+    return f"{molecule.get_hash()}:{mapped_smiles}"
+
 
 def gather_molecular_data(entry, 
                             store_entry=False, 
                             get_openff=True, 
                             get_rdkit=False,
-                            include_error=False
+                            include_error=False,
+                            rdkit_engine="openff"
                             ):
         """
         Helper function to gather molecular data from an entry.
@@ -23,6 +194,10 @@ def gather_molecular_data(entry,
             If True, include OpenFF molecule
         get_rdkit_mol : bool, default=False
             If True, include RDKit molecules
+        rdkit_engine : {"openff", "rdkit"}, default="openff"
+            How RDKit molecules are built. "openff" converts through the
+            OpenFF toolkit, "rdkit" builds them directly from QCSchema
+            (see `rdkit_from_qcschema`), skipping OpenFF perception
             
         Returns
         -------
@@ -42,7 +217,19 @@ def gather_molecular_data(entry,
                 if include_error:
                     data['OpenFFMol_Error'] = str(e)
                 
-        if get_rdkit:
+        if get_rdkit and rdkit_engine == "rdkit":
+            try:
+                data['RDKit Molecule'] = rdkit_from_qcschema(entry)
+            except Exception as e:
+                data['RDKit Molecule'] = None
+                if include_error:
+                    data['RDKit_Error'] = str(e)
+        elif get_rdkit and get_openff and data['OpenFFMol'] is None:
+            # Fails for the same reason as the OpenFF conversion
+            data['RDKit Molecule'] = None
+            if include_error:
+                data['RDKit_Error'] = data['OpenFFMol_Error']
+        elif get_rdkit:
             try:
                 if 'OpenFFMol' in data:
                     mol = data['OpenFFMol']
@@ -0,0 +1,253 @@
+"""
+Widgets for viewing large property values without sending them to the frontend in full.
+"""
+
+import html
+
+import numpy as np
+import ipywidgets as widgets
+
+# Never render more than this many elements of an array at once
+MAX_RENDERED_ELEMENTS = 2000
+
+
+def to_array(value) -> np.ndarray:
+    """Convert a property value to a NumPy array, falling back to object dtype."""
+    try:
+        return np.asarray(value)
+    except ValueError:
+        # Ragged nested sequences
+        array = np.empty(len(value), dtype=object)
+        array[:] = list(value)
+        return array
+
+
+def is_array_like(value) -> bool:
+    """Whether a property value should be viewed as an array."""
+    return isinstance(value, (np.ndarray, list, tuple))
+
+
+def summarize_array(array: np.ndarray) -> dict:
+    """
+    Summarize an array with shape, dtype and, for numeric data, min/max/norm.
+
+    Complex data is summarized by its largest magnitude, mean and norm.
+    NaNs are ignored in the statistics.
+    """
+    summary = {
+        'shape': array.shape,
+        'dtype': str(array.dtype),
+        'size': array.size,
+    }
+    if array.size and np.issubdtype(array.dtype, np.complexfloating):
+        # Complex values have no order; summarize their magnitudes instead
+        finite = np.isfinite(array)
+        summary['nan'] = int(array.size - finite.sum())
+        if finite.any():
+            values = array[finite]
+            summary['max_abs'] = float(np.abs(values).max())
+            summary['mean'] = complex(values.mean())
+            summary['norm'] = float(np.linalg.norm(values))
+    elif array.size and np.issubdtype(array.dtype, np.number):
+        values = array.astype(float, copy=False)
+        finite = np.isfinite(values)
+        summary['nan'] = int(array.size - finite.sum())
+        if finite.any():
+            values = values[finite]
+            summary['min'] = float(values.min())
+            summary['max'] = float(values.max())
+            summary['mean'] = float(values.mean())
+            summary['norm'] = float(np.linalg.norm(values))
+    return summary
+
+
+def parse_slice(text: str, ndim: int) -> tuple:
+    """
+    Parse NumPy-style index text such as ``"0:10, :3"`` into a tuple of slices.
+
+    Only integers and slices are accepted, so arbitrary code is never evaluated.
+    """
+    parts = [p.strip() for p in text.split(',')] if text.strip() else []
+    if len(parts) > ndim:
+        raise ValueError(f"Too many indices for array with {ndim} dimensions")
+
+    index = []
+    for part in parts:
+        if ':' in part:
+            bounds = [int(b) if b.strip() else None for b in part.split(':')]
+            if len(bounds) > 3:
+                raise ValueError(f"Invalid slice: {part}")
+            index.append(slice(*bounds))
+        else:
+            index.append(int(part))
+    return tuple(index)
+
+
+def index_labels(shape, index) -> list:
+    """
+    Original indices along each axis of ``array[index]``.
+
+    ``index`` is a tuple of integers and slices as returned by
+    `parse_slice`. Axes indexed by an integer are dropped, like in the
+    result.
+    """
+    labels = []
+    for axis, size in enumerate(shape):
+        part = index[axis] if axis < len(index) else slice(None)
+        if isinstance(part, slice):
+            labels.append(range(size)[part])
+    return labels
+
+
+def _format_value(value, max_length=80) -> str:
+    if isinstance(value, (float, np.floating)):
+        return f'{value:.6g}'
+    if isinstance(value, (complex, np.complexfloating)):
+        return f'{value.real:.6g}{value.imag:+.6g}j'
+    text = str(value)
+    if len(text) > max_length:
+        text = text[:max_length] + '...'
+    return html.escape(text)
+
+
+def array_to_html(array: np.ndarray, row_offset=0, max_elements=MAX_RENDERED_ELEMENTS,
+                  row_labels=None, column_labels=None) -> str:
+    """
+    Render at most ``max_elements`` of a 0-2D array as an HTML table.
+
+    Rows are labelled from ``row_offset``, or with ``row_labels`` (and
+    columns with ``column_labels``) when the array is a slice of a larger one.
+    """
+    if array.ndim == 0:
+        return f'<code>{_format_value(array.item())}</code>'
+    if array.size == 0:
+        return '<div style="color: #666; font-style: italic;">Empty</div>'
+
+    table = array.reshape(len(array), -1) if array.ndim > 1 else array.reshape(-1, 1)
+    max_rows = max(1, max_elements // max(1, table.shape[1]))
+    max_cols = max(1, max_elements // max(1, min(len(table), max_rows)))
+    clipped = table[:max_rows, :max_cols]
+
+    if column_labels is None or array.ndim != 2:
+        column_labels = range(table.shape[1])
+    if row_labels is None:
+        row_labels = range(row_offset, row_offset + len(table))
+
+    header = ''.join(f'<th>{column_labels[j]}</th>' for j in range(clipped.shape[1]))
+    rows = []
+    for i, row in enumerate(clipped):
+        cells = ''.join(f'<td>{_format_value(v)}</td>' for v in row)
+        rows.append(f'<tr><th>{row_labels[i]}</th>{cells}</tr>')
+
+    note = ''
+    if clipped.shape != table.shape:
+        note = (
+            f'<div style="color: #666; font-style: italic;">'
+            f'Showing {clipped.shape[0]} x {clipped.shape[1]} of {table.shape[0]} x {table.shape[1]}</div>'
+        )
+    return (
+        f'<table class="property-table"><tr><th></th>{header}</tr>{"".join(rows)}</table>{note}'
+    )
+
+
+class ArrayPropertyViewer:
+    """
+    Summary and paginated view of a large array property.
+
+    The value is converted to NumPy once. Only the summary and the
+    currently visible rows (or a user-entered slice) are rendered.
+    """
+
+    def __init__(self, name, value, rows_per_page=20):
+        self.name = name
+        self.array = to_array(value)
+        self.rows_per_page = rows_per_page
+        self._summary = None
+
+    @property
+    def summary(self) -> dict:
+        if self._summary is None:
+            self._summary = summarize_array(self.array)
+        return self._summary
+
+    @property
+    def n_pages(self) -> int:
+        n_rows = len(self.array) if self.array.ndim else 1
+        return max(1, (n_rows + self.rows_per_page - 1) // self.rows_per_page)
+
+    def page(self, page_num) -> np.ndarray:
+        """Return the rows of the given page as a view of the array."""
+        if self.array.ndim == 0:
+            return self.array
+        start = page_num * self.rows_per_page
+        return self.array[start:start + self.rows_per_page]
+
+    def summary_html(self) -> str:
+        s = self.summary
+        items = [
+            f"<strong>shape:</strong> {s['shape']}",
+            f"<strong>dtype:</strong> {s['dtype']}",
+        ]
+        for key, label in (('min', 'min'), ('max', 'max'), ('max_abs', 'max |x|'),
+                           ('mean', 'mean'), ('norm', 'norm')):
+            if key in s:
+                items.append(f'<strong>{label}:</strong> {_format_value(s[key])}')
+        if s.get('nan'):
+            items.append(f"<strong>NaN:</strong> {s['nan']}")
+        return '<br>'.join(items)
+
+    def widget(self) -> widgets.Widget:
+        """Create the viewer widget."""
+        title = widgets.HTML(
+            f"<div style='font-weight: bold; margin-bottom: 10px;'>{html.escape(self.name)}</div>"
+        )
+        summary = widgets.HTML(self.summary_html())
+        data_html = widgets.HTML()
+
+        prev_button = widgets.Button(description='Previous', disabled=True,
+                                     layout=widgets.Layout(width='80px'))
+        next_button = widgets.Button(description='Next', disabled=self.n_pages <= 1,
+                                     layout=widgets.Layout(width='80px'))
+        page_label = widgets.HTML(layout=widgets.Layout(padding='5px 10px'))
+        slice_input = widgets.Text(
+            placeholder='e.g. 0:10, :3',
+            description='Slice:',
+            layout=widgets.Layout(width='200px')
+        )
+        current_page = [0]
+
+        def show_page(page_num):
+            current_page[0] = page_num
+            prev_button.disabled = page_num == 0
+            next_button.disabled = page_num >= self.n_pages - 1
+            page_label.value = f'{page_num + 1} of {self.n_pages}'
+            data_html.value = array_to_html(
+                self.page(page_num), row_offset=page_num * self.rows_per_page
+            )
+
+        def on_slice_submit(event):
+            if not slice_input.value.strip():
+                show_page(current_page[0])
+                return
+            try:
+                index = parse_slice(slice_input.value, self.array.ndim)
+                labels = index_labels(self.array.shape, index) + [None, None]
+                data_html.value = array_to_html(
+                    np.asarray(self.array[index]), row_labels=labels[0], column_labels=labels[1]
+                )
+                page_label.value = f'[{html.escape(slice_input.value)}]'
+            except (ValueError, IndexError) as e:
+                data_html.value = f'<span style="color: #a00;">{html.escape(str(e))}</span>'
+
+        prev_button.on_click(lambda b: show_page(max(0, current_page[0] - 1)))
+        next_button.on_click(lambda b: show_page(min(self.n_pages - 1, current_page[0] + 1)))
+        slice_input.on_submit(on_slice_submit)
+
+        show_page(0)
+        return widgets.VBox([
+            title,
+            summary,
+            widgets.HBox([prev_button, page_label, next_button]),
+            slice_input,
+            data_html,
+        ])